@@ -0,0 +1,253 @@
+"""Time a scan's stages against the local stand-in server.
+
+    python -m benchmarks.run                       # 10, 100 and 1000 sources
+    python -m benchmarks.run --sizes 10 100 --latency-ms 20 --error-rate 0.05
+    python -m benchmarks.run --compare benchmarks/baseline.json
+
+Results are written as JSON; pass an earlier result to ``--compare`` to list
+benchmarks whose median got slower than ``--tolerance`` allows (exit code 1).
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import yaml
+
+from benchmarks.server import StandInServer
+from utils.config import load_config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUTPUT = os.path.join(REPO_ROOT, 'benchmarks', 'results', 'latest.json')
+
+# Fixture served for each kind of source, with the provider whose real
+# sources.yaml keywords/check_for terms it is scanned with
+FEED_FIXTURES = (('aws_training_blog.xml', 'aws'), ('microsoft_learn_blog.atom', 'azure'))
+PAGE_FIXTURES = (('aws_coming_soon.html', 'aws'), ('microsoft_certifications.html', 'azure'))
+
+def build_sources(server, size, repo_sources):
+    """sources.yaml with ``size`` feeds and ``size`` pages, all on the stand-in"""
+    sources = {'rss_feeds': {}, 'announcement_pages': {}}
+    for i in range(size):
+        fixture, provider = FEED_FIXTURES[i % len(FEED_FIXTURES)]
+        template = repo_sources['rss_feeds'][provider][0]
+        sources['rss_feeds'].setdefault(provider, []).append({
+            'url': server.url(fixture, f"feed-{i}"),
+            'name': f"{template['name']} #{i}",
+            'keywords': template['keywords'],
+        })
+
+        fixture, provider = PAGE_FIXTURES[i % len(PAGE_FIXTURES)]
+        template = repo_sources['announcement_pages'][provider][0]
+        sources['announcement_pages'].setdefault(provider, []).append({
+            'url': server.url(fixture, f"page-{i}"),
+            'name': f"{template['name']} #{i}",
+            'check_for': template['check_for'],
+        })
+    return sources
+
+def build_settings(repo_settings, workdir):
+    """The repo's settings with all state kept in ``workdir`` and nothing sent"""
+    settings = json.loads(json.dumps(repo_settings))
+    settings['notification']['email']['enabled'] = False
+    settings['notification']['slack']['enabled'] = False
+    settings['notification'].setdefault('delivery', {})['outbox'] = ''
+    # Fixtures are recorded, so keep their entries inside the lookback window
+    settings['lookback_days'] = 36500
+    fetch = settings.setdefault('fetch', {})
+    # Every source lives on 127.0.0.1; don't let the per-host cap serialize them
+    fetch['per_host_limit'] = fetch.get('max_workers', 8)
+    fetch['host_rate_per_second'] = 0
+    settings['cache'] = {
+        key: os.path.join(workdir, os.path.basename(path)) if isinstance(path, str) else path
+        for key, path in settings.get('cache', {}).items()
+    }
+    settings['reporting'] = {}
+    return settings
+
+@contextlib.contextmanager
+def working_directory(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+def run_once(server, size, repo_sources, repo_settings):
+    """One cold-cache pass over every benchmark; returns {name: (seconds, count)}"""
+    from main import CertificationMonitor
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='cert-bench-') as workdir:
+        os.makedirs(os.path.join(workdir, 'config'))
+        sources = build_sources(server, size, repo_sources)
+        settings = build_settings(repo_settings, workdir)
+        with open(os.path.join(workdir, 'config', 'sources.yaml'), 'w') as f:
+            yaml.safe_dump(sources, f)
+        with open(os.path.join(workdir, 'config', 'settings.yaml'), 'w') as f:
+            yaml.safe_dump(settings, f)
+
+        with working_directory(workdir):
+            monitor = CertificationMonitor()
+            try:
+                # Cold: nothing cached, every source is downloaded and parsed
+                seconds, updates = timed(monitor.rss_monitor.check_feeds, sources['rss_feeds'])
+                results['check_feeds_cold'] = (seconds, len(updates))
+                seconds, page_updates = timed(monitor.webpage_monitor.check_pages, sources['announcement_pages'])
+                results['check_pages_cold'] = (seconds, len(page_updates))
+
+                # Warm: validators are cached, so sources may answer 304
+                seconds, warm = timed(monitor.rss_monitor.check_feeds, sources['rss_feeds'])
+                results['check_feeds_warm'] = (seconds, len(warm))
+                seconds, warm = timed(monitor.webpage_monitor.check_pages, sources['announcement_pages'])
+                results['check_pages_warm'] = (seconds, len(warm))
+
+                all_updates = updates + page_updates
+                seconds, filtered = timed(monitor.filter_updates, all_updates)
+                results['filter_updates'] = (seconds, len(filtered))
+
+                notifier = monitor.notifier
+                seconds, messages = timed(notifier.build_email_messages, filtered)
+                results['render_email'] = (seconds, len(messages))
+                seconds, blocks = timed(notifier._create_slack_blocks, filtered)
+                results['render_slack'] = (seconds, len(blocks))
+            finally:
+                monitor.close()
+    return results
+
+def run_benchmarks(sizes, repeat, server):
+    repo_config = load_config(
+        os.path.join(REPO_ROOT, 'config', 'sources.yaml'),
+        os.path.join(REPO_ROOT, 'config', 'settings.yaml')
+    )
+    results = {}
+    for size in sizes:
+        runs = []
+        for _ in range(repeat):
+            server.reset_stats()
+            runs.append(run_once(server, size, repo_config.sources, repo_config.settings))
+        stats = dict(server.stats)
+
+        size_results = {}
+        for name in runs[0]:
+            times = [run[name][0] for run in runs]
+            size_results[name] = {
+                'median_seconds': round(statistics.median(times), 6),
+                'min_seconds': round(min(times), 6),
+                'items': runs[-1][name][1],
+            }
+        size_results['server'] = stats
+        results[str(size)] = size_results
+
+        logger.info(f"{size} sources:")
+        for name, result in size_results.items():
+            if name != 'server':
+                logger.info(f"   {name:<18} {result['median_seconds'] * 1000:10.1f} ms  ({result['items']} items)")
+    return results
+
+def compare(current, baseline, tolerance):
+    """Benchmarks whose median is slower than baseline by more than ``tolerance``"""
+    regressions = []
+    for size, benchmarks in current['results'].items():
+        for name, result in benchmarks.items():
+            previous = baseline.get('results', {}).get(size, {}).get(name)
+            if name == 'server' or not previous or not previous.get('median_seconds'):
+                continue
+            ratio = result['median_seconds'] / previous['median_seconds']
+            marker = ''
+            if ratio > 1 + tolerance:
+                regressions.append((size, name, ratio))
+                marker = '  <-- regression'
+            logger.info(f"   {size:>5} {name:<18} {ratio:6.2f}x{marker}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark scans against recorded fixtures")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000],
+                        help="number of feeds (and of pages) to scan")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per size; the median is reported")
+    parser.add_argument('--latency-ms', type=float, default=5.0, help="delay added to every response")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="extra random delay, up to this much")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests answered 503")
+    parser.add_argument('--not-modified-rate', type=float, default=1.0,
+                        help="fraction of matching conditional requests answered 304")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="where to write the JSON results")
+    parser.add_argument('--compare', metavar='BASELINE', help="earlier results to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed slowdown before a benchmark counts as a regression")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(message)s')
+    logger.setLevel(logging.INFO)
+
+    params = {
+        'sizes': args.sizes,
+        'repeat': args.repeat,
+        'latency_ms': args.latency_ms,
+        'jitter_ms': args.jitter_ms,
+        'error_rate': args.error_rate,
+        'not_modified_rate': args.not_modified_rate,
+        'seed': args.seed,
+    }
+    with StandInServer(
+        latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate, not_modified_rate=args.not_modified_rate, seed=args.seed
+    ) as server:
+        results = run_benchmarks(args.sizes, args.repeat, server)
+
+    report = {
+        'version': 1,
+        'created': datetime.now(timezone.utc).isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'params': params,
+        'results': results,
+    }
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        # Sizes and repeat counts may differ; the server behavior must not
+        conditions = {k: v for k, v in params.items() if k not in ('sizes', 'repeat')}
+        previous = {k: v for k, v in baseline.get('params', {}).items() if k not in ('sizes', 'repeat')}
+        if previous != conditions:
+            logger.warning("Baseline was recorded with different parameters; ratios may not be comparable")
+        logger.info(f"Compared with {args.compare}:")
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            logger.error(f"{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}")
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
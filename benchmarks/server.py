@@ -0,0 +1,142 @@
+import hashlib
+import http.server
+import os
+import random
+import threading
+import time
+from email.utils import formatdate
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+CONTENT_TYPES = {
+    '.xml': 'application/rss+xml; charset=utf-8',
+    '.atom': 'application/atom+xml; charset=utf-8',
+    '.html': 'text/html; charset=utf-8',
+}
+
+class StandInServer:
+    """Local HTTP server that replays recorded fixtures like a vendor site would.
+
+    ``/<fixture>/<anything>`` serves ``fixtures/<fixture>``, so each source
+    can have its own URL (and validator cache entry) while sharing content.
+    Responses carry an ETag and Last-Modified; a conditional request that
+    matches is answered 304 with probability ``not_modified_rate``. Each
+    request waits ``latency`` (+ up to ``jitter``) seconds and fails with a
+    503 with probability ``error_rate``.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, not_modified_rate=1.0,
+                 seed=0, fixtures_dir=FIXTURES_DIR):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.not_modified_rate = not_modified_rate
+        self.fixtures = load_fixtures(fixtures_dir)
+        self.stats = {'requests': 0, 'ok': 0, 'not_modified': 0, 'errors': 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, fixture, name):
+        return f"{self.base_url}/{fixture}/{name}"
+
+    def start(self):
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Send headers and body in one write so small responses don't
+            # stall on Nagle/delayed-ACK and skew the timings
+            wbufsize = -1
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                server.handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='stand-in', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def reset_stats(self):
+        with self._lock:
+            for key in self.stats:
+                self.stats[key] = 0
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def handle(self, request):
+        with self._lock:
+            self.stats['requests'] += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            fail = self._random.random() < self.error_rate
+            not_modified = self._random.random() < self.not_modified_rate
+
+        if delay:
+            time.sleep(delay)
+
+        fixture = self.fixtures.get(request.path.strip('/').split('/')[0])
+        if fixture is None:
+            self._respond(request, 404, b'not found')
+            return
+        if fail:
+            with self._lock:
+                self.stats['errors'] += 1
+            self._respond(request, 503, b'service unavailable')
+            return
+
+        body, content_type, etag, last_modified = fixture
+        if request.headers.get('If-None-Match') == etag and not_modified:
+            with self._lock:
+                self.stats['not_modified'] += 1
+            request.send_response(304)
+            request.send_header('ETag', etag)
+            request.send_header('Last-Modified', last_modified)
+            request.end_headers()
+            return
+
+        with self._lock:
+            self.stats['ok'] += 1
+        self._respond(request, 200, body, content_type, {'ETag': etag, 'Last-Modified': last_modified})
+
+    def _respond(self, request, status, body, content_type='text/plain', headers=None):
+        request.send_response(status)
+        request.send_header('Content-Type', content_type)
+        request.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            request.send_header(name, value)
+        request.end_headers()
+        request.wfile.write(body)
+
+def load_fixtures(fixtures_dir=FIXTURES_DIR):
+    """Map fixture file name to (body, content type, ETag, Last-Modified)"""
+    fixtures = {}
+    for name in sorted(os.listdir(fixtures_dir)):
+        path = os.path.join(fixtures_dir, name)
+        with open(path, 'rb') as f:
+            body = f.read()
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        last_modified = formatdate(os.path.getmtime(path), usegmt=True)
+        content_type = CONTENT_TYPES.get(os.path.splitext(name)[1], 'application/octet-stream')
+        fixtures[name] = (body, content_type, etag, last_modified)
+    return fixtures
@@ -1,9 +1,34 @@
+import time
+_import_started = time.perf_counter()
+
+import argparse
+import asyncio
 import logging
+import os
+import signal
+import socket
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from monitors.rss_monitor import RSSMonitor
 from monitors.webpage_monitor import WebPageMonitor
 from utils.notifier import Notifier
-import yaml
+from utils.http_cache import ValidatorCache
+from utils.seen_store import ReadOnlySeenStore, SeenStore, Watermark
+from utils.http_client import Fetcher
+from utils.concurrency import AsyncHostLimiter
+from utils.update_filter import UpdateFilter
+from utils.metrics import ScanMetrics
+from utils.scheduler import SourceScheduler
+from utils.page_snapshots import PageSnapshotStore
+from utils.config import ConfigError, load_config
+from utils.parse_pool import ParsePool
+from utils.archive import UpdateArchive
+from utils.rendering import Digest, render_text
+from utils.shard_queue import ShardQueue, source_count, split_sources
+from utils.update import Update
+from utils.lazy_import import import_times
+
+_import_seconds = time.perf_counter() - _import_started
 
 logging.basicConfig(
     level=logging.INFO,
@@ -12,52 +37,200 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class CertificationMonitor:
-    def __init__(self):
+    def __init__(self, worker=False):
+        """``worker`` builds a shard worker, which reads the seen items, page
+        snapshots and HTTP validators but leaves writing them, and sending
+        notifications, to the coordinator"""
+        self.worker = worker
         self.load_config()
-        self.notifier = Notifier(self.settings['notification'])
-        self.rss_monitor = RSSMonitor(self.settings)
-        self.webpage_monitor = WebPageMonitor(self.settings)
+        self.notifier = None if worker else Notifier(self.settings['notification'])
+        cache_config = self.settings.get('cache', {})
+        self.http_cache = ValidatorCache(
+            cache_config.get('http_validators', '.cache/http_validators.json')
+        )
+        seen_items_path = cache_config.get('seen_items', '.cache/seen_items.sqlite3')
+        if worker:
+            self.seen_store = ReadOnlySeenStore(seen_items_path)
+        else:
+            # Seen items must outlive the lookback window or old posts would reappear
+            self.seen_store = SeenStore(
+                seen_items_path,
+                retention_days=max(
+                    cache_config.get('seen_retention_days', 30),
+                    self.settings.get('lookback_days', 7) + 1
+                )
+            )
+        # One fetch layer (pooled session, rate limits, circuit breakers) for every source
+        self.fetcher = Fetcher(self.settings)
+        # Every accepted update is kept for later searches and digests
+        archive_path = cache_config.get('archive', '.cache/archive.sqlite3')
+        self.archive = UpdateArchive(archive_path) if archive_path and not worker else None
+        self.page_snapshots = None
+        if self.settings.get('page_changes', {}).get('enabled', False):
+            self.page_snapshots = PageSnapshotStore(
+                cache_config.get('page_snapshots', '.cache/page_snapshots.json')
+            )
+        self.create_monitors()
     
     def load_config(self):
-        with open('config/sources.yaml', 'r') as f:
-            self.sources = yaml.safe_load(f)
-        with open('config/settings.yaml', 'r') as f:
-            self.settings = yaml.safe_load(f)
+        """Load the validated config; raises ConfigError if it is malformed"""
+        self.config = load_config()
+        self.sources = self.config.sources
+        self.settings = self.config.settings
+    
+    def create_monitors(self):
+        self.rss_monitor = RSSMonitor(
+            self.settings, cache=self.http_cache, seen_store=self.seen_store,
+            fetcher=self.fetcher, config=self.config
+        )
+        self.webpage_monitor = WebPageMonitor(
+            self.settings, cache=self.http_cache, seen_store=self.seen_store,
+            fetcher=self.fetcher, snapshots=self.page_snapshots, config=self.config
+        )
+    
+    def reload_config(self):
+        """Pick up edits to the config files; returns True if anything changed.
+        
+        An invalid edit is logged and the running config is kept. Sources,
+        keywords, filters and fetch limits apply from the next scan; the
+        notification and cache sections are only read at startup.
+        """
+        previous = self.config
+        try:
+            config = load_config()
+        except ConfigError as e:
+            logger.error(f"❌ Config reload failed, keeping current config: {e}")
+            return False
+        if config is previous:
+            return False
+        
+        for section in ('notification', 'cache'):
+            if config.settings.get(section) != previous.settings.get(section):
+                logger.warning(f"⚠️ Changes to '{section}' settings take effect after a restart")
+        
+        self.config = config
+        self.sources = config.sources
+        self.settings = config.settings
+        self.fetcher.configure(self.settings)
+        self.create_monitors()
+        logger.info("🔄 Configuration reloaded")
+        return True
     
     def scan_all_sources(self):
         """Scan all configured sources for updates"""
+        return asyncio.run(self.scan())
+    
+    async def scan(self, sources=None):
+        """Scan all sources concurrently on the running event loop.
+        
+        RSS feeds and announcement pages are fetched at the same time through
+        the shared fetch layer; parsing runs in a separate executor so the loop
+        keeps overlapping network waits. ``sources`` limits the scan to a
+        subset laid out like sources.yaml (used by daemon mode).
+        """
+        sources = self.sources if sources is None else sources
         logger.info("=" * 60)
         logger.info("🚀 Starting Certification Update Scan")
         logger.info(f"⏰ Scan time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}")
         logger.info("=" * 60)
         
-        all_updates = []
+        update_filter = await self.collect(sources)
+        
+        # Notification delivery blocks on SMTP/HTTP, so keep it off the loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.process_updates, update_filter)
+    
+    async def collect(self, sources):
+        """Fetch and parse ``sources``, returning the filter holding their updates"""
+        self.http_cache.reset_stats()
+        self.start_metrics()
+        self.fetcher.start_scan()
+        update_filter = self.create_update_filter()
+        
+        fetch_config = self.settings.get('fetch', {})
+        max_workers = max(1, fetch_config.get('max_workers', 1))
+        limiter = AsyncHostLimiter(max_workers, fetch_config.get('per_host_limit', max_workers))
+        
+        # Big scans can parse in worker processes to use every core
+        parse_pool = ParsePool.for_scan(self.settings, source_count(sources))
+        self.rss_monitor.parse_pool = parse_pool
+        self.webpage_monitor.parse_pool = parse_pool
         
-        # 1. Monitor RSS Feeds
-        logger.info("\n📡 Checking RSS feeds...")
         try:
-            rss_updates = self.rss_monitor.check_feeds(
-                self.sources.get('rss_feeds', {})
-            )
-            all_updates.extend(rss_updates)
-            logger.info(f"   Found {len(rss_updates)} updates from RSS feeds")
-        except Exception as e:
-            logger.error(f"❌ Error checking RSS feeds: {e}")
+            with ThreadPoolExecutor(max_workers, thread_name_prefix='fetch') as fetch_executor, \
+                    ThreadPoolExecutor(fetch_config.get('parse_workers', 4), thread_name_prefix='parse') as parse_executor:
+                # 1. Monitor RSS Feeds and 2. Announcement Pages, side by side,
+                # filtering updates as they stream in rather than collecting them
+                logger.info("\n📡 Checking RSS feeds and 🌐 announcement pages...")
+                rss_count, page_count = await asyncio.gather(
+                    self._run_phase(
+                        "RSS feeds",
+                        self.rss_monitor.stream_feeds(
+                            sources.get('rss_feeds', {}),
+                            limiter, fetch_executor, parse_executor
+                        ),
+                        update_filter
+                    ),
+                    self._run_phase(
+                        "announcement pages",
+                        self.webpage_monitor.stream_pages(
+                            sources.get('announcement_pages', {}),
+                            limiter, fetch_executor, parse_executor
+                        ),
+                        update_filter
+                    )
+                )
+        finally:
+            self.fetcher.end_scan()
+            if parse_pool is not None:
+                self.rss_monitor.parse_pool = None
+                self.webpage_monitor.parse_pool = None
+                parse_pool.close()
         
-        # 2. Monitor Announcement Pages
-        logger.info("\n🌐 Checking announcement pages...")
+        logger.info(f"   Found {rss_count} updates from RSS feeds")
+        logger.info(f"   Found {page_count} updates from web pages")
+        return update_filter
+    
+    async def _run_phase(self, label, stream, update_filter):
+        """Feed one phase's update stream into the filter, returning its count"""
+        count = 0
         try:
-            page_updates = self.webpage_monitor.check_pages(
-                self.sources.get('announcement_pages', {})
-            )
-            all_updates.extend(page_updates)
-            logger.info(f"   Found {len(page_updates)} updates from web pages")
+            async for update in stream:
+                update_filter.add(update)
+                count += 1
         except Exception as e:
-            logger.error(f"❌ Error checking announcement pages: {e}")
+            logger.error(f"❌ Error checking {label}: {e}")
+        return count
+    
+    def create_update_filter(self):
+        """Build the dedup/relevance filter configured in settings"""
+        filters = self.settings.get('filters', {})
+        return UpdateFilter(
+            min_relevance=filters.get('min_relevance', 0),
+            max_updates=filters.get('max_updates'),
+            near_duplicate_similarity=filters.get('near_duplicate_similarity', 0.7)
+        )
+    
+    def process_updates(self, update_filter):
+        """Notify and record the updates accepted by a scan's filter"""
+        self.log_cache_stats()
+        self.log_fetch_stats()
         
         # 3. Filter and deduplicate
         logger.info("\n🔍 Filtering and deduplicating...")
-        filtered_updates = self.filter_updates(all_updates)
+        self.log_filter_stats()
+        filtered_updates = update_filter.results()
+        logger.info(f"   {len(filtered_updates)} of {update_filter.received} updates passed the filters")
+        if update_filter.merged:
+            logger.info(f"   {update_filter.merged} duplicate reports merged into existing updates")
+        self.hold_back_evicted(update_filter)
+        cert_index = update_filter.cert_index
+        if cert_index:
+            exams = ', '.join(f"{code} ({count})" for code, count in cert_index.codes()[:10])
+            logger.info(f"🏷️ Exams mentioned: {exams}")
+        if self.archive:
+            for update in filtered_updates:
+                self.archive.stage(update)
         
         # 4. Send notifications
         logger.info("\n" + "=" * 60)
@@ -75,46 +248,486 @@ class CertificationMonitor:
             logger.info("   This is normal if there haven't been recent announcements")
         
         logger.info("=" * 60)
+        
+        # Everything processed in this scan has now been handled
+        try:
+            self.seen_store.commit()
+            if self.page_snapshots:
+                self.page_snapshots.commit()
+        except Exception as e:
+            logger.error(f"❌ Error saving seen items: {e}")
+        
+        try:
+            self.http_cache.save()
+        except Exception as e:
+            logger.error(f"❌ Error saving HTTP cache: {e}")
+        
+        if self.archive:
+            try:
+                archived = self.archive.commit()
+                if archived:
+                    logger.info(f"🗄️ {archived} updates archived")
+            except Exception as e:
+                logger.error(f"❌ Error archiving updates: {e}")
+        
+        self.write_reports()
         return filtered_updates
     
+    def hold_back_evicted(self, update_filter):
+        """Leave updates cut by ``filters.max_updates`` unseen so a later scan reports them"""
+        if not update_filter.evicted:
+            return
+        for update in update_filter.evicted:
+            self.seen_store.unstage(update.get('seen_key'))
+            if update.type == 'rss':
+                feed_url = update.get('feed_url')
+                if feed_url:
+                    # Read the feed again, back to its previous watermark
+                    self.seen_store.unstage_watermark(feed_url)
+                    self.http_cache.forget(feed_url)
+            else:
+                self.http_cache.forget(update.url)
+                if self.page_snapshots and 'change' in update:
+                    self.page_snapshots.unstage(update.url)
+        logger.info(
+            f"   {len(update_filter.evicted)} lower-ranked updates over filters.max_updates "
+            f"held back for the next scan"
+        )
+    
+    def start_metrics(self):
+        """Give both monitors a fresh metrics collector for this scan"""
+        self.metrics = ScanMetrics()
+        self.rss_monitor.metrics = self.metrics
+        self.webpage_monitor.metrics = self.metrics
+        self.fetcher.metrics = self.metrics
+    
+    def write_reports(self):
+        """Write the scan's JSON report and Prometheus metrics"""
+        self.metrics.finish()
+        self.metrics.log_slowest()
+        
+        reporting = self.settings.get('reporting', {})
+        try:
+            if reporting.get('json_dir'):
+                path = self.metrics.write_json(reporting['json_dir'], keep=reporting.get('keep_reports'))
+                logger.info(f"📝 Scan report written to {path}")
+            if reporting.get('prometheus_file'):
+                self.metrics.write_prometheus(reporting['prometheus_file'])
+        except Exception as e:
+            logger.error(f"❌ Error writing scan report: {e}")
+    
+    def log_cache_stats(self):
+        """Log conditional-request cache hits and misses per source"""
+        stats = self.http_cache.stats()
+        if not stats:
+            return
+        
+        hits = sum(s['hits'] for s in stats.values())
+        misses = sum(s['misses'] for s in stats.values())
+        logger.info(f"\n💾 HTTP cache: {hits} unchanged (304), {misses} downloaded")
+        for source, counts in stats.items():
+            logger.info(f"   {source}: {counts['hits']} hit(s), {counts['misses']} miss(es)")
+    
+    def log_fetch_stats(self):
+        """Log retries, hosts skipped by their circuit breaker and budget cut-offs"""
+        counters = self.metrics.counters
+        if counters.get('fetch_retries'):
+            logger.info(f"   🔁 {counters['fetch_retries']} fetch retries")
+        open_hosts = self.fetcher.breaker.open_hosts()
+        if open_hosts:
+            logger.warning(
+                f"   🔌 {counters.get('fetch_circuit_open', 0)} fetches skipped; "
+                f"failing hosts: {', '.join(open_hosts)}"
+            )
+        if counters.get('fetch_budget_exhausted'):
+            logger.warning(
+                f"   ⏱️ Scan budget of {self.fetcher.budget_seconds}s ran out; "
+                f"{counters['fetch_budget_exhausted']} fetches were cut off"
+            )
+    
+    def log_filter_stats(self):
+        """Log how many entries exclude_keywords/include_certs dropped, per filter"""
+        past_cutoff = self.metrics.counters.get('entries_past_cutoff', 0)
+        if past_cutoff:
+            logger.info(f"   {past_cutoff} entries past the lookback window skipped in newest-first feeds")
+        incremental = self.metrics.counters.get('feeds_read_incrementally', 0)
+        if incremental:
+            unparsed = self.metrics.counters.get('feed_bytes_unparsed', 0)
+            logger.info(
+                f"   {incremental} feeds parsed only up to entries earlier scans read "
+                f"({unparsed / 1024:.0f} KB left unparsed)"
+            )
+        
+        hits = {
+            name[len('filtered_'):]: count
+            for name, count in self.metrics.counters.items() if name.startswith('filtered_')
+        }
+        if not hits:
+            return
+        
+        logger.info(f"   {sum(hits.values())} entries dropped by filters before scoring")
+        for reason, count in sorted(hits.items(), key=lambda item: item[1], reverse=True):
+            if reason == 'include_certs':
+                label = "no cert from include_certs"
+            else:
+                label = f"exclude_keywords \"{reason[len('exclude:'):]}\""
+            logger.info(f"   {label}: {count}")
+    
+    async def run_daemon(self, stop_event=None):
+        """Poll each source on its own adaptive schedule until stopped"""
+        stop_event = stop_event or asyncio.Event()
+        scheduler = self.create_scheduler()
+        logger.info("🕒 Running in daemon mode - press Ctrl+C to stop")
+        
+        while not stop_event.is_set():
+            if self.reload_config():
+                # Rebuild the queue from the new sources, keeping saved backoff
+                scheduler.save_state()
+                scheduler = self.create_scheduler()
+            
+            max_sleep = self.settings.get('scheduler', {}).get('max_sleep_seconds', 60)
+            due = scheduler.pop_due()
+            if not due:
+                wait = scheduler.seconds_until_next()
+                wait = max_sleep if wait is None else min(wait, max_sleep)
+                try:
+                    await asyncio.wait_for(stop_event.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            logger.info(f"🕒 {len(due)} source(s) due for polling")
+            try:
+                await self.scan(scheduler.sources_config(due))
+            except Exception as e:
+                logger.error(f"❌ Scheduled scan failed: {e}", exc_info=True)
+            
+            # Sources that produced updates are polled sooner, quiet ones later
+            for source in due:
+                record = self.metrics.source(
+                    source.info['name'], source.provider, source.kind, source.info['url']
+                )
+                scheduler.reschedule(source, changed=record.updates > 0)
+            
+            try:
+                scheduler.save_state()
+            except Exception as e:
+                logger.error(f"❌ Error saving scheduler state: {e}")
+    
+    def create_scheduler(self):
+        return SourceScheduler.from_sources(
+            self.sources, self.settings,
+            state_path=self.settings.get('cache', {}).get('schedule', '.cache/schedule.json')
+        )
+    
+    def run_coordinator(self):
+        """Run one sharded scan cycle: queue the shards, wait, then notify once.
+        
+        Sources are split into shards by consistent hashing on their URL and
+        scanned by ``--worker`` processes. Their updates are deduplicated
+        together, and everything workers staged (seen items, watermarks,
+        snapshots, validators) is committed here after notifying, as in a
+        normal scan. Shards still unscanned at ``cycle_timeout_minutes``
+        are left out and come back next cycle. If the coordinator stops
+        after notifying but before closing the cycle, the next run merges
+        and notifies that cycle again.
+        """
+        sharding = self.settings.get('sharding', {})
+        queue = open_shard_queue(self.settings)
+        try:
+            shards = split_sources(self.sources, sharding.get('shards', 8))
+            cycle, resumed = queue.open_cycle(shards)
+            if resumed:
+                logger.info(f"🧩 Resuming unfinished scan cycle {cycle}")
+            else:
+                logger.info(f"🧩 Scan cycle {cycle}: {source_count(self.sources)} sources in {len(shards)} shards")
+            
+            deadline = time.monotonic() + sharding.get('cycle_timeout_minutes', 60) * 60
+            reported = None
+            while True:
+                progress = queue.progress(cycle)
+                remaining = progress.get('pending', 0) + progress.get('leased', 0)
+                if (progress.get('done', 0), remaining) != reported:
+                    reported = (progress.get('done', 0), remaining)
+                    logger.info(f"   🧩 {progress.get('done', 0)} shards done, {remaining} to go")
+                if not remaining:
+                    break
+                if time.monotonic() >= deadline:
+                    logger.warning(f"⚠️ Cycle {cycle} timed out with {remaining} shards unscanned")
+                    break
+                time.sleep(sharding.get('poll_seconds', 5))
+            
+            return self.merge_cycle(queue, cycle)
+        finally:
+            queue.close()
+    
+    def merge_cycle(self, queue, cycle):
+        """Deduplicate and notify the shard results of a cycle, then close it"""
+        logger.info("=" * 60)
+        logger.info(f"🚀 Merging scan cycle {cycle}")
+        logger.info("=" * 60)
+        self.http_cache.reset_stats()
+        self.start_metrics()
+        update_filter = self.create_update_filter()
+        
+        for shard, result in queue.results(cycle):
+            self.apply_shard_result(result, update_filter)
+        for shard, status, error in queue.unfinished(cycle):
+            logger.warning(f"   🧩 Shard {shard} {status}: {error or 'not scanned in time'}; retried next cycle")
+        
+        updates = self.process_updates(update_filter)
+        queue.close_cycle(cycle)
+        return updates
+    
+    def apply_shard_result(self, result, update_filter):
+        """Stage what a worker collected for one shard, as if scanned here"""
+        for update in result['updates']:
+            update_filter.add(Update.from_dict(update))
+        for key, digest in result['seen'].items():
+            self.seen_store.stage(key, digest)
+        for feed_url, watermark in result['watermarks'].items():
+            self.seen_store.stage_watermark(feed_url, Watermark(*watermark))
+        if self.page_snapshots:
+            for url, snapshot in result['snapshots'].items():
+                self.page_snapshots.stage(url, snapshot)
+        self.http_cache.apply_changes(result['validators'])
+        self.metrics.merge(result['metrics'])
+    
+    async def run_worker(self, name, stop_event=None, exit_when_idle=False):
+        """Claim and scan shards from the queue until stopped"""
+        stop_event = stop_event or asyncio.Event()
+        queue = open_shard_queue(self.settings)
+        poll_seconds = self.settings.get('sharding', {}).get('poll_seconds', 5)
+        logger.info(f"🧩 Worker {name} waiting for shards")
+        try:
+            while not stop_event.is_set():
+                claim = queue.claim(name)
+                if claim is None:
+                    if exit_when_idle:
+                        logger.info("🧩 No shards left to scan")
+                        break
+                    try:
+                        await asyncio.wait_for(stop_event.wait(), timeout=poll_seconds)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self.scan_shard(queue, claim, name)
+        finally:
+            queue.close()
+    
+    async def scan_shard(self, queue, claim, name):
+        """Scan one claimed shard, renewing its lease, and hand in the result"""
+        logger.info(
+            f"🧩 Scanning shard {claim.shard} of cycle {claim.cycle} "
+            f"({source_count(claim.sources)} sources, attempt {claim.attempt})"
+        )
+        # Pick up what the coordinator committed since the last shard
+        self.http_cache.load()
+        self.http_cache.take_changes()
+        if self.page_snapshots:
+            self.page_snapshots.load()
+            self.page_snapshots.take_staged()
+        self.seen_store.take_staged()
+        
+        async def renew_lease():
+            while True:
+                await asyncio.sleep(queue.lease_seconds / 3)
+                if not queue.renew(claim, name):
+                    logger.warning(f"⚠️ Lost the lease on shard {claim.shard}; its result will be dropped")
+                    return
+        
+        heartbeat = asyncio.ensure_future(renew_lease())
+        try:
+            update_filter = await self.collect(claim.sources)
+        except Exception as e:
+            logger.error(f"❌ Shard {claim.shard} failed: {e}", exc_info=True)
+            queue.release(claim, name, str(e))
+            return
+        finally:
+            heartbeat.cancel()
+        
+        self.hold_back_evicted(update_filter)
+        self.metrics.finish()
+        seen, watermarks = self.seen_store.take_staged()
+        result = {
+            'updates': [update.to_dict() for update in update_filter.results()],
+            'seen': seen,
+            'watermarks': watermarks,
+            'snapshots': self.page_snapshots.take_staged() if self.page_snapshots else {},
+            'validators': self.http_cache.take_changes(),
+            'metrics': self.metrics.to_dict(),
+        }
+        if queue.complete(claim, name, result):
+            logger.info(f"✅ Shard {claim.shard} done: {len(result['updates'])} updates")
+        else:
+            logger.warning(f"⚠️ Shard {claim.shard} was reassigned or its cycle closed; result dropped")
+    
+    def close(self):
+        """Wait briefly for pending notifications, then release resources"""
+        if self.notifier:
+            timeout = self.settings['notification'].get('delivery', {}).get('flush_timeout_seconds', 120)
+            self.notifier.flush(timeout)
+            self.notifier.close()
+        self.seen_store.close()
+        self.fetcher.close()
+        if self.archive:
+            self.archive.close()
+    
     def filter_updates(self, updates):
         """Filter and deduplicate updates"""
+        update_filter = self.create_update_filter()
+        update_filter.extend(updates)
+        return update_filter.results()
+    
+    def send_digest(self, name='weekly', days=7, print_only=False):
+        """Send a digest of updates archived since the last one, without fetching anything"""
+        if not self.archive:
+            logger.error("❌ No archive configured (cache.archive in settings.yaml)")
+            return []
+        
+        updates, archived_until = self.archive.digest_updates(name, default_days=days)
         if not updates:
+            logger.info(f"📭 Nothing archived since the last {name} digest")
             return []
         
-        # Remove duplicates based on URL
-        seen_urls = set()
-        unique_updates = []
+        if print_only:
+            print(render_text(Digest.from_updates(updates)))
+            return updates
         
-        for update in updates:
-            url = update.get('url', '')
-            title = update.get('title', '')
-            key = f"{url}:{title}"
-            
-            if key not in seen_urls:
-                seen_urls.add(key)
-                unique_updates.append(update)
-        
-        # Filter by relevance score
-        min_score = self.settings.get('filters', {}).get('min_relevance', 0)
-        if min_score > 0:
-            unique_updates = [
-                u for u in unique_updates 
-                if u.get('relevance_score', 100) >= min_score
-            ]
-        
-        # Sort by relevance and date
-        unique_updates.sort(
-            key=lambda x: (x.get('relevance_score', 0), x.get('published_date', '')), 
-            reverse=True
+        logger.info(f"📧 Sending {name} digest of {len(updates)} archived updates...")
+        self.notifier.send_notification(updates)
+        self.archive.mark_digest(name, archived_until)
+        return updates
+
+def log_startup_profile(ready_seconds):
+    """Log how long startup took and what each lazily imported module cost"""
+    logger.info(f"⏱️ main.py imports: {_import_seconds * 1000:.1f} ms")
+    logger.info(f"⏱️ Ready to scan after {ready_seconds * 1000:.1f} ms")
+    lazy = sorted(import_times().items(), key=lambda item: item[1], reverse=True)
+    for name, seconds in lazy:
+        logger.info(f"   lazy import {name}: {seconds * 1000:.1f} ms")
+    if lazy:
+        logger.info(f"   lazy imports total: {sum(s for _, s in lazy) * 1000:.1f} ms")
+
+def search_archive(settings, args):
+    """Print archived updates matching the --search filters"""
+    archive_path = settings.get('cache', {}).get('archive', '.cache/archive.sqlite3')
+    if not archive_path:
+        logger.error("❌ No archive configured (cache.archive in settings.yaml)")
+        return []
+    
+    archive = UpdateArchive(archive_path)
+    try:
+        days = args.days or 90
+        updates = archive.search(
+            text=args.search, provider=args.provider, cert=args.cert, source=args.source,
+            since=time.time() - days * 86400, limit=args.limit
         )
-        
-        return unique_updates
+    finally:
+        archive.close()
+    
+    for update in updates:
+        print(f"{update.published_date[:10]}  [{(update.provider or '').upper()}] {update.title}")
+        print(f"            {update.source} | {update.relevance_score}/100 | {update.url}")
+    logger.info(f"🔎 {len(updates)} archived updates from the last {days} days")
+    return updates
+
+def open_shard_queue(settings):
+    sharding = settings.get('sharding', {})
+    return ShardQueue(
+        sharding.get('queue', '.cache/shards.sqlite3'),
+        lease_seconds=sharding.get('lease_seconds', 300),
+        max_attempts=sharding.get('max_attempts', 3)
+    )
+
+def run_until_stopped(run):
+    """Run ``run(stop_event)`` on a new loop, stopping cleanly on SIGINT/SIGTERM"""
+    async def runner():
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop_event.set)
+            except NotImplementedError:
+                pass
+        await run(stop_event)
+    
+    asyncio.run(runner())
+
+def run_daemon(monitor):
+    """Run the scheduler loop, stopping cleanly on SIGINT/SIGTERM"""
+    run_until_stopped(monitor.run_daemon)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monitor certification providers for exam updates")
+    parser.add_argument(
+        '--daemon', action='store_true',
+        help="keep running and poll each source on its own adaptive schedule"
+    )
+    parser.add_argument(
+        '--profile-startup', action='store_true',
+        help="log import and startup times (lazy imports are reported when the run ends)"
+    )
+    archive_group = parser.add_argument_group("archive", "query past updates without fetching anything")
+    archive_group.add_argument(
+        '--search', nargs='?', const='', metavar='TEXT',
+        help="list archived updates, optionally matching words in the title/summary"
+    )
+    archive_group.add_argument('--cert', help="only updates mentioning this exam code, e.g. SAA-C04")
+    archive_group.add_argument('--provider', help="only updates from this provider, e.g. aws")
+    archive_group.add_argument('--source', help="only updates from this source name")
+    archive_group.add_argument(
+        '--days', type=float,
+        help="how far back to look (default: 90 for --search, 7 for a first --digest)"
+    )
+    archive_group.add_argument('--limit', type=int, default=50, help="most updates --search lists")
+    archive_group.add_argument(
+        '--digest', nargs='?', const='weekly', metavar='NAME',
+        help="send a digest of everything archived since the last digest of this name"
+    )
+    archive_group.add_argument('--print', action='store_true', help="print the --digest instead of sending it")
+    sharding_group = parser.add_argument_group("sharding", "split scans across processes or machines sharing a queue")
+    sharding_group.add_argument(
+        '--coordinator', action='store_true',
+        help="queue one scan cycle as shards, wait for workers, then notify once"
+    )
+    sharding_group.add_argument(
+        '--worker', nargs='?', const=f"{socket.gethostname()}-{os.getpid()}", metavar='NAME',
+        help="scan shards from the queue until stopped (NAME defaults to host-pid)"
+    )
+    sharding_group.add_argument(
+        '--exit-when-idle', action='store_true',
+        help="stop the --worker once no shard is waiting"
+    )
+    args = parser.parse_args()
+    
     try:
-        monitor = CertificationMonitor()
-        monitor.scan_all_sources()
+        if args.search is not None:
+            # Read-only: no monitor, notifier or network needed
+            search_archive(load_config().settings, args)
+        else:
+            monitor = CertificationMonitor(worker=args.worker is not None)
+            ready_seconds = time.perf_counter() - _import_started
+            try:
+                if args.worker:
+                    run_until_stopped(
+                        lambda stop_event: monitor.run_worker(args.worker, stop_event, args.exit_when_idle)
+                    )
+                elif args.coordinator:
+                    monitor.run_coordinator()
+                elif args.daemon:
+                    run_daemon(monitor)
+                elif args.digest:
+                    monitor.send_digest(args.digest, days=args.days or 7, print_only=args.print)
+                else:
+                    monitor.scan_all_sources()
+            finally:
+                monitor.close()
+                if args.profile_startup:
+                    log_startup_profile(ready_seconds)
+    except ConfigError as e:
+        logger.error(f"❌ {e}")
+        raise SystemExit(2)
     except Exception as e:
         logger.error(f"❌ Fatal error: {e}", exc_info=True)
         raise
@@ -1,129 +1,405 @@
-import feedparser
+import asyncio
 import logging
-from datetime import datetime, timedelta
-from dateutil import parser as date_parser
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 import re
+from utils.seen_store import Watermark, item_key, content_hash
+from utils.keyword_matcher import KeywordMatcher
+from utils.entry_filter import EntryFilter
+from utils.http_client import BudgetExhausted, Fetcher
+from utils.concurrency import HostLimiter
+from utils.metrics import ScanMetrics
+from utils.update import LazySummary, Update
+from utils.dates import from_struct, parse_date_text
+from utils.cert_codes import extract_certs
+from utils.feed_stream import UnreadableFeed, read_feed_head
+from utils.lazy_import import lazy_import
+import time
+
+# Only imported once a feed actually needs parsing
+feedparser = lazy_import('feedparser')
 
 logger = logging.getLogger(__name__)
 
+_converters = threading.local()
+
+def html_converter():
+    """This thread's reusable HTML2Text converter (instances are not thread-safe)"""
+    converter = getattr(_converters, 'converter', None)
+    if converter is None:
+        import html2text
+        converter = html2text.HTML2Text()
+        converter.ignore_links = False
+        converter.ignore_images = True
+        _converters.converter = converter
+    return converter
+
 class RSSMonitor:
-    def __init__(self, settings):
+    def __init__(self, settings, cache=None, seen_store=None, fetcher=None, config=None):
         self.settings = settings
+        self.config = config
+        self.cache = cache
+        self.seen_store = seen_store
         self.lookback_days = settings.get('lookback_days', 7)
+        self._fetcher = fetcher
+        
+        fetch_config = settings.get('fetch', {})
+        self.max_workers = max(1, fetch_config.get('max_workers', 1))
+        self.host_limiter = HostLimiter(fetch_config.get('per_host_limit', self.max_workers))
+        self._matchers = {}
+        self.entry_filter = config.entry_filter if config is not None else EntryFilter.from_settings(settings)
+        self.metrics = ScanMetrics()
+        # Set by the scan when parsing is handed to worker processes
+        self.parse_pool = None
+    
+    @property
+    def fetcher(self):
+        """Fetch layer, created on first use (parser processes never need one)"""
+        if self._fetcher is None:
+            self._fetcher = Fetcher(self.settings)
+        return self._fetcher
     
     def check_feeds(self, feeds_config):
         """Check all RSS feeds for updates"""
-        all_updates = []
+        return list(self.iter_feeds(feeds_config))
+    
+    def iter_feeds(self, feeds_config):
+        """Yield updates feed by feed, in config order, as each feed is ready"""
+        jobs = self._feed_jobs(feeds_config)
         
-        for provider, feeds in feeds_config.items():
+        if self.max_workers == 1 or len(jobs) <= 1:
+            results = (self._run_feed(feed_info, provider) for provider, feed_info in jobs)
+            yield from self._log_results(jobs, results)
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                # Results come back in job order, so the stream stays in
+                # config order no matter which feed finishes first
+                results = self.host_limiter.map(
+                    executor, lambda job: self._run_feed(job[1], job[0]), jobs,
+                    url=lambda job: job[1]['url']
+                )
+                yield from self._log_results(jobs, results)
+    
+    async def stream_feeds(self, feeds_config, limiter, fetch_executor=None, parse_executor=None):
+        """Async generator of updates, in config order, as each feed is ready"""
+        jobs = self._feed_jobs(feeds_config)
+        tasks = [
+            asyncio.ensure_future(
+                self._run_feed_async(feed_info, provider, limiter, fetch_executor, parse_executor)
+            )
+            for provider, feed_info in jobs
+        ]
+        try:
+            current_provider = None
+            for (provider, feed_info), task in zip(jobs, tasks):
+                updates, error = await task
+                current_provider = self._log_result(provider, feed_info, updates, error, current_provider)
+                for update in updates:
+                    yield update
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    def _feed_jobs(self, feeds_config):
+        """Flatten the feeds config into (provider, feed_info) pairs in config order"""
+        return [
+            (provider, feed_info)
+            for provider, feeds in feeds_config.items()
+            for feed_info in feeds
+        ]
+    
+    def _log_results(self, jobs, results):
+        """Log each feed's outcome in config order and pass its updates through"""
+        current_provider = None
+        for (provider, feed_info), (updates, error) in zip(jobs, results):
+            current_provider = self._log_result(provider, feed_info, updates, error, current_provider)
+            yield from updates
+    
+    def _log_result(self, provider, feed_info, updates, error, current_provider):
+        """Log one feed's outcome, returning the provider now being reported"""
+        if provider != current_provider:
             logger.info(f"Checking {provider.upper()} feeds...")
-            
-            for feed_info in feeds:
-                try:
-                    updates = self.check_single_feed(feed_info, provider)
-                    all_updates.extend(updates)
-                    logger.info(f"  ✓ {feed_info['name']}: {len(updates)} relevant posts")
-                except Exception as e:
-                    logger.error(f"  ✗ Error checking {feed_info['name']}: {str(e)}")
         
-        return all_updates
+        if isinstance(error, BudgetExhausted):
+            # Summed up once at the end of the scan rather than per feed
+            logger.debug(f"  ⏭️ Skipped {feed_info['name']}: {error}")
+        elif error is not None:
+            logger.error(f"  ✗ Error checking {feed_info['name']}: {str(error)}")
+        else:
+            logger.info(f"  ✓ {feed_info['name']}: {len(updates)} relevant posts")
+        return provider
+    
+    def _run_feed(self, feed_info, provider):
+        """Check one feed, capturing errors"""
+        try:
+            return self.check_single_feed(feed_info, provider), None
+        except Exception as e:
+            self.source_metrics(feed_info, provider).error = str(e)
+            return [], e
+    
+    async def _run_feed_async(self, feed_info, provider, limiter, fetch_executor, parse_executor):
+        """Fetch one feed under the loop's limits, then parse it in an executor"""
+        loop = asyncio.get_running_loop()
+        try:
+            async with limiter.slot(feed_info['url']):
+                response = await loop.run_in_executor(
+                    fetch_executor, self.fetch_feed, feed_info, provider
+                )
+            if response is None:
+                return [], None
+            if self.parse_pool is not None:
+                updates = await self.parse_pool.process_feed(self, feed_info, provider, response)
+            else:
+                updates = await loop.run_in_executor(
+                    parse_executor, self.process_feed, feed_info, provider, response
+                )
+            return updates, None
+        except Exception as e:
+            self.source_metrics(feed_info, provider).error = str(e)
+            return [], e
+    
+    def source_metrics(self, feed_info, provider):
+        """Metrics record for a feed in the current scan"""
+        return self.metrics.source(feed_info['name'], provider, 'rss', feed_info['url'])
     
     def check_single_feed(self, feed_info, provider):
         """Check a single RSS feed"""
-        feed = feedparser.parse(feed_info['url'])
-        updates = []
+        response = self.fetch_feed(feed_info, provider)
+        if response is None:
+            return []
+        return self.process_feed(feed_info, provider, response)
+    
+    def fetch_feed(self, feed_info, provider):
+        """Download a feed, returning None if it is unchanged since the last scan"""
+        url = feed_info['url']
+        metrics = self.source_metrics(feed_info, provider)
+        headers = self.cache.request_headers(url) if self.cache else {}
+        with metrics.phase('fetch'):
+            response = self.fetcher.get(url, headers=headers)
+        
+        if response.status_code == 304:
+            # Feed unchanged since the last scan - nothing to parse
+            metrics.cache_status = 'hit'
+            if self.cache:
+                self.cache.record(feed_info['name'], hit=True)
+            return None
         
-        cutoff_date = datetime.now() - timedelta(days=self.lookback_days)
+        response.raise_for_status()
+        metrics.cache_status = 'miss'
+        metrics.bytes += len(response.content)
+        if self.cache:
+            self.cache.record(feed_info['name'], hit=False)
+        return response
+    
+    def process_feed(self, feed_info, provider, response):
+        """Parse a downloaded feed and build updates for its relevant entries"""
+        return list(self.iter_feed_updates(feed_info, provider, response))
+    
+    def iter_feed_updates(self, feed_info, provider, response):
+        """Yield an update for each new, relevant entry of a downloaded feed"""
+        metrics = self.source_metrics(feed_info, provider)
+        cutoff_date = datetime.now(timezone.utc) - timedelta(days=self.lookback_days)
+        use_watermark = self.seen_store is not None and feed_info.get('newest_first', True)
+        watermark = self.seen_store.watermark(feed_info['url']) if use_watermark else None
         
-        for entry in feed.entries:
+        with metrics.phase('parse'):
+            head = None
+            if watermark and watermark.newest_first:
+                head = self.read_new_entries(feed_info, response.content, watermark, cutoff_date)
+            feed = feedparser.parse(head.content if head else response.content)
+        metrics.entries += len(feed.entries)
+        if head:
+            self.metrics.increment('feeds_read_incrementally')
+            self.metrics.increment('feed_bytes_unparsed', head.unread_bytes)
+        
+        matcher = self.get_matcher(feed_info['keywords'])
+        
+        # In a newest-first feed, everything after the first entry past the
+        # cutoff is older still; stop there unless the order turns out wrong.
+        # A feed read up to its watermark was newest-first last scan too.
+        newest_first = feed_info.get('newest_first', True) and (
+            head is not None or self.is_newest_first(feed.entries)
+        )
+        previous_date = None
+        
+        for position, entry in enumerate(feed.entries):
             # Parse publication date
             pub_date = self.parse_date(entry)
             
-            # Skip old entries
-            if pub_date and pub_date < cutoff_date:
-                continue
+            if pub_date:
+                if previous_date and pub_date > previous_date:
+                    newest_first = False
+                previous_date = pub_date
+                
+                # Skip old entries
+                if pub_date < cutoff_date:
+                    if newest_first:
+                        self.metrics.increment('entries_past_cutoff', len(feed.entries) - position)
+                        break
+                    continue
+            
+            # Skip entries an earlier scan already processed unchanged
+            staged = {}
+            if self.seen_store:
+                key = item_key(entry.get('link', ''), entry.get('id'))
+                digest = content_hash(
+                    entry.get('title', ''),
+                    entry.get('summary', entry.get('description', ''))
+                )
+                if self.seen_store.is_seen(key, digest):
+                    continue
+                self.seen_store.stage(key, digest)
+                # Lets the scan unstage the entry if the update is held back
+                staged = {'seen_key': key, 'feed_url': feed_info['url']}
+            
+            raw_text = self.entry_raw_text(entry)
+            text = raw_text.lower()
+            
+            # Drop excluded/off-topic entries before scoring and cleaning them
+            if self.entry_filter.active:
+                reason = self.entry_filter.check(text)
+                if reason:
+                    self.metrics.increment(f"filtered_{reason}")
+                    continue
             
             # Check if entry is relevant
-            relevance = self.calculate_relevance(entry, feed_info['keywords'])
+            start = time.perf_counter()
+            # Exam codes are written in upper case, so they're read from the raw text
+            certs = extract_certs(raw_text)
+            relevance, matched_keywords = matcher.match(text, certs=certs)
+            metrics.add_time('score', time.perf_counter() - start)
             
             if relevance > 0:
-                update = {
-                    'provider': provider,
-                    'source': feed_info['name'],
-                    'title': entry.get('title', 'No title'),
-                    'url': entry.get('link', ''),
-                    'summary': self.clean_html(entry.get('summary', entry.get('description', ''))),
-                    'published_date': pub_date.isoformat() if pub_date else datetime.now().isoformat(),
-                    'relevance_score': relevance,
-                    'type': 'rss',
-                    'keywords_matched': self.get_matched_keywords(
-                        entry, feed_info['keywords']
-                    )
-                }
-                updates.append(update)
+                metrics.updates += 1
+                
+                yield Update(
+                    provider=provider,
+                    source=feed_info['name'],
+                    title=entry.get('title', 'No title'),
+                    url=entry.get('link', ''),
+                    # Cleaned only if something reads it (most updates get filtered)
+                    summary=self.summary_loader(metrics, entry.get('summary', entry.get('description', ''))),
+                    published=pub_date,
+                    relevance_score=relevance,
+                    type='rss',
+                    keywords_matched=matched_keywords,
+                    cert_codes=certs.codes,
+                    transitions=certs.transitions,
+                    **staged
+                )
+        
+        # Next scan stops reading at this scan's newest entry
+        if use_watermark and feed.entries:
+            newest = feed.entries[0]
+            published = self.parse_date(newest)
+            self.seen_store.stage_watermark(feed_info['url'], Watermark(
+                item_key(newest.get('link', ''), newest.get('id')),
+                published.timestamp() if published else None,
+                newest_first
+            ))
+        
+        # Only remember validators once the feed has been fully processed
+        if self.cache:
+            self.cache.update(feed_info['url'], response)
+    
+    def read_new_entries(self, feed_info, content, watermark, cutoff_date):
+        """The start of a newest-first feed, up to its watermark or the cutoff.
+        
+        Returns the ``FeedHead`` to parse instead of the whole feed, or None
+        when the whole feed has to be parsed: every entry is new, expat
+        can't read the feed, or the feed no longer looks newest-first.
+        """
+        cutoff = cutoff_date.timestamp()
+        entries_read = 0
+        
+        def stop(entry):
+            nonlocal entries_read
+            entries_read += 1
+            if entry.key == watermark.key:
+                return True
+            date = parse_date_text(entry.published or entry.updated or '')
+            if date is None:
+                return False
+            date = date.timestamp()
+            if entries_read == 1 and watermark.published is not None and date < watermark.published:
+                # Newest entry older than last scan's newest: reordered or rewritten
+                raise UnreadableFeed("newest entry is older than the watermark")
+            return date < cutoff or (watermark.published is not None and date < watermark.published)
         
-        return updates
+        try:
+            return read_feed_head(content, stop)
+        except UnreadableFeed as e:
+            logger.debug(f"Parsing all of {feed_info['name']}: {e}")
+            return None
     
     def parse_date(self, entry):
-        """Parse date from feed entry"""
+        """Publication date of a feed entry as an aware UTC datetime, or None"""
         try:
-            if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                return datetime(*entry.published_parsed[:6])
-            elif hasattr(entry, 'published'):
-                return date_parser.parse(entry.published)
-            elif hasattr(entry, 'updated_parsed') and entry.updated_parsed:
-                return datetime(*entry.updated_parsed[:6])
-            elif hasattr(entry, 'updated'):
-                return date_parser.parse(entry.updated)
-        except Exception as e:
+            for field in ('published', 'updated'):
+                # feedparser's own parse of the date, already in UTC
+                parsed = entry.get(f"{field}_parsed")
+                if parsed:
+                    return from_struct(parsed)
+                raw = entry.get(field)
+                if raw:
+                    return parse_date_text(raw)
+        except (TypeError, ValueError, OverflowError) as e:
             logger.debug(f"Could not parse date: {e}")
         
         return None
     
+    def is_newest_first(self, entries):
+        """Whether a feed lists its entries newest first, judging by its ends"""
+        if len(entries) < 2:
+            return False
+        first, last = self.parse_date(entries[0]), self.parse_date(entries[-1])
+        return bool(first and last and first >= last)
+    
+    def get_matcher(self, keywords):
+        """Get the compiled keyword matcher for a feed's keyword list"""
+        if self.config is not None:
+            # Shared with the loaded config so a reload drops stale matchers
+            return self.config.matcher(keywords)
+        key = tuple(keywords)
+        matcher = self._matchers.get(key)
+        if matcher is None:
+            matcher = KeywordMatcher(keywords)
+            self._matchers[key] = matcher
+        return matcher
+    
+    def entry_raw_text(self, entry):
+        """Title, summary and description of an entry as one string"""
+        return f"{entry.get('title', '')} {entry.get('summary', '')} {entry.get('description', '')}"
+    
     def calculate_relevance(self, entry, keywords):
         """Calculate relevance score based on keywords"""
-        text = f"{entry.get('title', '')} {entry.get('summary', '')} {entry.get('description', '')}".lower()
-        
-        score = 0
-        for keyword in keywords:
-            # Exact match
-            if keyword.lower() in text:
-                score += 30
-            # Partial match
-            elif any(word in text for word in keyword.lower().split()):
-                score += 10
-        
-        # Boost for certain important terms
-        important_terms = ['retiring', 'new version', 'updated', 'launching', 'changes', 'announcement']
-        for term in important_terms:
-            if term in text:
-                score += 20
-        
-        return min(score, 100)  # Cap at 100
+        raw_text = self.entry_raw_text(entry)
+        score, _ = self.get_matcher(keywords).match(raw_text.lower(), certs=extract_certs(raw_text))
+        return score
     
     def get_matched_keywords(self, entry, keywords):
         """Get list of matched keywords"""
-        text = f"{entry.get('title', '')} {entry.get('summary', '')} {entry.get('description', '')}".lower()
-        matched = []
-        
-        for keyword in keywords:
-            if keyword.lower() in text:
-                matched.append(keyword)
-        
-        return matched[:5]  # Limit to 5 keywords
+        raw_text = self.entry_raw_text(entry)
+        _, matched = self.get_matcher(keywords).match(raw_text.lower(), certs=extract_certs(raw_text))
+        return matched
+    
+    def summary_loader(self, metrics, html_text):
+        """Lazy summary that cleans an entry's HTML, timing it under 'clean'"""
+        def clean(raw):
+            start = time.perf_counter()
+            summary = self.clean_html(raw)
+            metrics.add_time('clean', time.perf_counter() - start)
+            return summary
+        return LazySummary(html_text, clean)
     
     def clean_html(self, html_text):
         """Remove HTML tags and clean text"""
         try:
-            import html2text
-            h = html2text.HTML2Text()
-            h.ignore_links = False
-            h.ignore_images = True
-            text = h.handle(html_text)
+            text = html_converter().handle(html_text)
             # Limit length
             return text[:500] + '...' if len(text) > 500 else text
         except:
             # Fallback: simple HTML removal
-            import re
             text = re.sub('<[^<]+?>', '', html_text)
             return text[:500] + '...' if len(text) > 500 else text
@@ -1,112 +1,291 @@
-import requests
-from bs4 import BeautifulSoup
+import asyncio
 import logging
-from datetime import datetime
-import re
+from utils.seen_store import normalize_url, content_hash
+from utils.http_client import BudgetExhausted, Fetcher
+from utils.metrics import ScanMetrics
+from utils.entry_filter import EntryFilter
+from utils.html_index import TextBlockIndex, term_pattern
+from utils.page_snapshots import build_snapshot, diff_snapshots
+from utils.update import Update
+from utils.cert_codes import extract_certs
 
 logger = logging.getLogger(__name__)
 
 class WebPageMonitor:
-    def __init__(self, settings):
+    def __init__(self, settings, cache=None, seen_store=None, fetcher=None, snapshots=None, config=None):
         self.settings = settings
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        self.cache = cache
+        self.seen_store = seen_store
+        self.snapshots = snapshots
+        self.change_config = settings.get('page_changes', {})
+        self._fetcher = fetcher
+        self.entry_filter = config.entry_filter if config is not None else EntryFilter.from_settings(settings)
+        self.metrics = ScanMetrics()
+        # Set by the scan when parsing is handed to worker processes
+        self.parse_pool = None
+    
+    @property
+    def fetcher(self):
+        """Fetch layer, created on first use (parser processes never need one)"""
+        if self._fetcher is None:
+            self._fetcher = Fetcher(self.settings)
+        return self._fetcher
     
     def check_pages(self, pages_config):
         """Check all announcement pages"""
-        all_updates = []
-        
+        return list(self.iter_pages(pages_config))
+    
+    def iter_pages(self, pages_config):
+        """Yield updates page by page as each page is checked"""
         for provider, pages in pages_config.items():
             logger.info(f"Checking {provider.upper()} announcement pages...")
             
             for page_info in pages:
                 try:
                     updates = self.check_single_page(page_info, provider)
-                    all_updates.extend(updates)
-                    logger.info(f"  ✓ {page_info['name']}: {len(updates)} updates found")
                 except Exception as e:
+                    self.source_metrics(page_info, provider).error = str(e)
                     logger.error(f"  ✗ Error checking {page_info['name']}: {str(e)}")
-        
-        return all_updates
+                    continue
+                logger.info(f"  ✓ {page_info['name']}: {len(updates)} updates found")
+                yield from updates
+    
+    async def stream_pages(self, pages_config, limiter, fetch_executor=None, parse_executor=None):
+        """Async generator of updates, in config order, as each page is ready"""
+        jobs = [
+            (provider, page_info)
+            for provider, pages in pages_config.items()
+            for page_info in pages
+        ]
+        tasks = [
+            asyncio.ensure_future(
+                self._run_page_async(page_info, provider, limiter, fetch_executor, parse_executor)
+            )
+            for provider, page_info in jobs
+        ]
+        try:
+            current_provider = None
+            for (provider, page_info), task in zip(jobs, tasks):
+                updates, error = await task
+                if provider != current_provider:
+                    logger.info(f"Checking {provider.upper()} announcement pages...")
+                    current_provider = provider
+                
+                if error is not None:
+                    logger.error(f"  ✗ Error checking {page_info['name']}: {str(error)}")
+                    continue
+                
+                logger.info(f"  ✓ {page_info['name']}: {len(updates)} updates found")
+                for update in updates:
+                    yield update
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def _run_page_async(self, page_info, provider, limiter, fetch_executor, parse_executor):
+        """Fetch one page under the loop's limits, then parse it in an executor"""
+        loop = asyncio.get_running_loop()
+        try:
+            async with limiter.slot(page_info['url']):
+                response = await loop.run_in_executor(
+                    fetch_executor, self.fetch_page, page_info, provider
+                )
+            if response is None:
+                return [], None
+            if self.parse_pool is not None:
+                updates = await self.parse_pool.process_page(self, page_info, provider, response)
+            else:
+                updates = await loop.run_in_executor(
+                    parse_executor, self.process_page, page_info, provider, response
+                )
+            return updates, None
+        except Exception as e:
+            self.source_metrics(page_info, provider).error = str(e)
+            return [], e
+    
+    def source_metrics(self, page_info, provider):
+        """Metrics record for a page in the current scan"""
+        return self.metrics.source(page_info['name'], provider, 'webpage', page_info['url'])
     
     def check_single_page(self, page_info, provider):
         """Check a single announcement page"""
+        response = self.fetch_page(page_info, provider)
+        if response is None:
+            return []
+        return self.process_page(page_info, provider, response)
+    
+    def fetch_page(self, page_info, provider):
+        """Download a page, returning None if it is unchanged or unreachable"""
+        url = page_info['url']
+        metrics = self.source_metrics(page_info, provider)
+        headers = self.cache.request_headers(url) if self.cache else {}
+        
         try:
-            response = self.session.get(page_info['url'], timeout=30)
+            with metrics.phase('fetch'):
+                response = self.fetcher.get(url, headers=headers)
+            if response.status_code == 304:
+                # Page unchanged since the last scan - skip parsing entirely
+                metrics.cache_status = 'hit'
+                if self.cache:
+                    self.cache.record(page_info['name'], hit=True)
+                return None
             response.raise_for_status()
+        except BudgetExhausted as e:
+            # Summed up once at the end of the scan rather than per page
+            metrics.error = str(e)
+            return None
         except Exception as e:
-            logger.error(f"Failed to fetch {page_info['url']}: {e}")
-            return []
+            metrics.error = str(e)
+            logger.error(f"Failed to fetch {url}: {e}")
+            return None
         
-        soup = BeautifulSoup(response.text, 'html.parser')
+        metrics.cache_status = 'miss'
+        metrics.bytes += len(response.content)
+        if self.cache:
+            self.cache.record(page_info['name'], hit=False)
+        return response
+    
+    def process_page(self, page_info, provider, response):
+        """Parse a downloaded page and build updates for it"""
+        url = page_info['url']
+        metrics = self.source_metrics(page_info, provider)
+        with metrics.phase('parse'):
+            # One parse and one tree walk; every term is answered from the index
+            index = TextBlockIndex.from_html(response.text)
         updates = []
         
-        if provider == 'aws':
-            updates = self.parse_aws_page(soup, page_info)
-        elif provider == 'azure':
-            updates = self.parse_azure_page(soup, page_info)
+        if self.snapshots is not None:
+            with metrics.phase('score'):
+                updates = self.detect_changes(index, page_info)
+            metrics.entries += len(index.sections())
+        else:
+            metrics.entries += len(index.blocks)
+            with metrics.phase('score'):
+                if provider == 'aws':
+                    updates = self.parse_aws_page(index, page_info)
+                elif provider == 'azure':
+                    updates = self.parse_azure_page(index, page_info)
+        
+        if self.entry_filter.active:
+            updates = [u for u in updates if self._passes_filters(u)]
+        
+        if self.seen_store:
+            updates = [u for u in updates if not self._already_seen(u, url)]
         
         # Add common metadata
         for update in updates:
             update['provider'] = provider
             update['source'] = page_info['name']
             update['type'] = 'webpage'
+            certs = extract_certs(f"{update.title} {update.summary}")
+            update.cert_codes, update.transitions = certs.codes, certs.transitions
+        
+        metrics.updates += len(updates)
+        
+        if self.cache:
+            self.cache.update(url, response)
         
         return updates
     
-    def parse_aws_page(self, soup, page_info):
-        """Parse AWS certification changes page"""
+    def _passes_filters(self, update):
+        """Apply exclude_keywords/include_certs, counting what gets dropped"""
+        reason = self.entry_filter.check(f"{update['title']} {update['summary']}".lower())
+        if reason:
+            self.metrics.increment(f"filtered_{reason}")
+            return False
+        return True
+    
+    def _already_seen(self, update, url):
+        """Check a page update against the seen store, staging it if new"""
+        key = f"page:{normalize_url(url)}:{update['title']}"
+        digest = content_hash(update['title'], update['summary'])
+        if self.seen_store.is_seen(key, digest):
+            return True
+        self.seen_store.stage(key, digest)
+        update['seen_key'] = key
+        return False
+    
+    def detect_changes(self, index, page_info):
+        """Build updates for sections added or changed since the last snapshot"""
+        url = page_info['url']
+        snapshot = build_snapshot(index.sections())
+        previous = self.snapshots.get(url)
+        
+        if previous and previous.get('page_hash') == snapshot['page_hash']:
+            # Nothing on the page moved - no need to look for terms at all
+            return []
+        
+        self.snapshots.stage(url, snapshot)
+        if previous is None and not self.change_config.get('report_first_scan', False):
+            logger.info(f"  Recorded baseline snapshot for {page_info['name']}")
+            return []
+        
         updates = []
+        for change in diff_snapshots(previous, snapshot):
+            text = f"{change['context']}\n{change['heading']}\n{change['text']}"
+            matched = [
+                term for term in page_info['check_for']
+                if term_pattern(term).search(text)
+            ]
+            if not matched:
+                continue
+            
+            summary = change['added_text'] or change['text']
+            title = change['heading'] or summary.split('\n', 1)[0]
+            if change['context']:
+                title = f"{change['context']}: {title}"
+            updates.append(Update(
+                title=title[:200],
+                url=url,
+                summary=summary.replace('\n', ' ')[:500],
+                relevance_score=self.change_config.get('relevance_score', 75),
+                keywords_matched=matched[:5],
+                change=change['change'],
+                diff=change['diff'],
+            ))
         
-        # Look for any text containing the check_for terms
-        text_content = soup.get_text()
+        return updates
+    
+    def parse_aws_page(self, index, page_info):
+        """Parse AWS certification changes page"""
+        updates = []
         
         for term in page_info['check_for']:
-            if term.lower() in text_content.lower():
-                # Find sections mentioning this term
-                sections = soup.find_all(['h2', 'h3', 'h4', 'p', 'div'], 
-                                        string=re.compile(term, re.IGNORECASE))
-                
-                for section in sections[:5]:  # Limit results
-                    parent = section.find_parent(['div', 'section', 'article'])
-                    if parent:
-                        update = {
-                            'title': section.get_text().strip()[:200],
-                            'url': page_info['url'],
-                            'summary': parent.get_text().strip()[:500],
-                            'relevance_score': 75,
-                            'published_date': datetime.now().isoformat(),
-                            'keywords_matched': [term]
-                        }
-                        updates.append(update)
-                        break  # One update per term is enough
+            # Look for any text containing the term, then the blocks mentioning it
+            if not index.mentions(term):
+                continue
+            
+            for block in index.find(term, limit=5):  # Limit results
+                parent = block.container()
+                if parent:
+                    update = Update(
+                        title=block.tag.get_text().strip()[:200],
+                        url=page_info['url'],
+                        summary=parent.get_text().strip()[:500],
+                        relevance_score=75,
+                        keywords_matched=[term]
+                    )
+                    updates.append(update)
+                    break  # One update per term is enough
         
         return updates
     
-    def parse_azure_page(self, soup, page_info):
+    def parse_azure_page(self, index, page_info):
         """Parse Microsoft Learn announcements"""
         updates = []
         
-        # Look for text containing check_for terms
-        text_content = soup.get_text()
-        
         for term in page_info['check_for']:
-            if term.lower() in text_content.lower():
-                sections = soup.find_all(['h2', 'h3', 'h4', 'div'], 
-                                        string=re.compile(term, re.IGNORECASE))
-                
-                for section in sections[:5]:
-                    update = {
-                        'title': section.get_text().strip()[:200] if section else f"Azure: {term}",
-                        'url': page_info['url'],
-                        'summary': f"Found mention of '{term}' on Microsoft certification page",
-                        'relevance_score': 70,
-                        'published_date': datetime.now().isoformat(),
-                        'keywords_matched': [term]
-                    }
-                    updates.append(update)
-                    break
+            if not index.mentions(term):
+                continue
+            
+            blocks = index.find(term, tags=('h2', 'h3', 'h4', 'div'), limit=1)
+            if blocks:
+                updates.append(Update(
+                    title=blocks[0].tag.get_text().strip()[:200],
+                    url=page_info['url'],
+                    summary=f"Found mention of '{term}' on Microsoft certification page",
+                    relevance_score=70,
+                    keywords_matched=[term]
+                ))
         
         return updates
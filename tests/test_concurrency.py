@@ -0,0 +1,59 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.concurrency import HostLimiter
+
+def test_busy_host_does_not_starve_other_hosts():
+    released = threading.Event()
+    lock = threading.Lock()
+    running = {}
+    peak = {}
+
+    def fetch(url):
+        host = url.split('/')[2]
+        with lock:
+            running[host] = running.get(host, 0) + 1
+            peak[host] = max(peak.get(host, 0), running[host])
+        try:
+            if host == 'other.example':
+                released.set()
+            # Feeds on the busy host only finish once the other host got a worker
+            assert released.wait(timeout=5)
+            return url
+        finally:
+            with lock:
+                running[host] -= 1
+
+    urls = [f"https://busy.example/feed/{n}" for n in range(6)] + ['https://other.example/feed']
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = list(HostLimiter(1).map(executor, fetch, urls, url=lambda url: url))
+
+    assert results == urls
+    assert peak == {'busy.example': 1, 'other.example': 1}
+
+def test_per_host_limit_and_errors_reach_the_caller():
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def fetch(n):
+        with lock:
+            running.append(n)
+            peak.append(len(running))
+        try:
+            if n == 3:
+                raise ValueError("feed 3 failed")
+            return n * 10
+        finally:
+            with lock:
+                running.remove(n)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = HostLimiter(2).map(executor, fetch, list(range(10)), url=lambda n: 'https://one.example/')
+        assert [next(results) for _ in range(3)] == [0, 10, 20]
+        with pytest.raises(ValueError):
+            next(results)
+
+    assert max(peak) <= 2
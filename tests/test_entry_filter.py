@@ -0,0 +1,47 @@
+import pytest
+
+from utils.entry_filter import EntryFilter
+
+def test_filter_without_rules_passes_everything():
+    entry_filter = EntryFilter.from_settings({'filters': {'exclude_keywords': [], 'include_certs': None}})
+
+    assert not entry_filter.active
+    assert entry_filter.check('anything at all') is None
+    assert not EntryFilter.from_settings({}).active
+
+@pytest.mark.parametrize('text, reason', [
+    ('new exam announced', 'exclude:exam'),
+    ('exam.', 'exclude:exam'),
+    ('(exam)', 'exclude:exam'),
+    ('an example of a webinar', 'exclude:webinar'),
+    ('examples and re-examination', None),
+    ('webinars next week', None),
+    ('prewebinar notes', None),
+])
+def test_excluded_phrases_match_whole_words(text, reason):
+    assert EntryFilter(exclude_keywords=['Exam', 'webinar']).check(text) == reason
+
+def test_config_phrases_are_case_folded():
+    entry_filter = EntryFilter(exclude_keywords=['Discount Code'], include_certs=['SAA-C04'])
+
+    assert entry_filter.exclude_keywords == ('discount code',)
+    assert entry_filter.check('saa-c04 discount code inside') == 'exclude:discount code'
+    assert entry_filter.check('saa-c04 launches') is None
+
+@pytest.mark.parametrize('text, reason', [
+    ('cka curriculum update', None),
+    ('new az-104 labs', None),
+    ('az-', None),
+    ('ckad exam tips', 'include_certs'),
+    ('backa of the queue', 'include_certs'),
+    ('kubernetes news', 'include_certs'),
+])
+def test_include_certs_need_a_whole_word_mention(text, reason):
+    # "AZ-" ends in punctuation, so any code after it still counts
+    assert EntryFilter(include_certs=['CKA', 'AZ-']).check(text) == reason
+
+def test_exclusion_wins_over_inclusion():
+    entry_filter = EntryFilter(exclude_keywords=['retired'], include_certs=['cka'])
+
+    assert entry_filter.check('cka retired') == 'exclude:retired'
+    assert entry_filter.check('retired cka') == 'exclude:retired'
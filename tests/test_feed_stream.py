@@ -0,0 +1,155 @@
+from datetime import datetime, timezone
+
+import feedparser
+import pytest
+
+from monitors.rss_monitor import RSSMonitor
+from utils.feed_stream import UnreadableFeed, read_feed_head
+from utils.seen_store import Watermark, item_key
+
+def rss(items, declaration='<?xml version="1.0" encoding="UTF-8"?>', channel_title='Cert News'):
+    body = ''.join(
+        f"<item><title>{title}</title><link>https://example.com/{slug}</link>"
+        f"<guid>{slug}</guid><pubDate>Mon, {day:02d} Jun 2025 09:00:00 GMT</pubDate></item>"
+        for title, slug, day in items
+    )
+    return f'{declaration}<rss version="2.0"><channel><title>{channel_title}</title>{body}</channel></rss>'
+
+ITEMS = [('Third post', 'three', 3), ('Second post', 'two', 2), ('First post', 'one', 1)]
+
+def stop_at(key):
+    seen = []
+    def stop(entry):
+        seen.append(entry)
+        return entry.key == key
+    stop.seen = seen
+    return stop
+
+def titles(content):
+    return [entry.title for entry in feedparser.parse(content).entries]
+
+def test_rss_head_stops_before_watermark_entry():
+    content = rss(ITEMS).encode()
+    head = read_feed_head(content, stop_at(item_key('', 'one')))
+
+    assert head.entries == 2
+    assert titles(head.content) == ['Third post', 'Second post']
+    assert head.unread_bytes == len(content) - content.index(b'<item><title>First')
+    assert feedparser.parse(head.content).feed.title == 'Cert News'
+
+def test_entry_info_has_key_and_raw_dates():
+    stop = stop_at(None)
+    read_feed_head(rss(ITEMS).encode(), stop)
+
+    assert [info.key for info in stop.seen] == ['guid:three', 'guid:two', 'guid:one']
+    assert stop.seen[0].published == 'Mon, 03 Jun 2025 09:00:00 GMT'
+
+def test_watermark_entry_first_gives_empty_head():
+    head = read_feed_head(rss(ITEMS).encode(), stop_at(item_key('', 'three')))
+
+    assert head.entries == 0
+    parsed = feedparser.parse(head.content)
+    assert parsed.entries == []
+    assert not parsed.bozo
+    assert parsed.feed.title == 'Cert News'
+
+def test_missing_watermark_needs_whole_feed():
+    assert read_feed_head(rss(ITEMS).encode(), stop_at(item_key('', 'gone'))) is None
+
+def test_encoding_declaration_is_kept():
+    content = rss(
+        [('Nouvel examen café', 'new', 2), ('Ancien', 'old', 1)],
+        declaration='<?xml version="1.0" encoding="ISO-8859-1"?>',
+        channel_title='Certifications été',
+    ).encode('iso-8859-1')
+    head = read_feed_head(content, stop_at(item_key('', 'old')))
+
+    parsed = feedparser.parse(head.content)
+    assert [entry.title for entry in parsed.entries] == ['Nouvel examen café']
+    assert parsed.feed.title == 'Certifications été'
+
+def test_atom_default_namespace():
+    content = (
+        '<?xml version="1.0" encoding="utf-8"?>'
+        '<feed xmlns="http://www.w3.org/2005/Atom"><title>Learn Blog</title>'
+        '<entry><title>New AZ-104</title><id>tag:learn,2025:2</id>'
+        '<link rel="alternate" href="https://example.com/az-104"/><published>2025-06-02T09:00:00Z</published></entry>'
+        '<entry><title>Old post</title><id>tag:learn,2025:1</id>'
+        '<link href="https://example.com/old"/><updated>2025-06-01T09:00:00Z</updated></entry>'
+        '</feed>'
+    ).encode()
+    stop = stop_at(item_key('', 'tag:learn,2025:1'))
+    head = read_feed_head(content, stop)
+
+    assert titles(head.content) == ['New AZ-104']
+    assert stop.seen[0].published == '2025-06-02T09:00:00Z'
+    assert stop.seen[1].updated == '2025-06-01T09:00:00Z'
+
+def test_prefixed_root_is_closed_with_its_qname():
+    content = (
+        '<?xml version="1.0"?>'
+        '<atom:feed xmlns:atom="http://www.w3.org/2005/Atom"><atom:title>Prefixed</atom:title>'
+        '<atom:entry><atom:title>Kept</atom:title><atom:id>2</atom:id></atom:entry>'
+        '<atom:entry><atom:title>Seen</atom:title><atom:id>1</atom:id></atom:entry>'
+        '</atom:feed>'
+    ).encode()
+    head = read_feed_head(content, stop_at('guid:1'))
+
+    assert head.content.endswith(b'</atom:feed>')
+    assert titles(head.content) == ['Kept']
+
+def test_rdf_items_outside_channel():
+    content = (
+        '<?xml version="1.0"?>'
+        '<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" xmlns="http://purl.org/rss/1.0/"'
+        ' xmlns:dc="http://purl.org/dc/elements/1.1/">'
+        '<channel rdf:about="https://example.com/"><title>RDF feed</title></channel>'
+        '<item rdf:about="https://example.com/b"><title>B</title><link>https://example.com/b</link>'
+        '<dc:date>2025-06-02T09:00:00Z</dc:date></item>'
+        '<item rdf:about="https://example.com/a"><title>A</title><link>https://example.com/a</link></item>'
+        '</rdf:RDF>'
+    ).encode()
+    stop = stop_at(item_key('https://example.com/a'))
+    head = read_feed_head(content, stop)
+
+    assert head.content.endswith(b'</rdf:RDF>')
+    assert titles(head.content) == ['B']
+    assert stop.seen[0].updated == '2025-06-02T09:00:00Z'
+
+@pytest.mark.parametrize('content', [
+    rss([('Caf&eacute; exam', 'one', 1)]).encode(),
+    b'<html><body><p>Not a feed<br></body></html>',
+    '<?xml version="1.0" encoding="UTF-16"?><rss/>'.encode('utf-16'),
+])
+def test_unreadable_feeds_raise(content):
+    with pytest.raises(UnreadableFeed):
+        read_feed_head(content, stop_at(None))
+
+def new_entries(content, watermark, cutoff=datetime(2025, 1, 1, tzinfo=timezone.utc)):
+    monitor = RSSMonitor({})
+    return monitor.read_new_entries({'name': 'Test feed'}, content, watermark, cutoff)
+
+def published(day):
+    return datetime(2025, 6, day, 9, tzinfo=timezone.utc).timestamp()
+
+def test_read_new_entries_stops_at_watermark():
+    head = new_entries(rss(ITEMS).encode(), Watermark('guid:two', published(2), True))
+
+    assert titles(head.content) == ['Third post']
+
+def test_read_new_entries_stops_at_cutoff():
+    cutoff = datetime(2025, 6, 2, 12, tzinfo=timezone.utc)
+    head = new_entries(rss(ITEMS).encode(), Watermark('guid:gone', None, True), cutoff)
+
+    assert titles(head.content) == ['Third post']
+
+@pytest.mark.parametrize('content, watermark', [
+    # Malformed: feedparser's lenient parse has to read it
+    (rss([('Caf&eacute;', 'three', 3), ('Old', 'two', 2)]).encode(), Watermark('guid:two', published(2), True)),
+    # Newest entry older than the watermark: the feed was reordered
+    (rss(ITEMS).encode(), Watermark('guid:gone', published(5), True)),
+    # Every entry is new
+    (rss(ITEMS).encode(), Watermark('guid:gone', published(1) - 86400, True)),
+])
+def test_read_new_entries_falls_back_to_full_parse(content, watermark):
+    assert new_entries(content, watermark) is None
@@ -0,0 +1,52 @@
+import pytest
+
+from utils import http_client
+from utils.http_client import CircuitBreaker, Fetcher
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(http_client, 'time', clock)
+    return clock
+
+def fail(breaker, host, times):
+    for _ in range(times):
+        breaker.record(host, False)
+
+def test_breaker_opens_and_half_opens(clock):
+    breaker = CircuitBreaker(3, 60)
+    fail(breaker, 'a.example', 3)
+
+    assert not breaker.allow('a.example')
+    assert breaker.allow('b.example')
+    assert breaker.open_hosts() == ['a.example']
+
+    clock.now += 61
+    assert breaker.allow('a.example')
+    assert not breaker.allow('a.example')
+
+    breaker.record('a.example', True)
+    assert breaker.allow('a.example')
+    assert breaker.open_hosts() == []
+
+@pytest.mark.parametrize('before', [5, 0])
+def test_lowering_threshold_on_reload_opens_host(clock, before):
+    fetcher = Fetcher({'fetch': {'circuit_failures': before, 'circuit_reset_seconds': 60}}, session=object())
+    fail(fetcher.breaker, 'a.example', 4)
+    assert fetcher.breaker.allow('a.example')
+
+    fetcher.configure({'fetch': {'circuit_failures': 3, 'circuit_reset_seconds': 60}})
+
+    assert not fetcher.breaker.allow('a.example')
+    clock.now += 61
+    assert fetcher.breaker.allow('a.example')
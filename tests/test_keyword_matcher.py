@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from utils.keyword_matcher import IMPORTANT_TERMS, KeywordMatcher
+
+def per_keyword_scan(text, keywords, max_keywords=5):
+    """The scoring RSSMonitor did before KeywordMatcher: one substring scan per phrase"""
+    score = 0
+    for keyword in keywords:
+        if keyword.lower() in text:
+            score += 30
+        elif any(word in text for word in keyword.lower().split()):
+            score += 10
+    for term in IMPORTANT_TERMS:
+        if term in text:
+            score += 20
+    matched = [keyword for keyword in keywords if keyword.lower() in text][:max_keywords]
+    return min(score, 100), matched
+
+KEYWORDS = [
+    'AWS Certified', 'Solutions Architect', 'architect', 'SAA-C03', 'SAA', 'exam guide',
+    'guide', 'new exam', 'exam', 'cloud practitioner', 'Practitioner', 'update',
+]
+
+@pytest.mark.parametrize('text', [
+    # Nested: keywords inside longer keywords and important terms
+    'the new version of the exam guide is out',
+    'saa-c03 replaces saa',
+    'solutions architect professional',
+    # Overlapping: one phrase starts inside another and runs past its end
+    'new exam guide',
+    'the updated cloud practitioner exam',
+    'aws certified solutions architect',
+    'announcementsolutions architectexam',
+    # Across word boundaries, since the old scan was plain substring matching
+    'examples of guidelines for architects',
+    'retiringupdatedlaunchingchanges',
+    'cloudpractitioner updates',
+    '',
+])
+def test_matches_per_keyword_scan(text):
+    assert KeywordMatcher(KEYWORDS).match(text) == per_keyword_scan(text, KEYWORDS)
+
+def test_matches_per_keyword_scan_on_random_text():
+    # Text stitched from pieces of the phrases, so matches overlap and nest a lot
+    rng = random.Random(4)
+    pieces = ['new', ' ', 'exam', 'guide', 'ex', 'am ', 'saa', '-c03', 'architect', 'solutions ',
+              'updat', 'ed', 'ver', 'sion', 'new ver', 'chang', 'es', 'cloud pract', 'itioner', 'x']
+    keyword_lists = [KEYWORDS, ['exam', 'exam guide', 'guide'], ['new', 'new exam', 'exam'], ['es', 'sion']]
+    for keywords in keyword_lists:
+        matcher = KeywordMatcher(keywords)
+        for _ in range(500):
+            text = ''.join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+            assert matcher.match(text) == per_keyword_scan(text, keywords), text
+
+def test_find_reports_straddling_phrases():
+    matcher = KeywordMatcher(['new exam', 'exam guide'])
+
+    assert matcher.find('new exam guide') >= {'new exam', 'exam guide', 'new', 'exam', 'guide'}
+
+def test_matched_keywords_keep_config_order_and_limit():
+    keywords = ['f', 'e', 'd', 'c', 'b', 'a']
+
+    assert KeywordMatcher(keywords).match('abcdef', max_keywords=3) == (100, ['f', 'e', 'd'])
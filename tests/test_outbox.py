@@ -0,0 +1,107 @@
+import sqlite3
+import time
+
+import pytest
+
+from utils.outbox import DeliveryError, Outbox, OutboxDispatcher, PermanentDeliveryError
+
+class Sender:
+    """Channel whose first ``failures`` sends raise ``error``"""
+
+    def __init__(self, failures=0, error=None):
+        self.failures = failures
+        self.error = error or DeliveryError("server unavailable")
+        self.calls = 0
+        self.sent = []
+
+    def send(self, updates):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        self.sent.append(updates)
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def outbox(tmp_path):
+    return Outbox(str(tmp_path / 'outbox.sqlite3'))
+
+def rows(outbox):
+    with sqlite3.connect(outbox.path) as conn:
+        return conn.execute(
+            "SELECT status, attempts, next_attempt, last_error FROM outbox ORDER BY id"
+        ).fetchall()
+
+def dispatch(outbox, sender, timeout, **config):
+    dispatcher = OutboxDispatcher(outbox, {'email': sender}, config)
+    try:
+        return dispatcher.flush(timeout)
+    finally:
+        dispatcher.stop()
+
+def test_retries_until_delivered(outbox):
+    outbox.enqueue('email', [{'title': 'SAA-C04 launches'}])
+    sender = Sender(failures=2)
+
+    assert dispatch(outbox, sender, timeout=10, retry_base_seconds=0.05, max_attempts=5)
+
+    assert sender.calls == 3
+    assert sender.sent == [[{'title': 'SAA-C04 launches'}]]
+    [(status, attempts, _, error)] = rows(outbox)
+    assert (status, attempts, error) == ('sent', 2, None)
+
+def test_backoff_schedules_next_attempt(outbox):
+    outbox.enqueue('email', [{'title': 'x'}])
+    started = time.time()
+
+    # The retry falls after the flush timeout, so flush reports it pending
+    assert not dispatch(outbox, Sender(failures=1), timeout=1, retry_base_seconds=60)
+
+    [(status, attempts, next_attempt, error)] = rows(outbox)
+    assert (status, attempts, error) == ('pending', 1, 'server unavailable')
+    # First retry waits retry_base, jittered down to half of it
+    assert started + 30 <= next_attempt <= time.time() + 60
+    assert outbox.due('email') == []
+    assert outbox.next_attempt_at(['email']) == next_attempt
+
+def test_retry_after_overrides_backoff(outbox):
+    outbox.enqueue('email', [{'title': 'x'}])
+    sender = Sender(failures=1, error=DeliveryError("rate limited", retry_after=120))
+
+    assert not dispatch(outbox, sender, timeout=1, retry_base_seconds=1)
+
+    [(_, _, next_attempt, _)] = rows(outbox)
+    assert next_attempt >= time.time() + 110
+
+def test_gives_up_after_max_attempts(outbox):
+    outbox.enqueue('email', [{'title': 'x'}])
+    sender = Sender(failures=100)
+
+    # Nothing is left pending once the message is given up on
+    assert dispatch(outbox, sender, timeout=10, retry_base_seconds=0.05, max_attempts=3)
+
+    assert sender.calls == 3
+    assert rows(outbox)[0][:2] == ('failed', 3)
+    assert rows(outbox)[0][3] == 'server unavailable'
+    assert outbox.next_attempt_at() is None
+
+def test_permanent_error_is_not_retried(outbox):
+    outbox.enqueue('email', [{'title': 'x'}])
+    sender = Sender(failures=1, error=PermanentDeliveryError("no password"))
+
+    assert dispatch(outbox, sender, timeout=5, retry_base_seconds=0.05)
+
+    assert sender.calls == 1
+    assert rows(outbox)[0][:2] == ('failed', 1)
+
+def test_due_messages_are_sent_as_one_batch(outbox):
+    outbox.enqueue('email', [{'url': 'a', 'title': 'A'}])
+    outbox.enqueue('email', [{'url': 'a', 'title': 'A'}, {'url': 'b', 'title': 'B'}])
+    sender = Sender()
+
+    assert dispatch(outbox, sender, timeout=5)
+
+    assert sender.calls == 1
+    assert sorted(update['url'] for update in sender.sent[0]) == ['a', 'b']
+    assert [row[0] for row in rows(outbox)] == ['sent', 'sent']
@@ -0,0 +1,45 @@
+from utils.html_index import TextBlockIndex
+from utils.page_snapshots import build_snapshot, diff_snapshots
+
+PAGE = """
+<html><body>
+  <h1>Upcoming changes</h1>
+  <p>What is changing this year.</p>
+  <h2>Retiring</h2>
+  <div><h3>Exam SAA-C03</h3><p>Retiring March 30, 2026</p></div>
+  <div><h3>Exam DAS-C01</h3><p>Retiring April 8, 2024</p></div>
+  <h2>Launching</h2>
+  <div><h3>Exam SAA-C04</h3><p>{launch}</p></div>
+  <h2>Contact</h2>
+  <p>Email the certification team.</p>
+</body></html>
+"""
+
+def sections(html):
+    return TextBlockIndex.from_html(html).sections()
+
+def test_heading_without_text_becomes_context_of_sub_sections():
+    found = [(s.context, s.heading, s.text) for s in sections(PAGE.format(launch='Beta opens soon'))]
+
+    assert found == [
+        ('', 'Upcoming changes', 'What is changing this year.'),
+        ('Retiring', 'Exam SAA-C03', 'Retiring March 30, 2026'),
+        ('Retiring', 'Exam DAS-C01', 'Retiring April 8, 2024'),
+        ('Launching', 'Exam SAA-C04', 'Beta opens soon'),
+        ('', 'Contact', 'Email the certification team.'),
+    ]
+
+def test_changed_sub_section_is_the_only_change():
+    before = build_snapshot(sections(PAGE.format(launch='Beta opens soon')))
+    after = build_snapshot(sections(PAGE.format(launch='Now generally available')))
+
+    changes = diff_snapshots(before, after)
+    assert [(c['context'], c['heading'], c['change']) for c in changes] == [('Launching', 'Exam SAA-C04', 'changed')]
+    assert changes[0]['added_text'] == 'Now generally available'
+    assert '-Beta opens soon' in changes[0]['diff']
+
+def test_first_snapshot_has_no_empty_sections():
+    changes = diff_snapshots(None, build_snapshot(sections(PAGE.format(launch='Beta opens soon'))))
+
+    assert all(change['text'] for change in changes)
+    assert 'Retiring' not in [change['heading'] for change in changes]
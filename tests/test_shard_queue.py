@@ -0,0 +1,108 @@
+import pytest
+
+from utils import shard_queue
+from utils.shard_queue import ShardQueue, ShardRing, source_count, split_sources
+
+class Clock:
+    """Stands in for the time module so leases expire without sleeping"""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(shard_queue, 'time', clock)
+    return clock
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    queue = ShardQueue(str(tmp_path / 'shards.sqlite3'), lease_seconds=60, max_attempts=2)
+    yield queue
+    queue.close()
+
+def shards(count):
+    return {shard: {'rss_feeds': {'aws': [{'url': f"https://example.com/{shard}"}]}} for shard in range(count)}
+
+def test_claims_each_shard_once(queue):
+    cycle, resumed = queue.open_cycle(shards(2))
+
+    first, second = queue.claim('a'), queue.claim('b')
+    assert not resumed
+    assert {first.shard, second.shard} == {0, 1}
+    assert first.cycle == cycle and first.attempt == 1
+    assert queue.claim('c') is None
+
+def test_expired_lease_is_reclaimed(queue, clock):
+    queue.open_cycle(shards(1))
+    lost = queue.claim('a')
+
+    clock.now += 30
+    assert queue.claim('b') is None
+    assert queue.renew(lost, 'a')
+
+    clock.now += 61
+    taken = queue.claim('b')
+    assert taken.shard == lost.shard and taken.attempt == 2
+
+    # The first worker's lease is gone: it can neither renew nor hand in
+    assert not queue.renew(lost, 'a')
+    assert not queue.complete(lost, 'a', {'updates': []})
+    assert queue.complete(taken, 'b', {'updates': ['x']})
+    assert queue.results(taken.cycle) == [(0, {'updates': ['x']})]
+
+def test_shard_fails_after_max_attempts_of_expired_leases(queue, clock):
+    cycle, _ = queue.open_cycle(shards(1))
+    queue.claim('a')
+    clock.now += 61
+    queue.claim('b')
+    clock.now += 61
+
+    assert queue.claim('c') is None
+    assert queue.progress(cycle) == {'failed': 1}
+    assert queue.unfinished(cycle) == [(0, 'failed', 'lease expired 2 times')]
+
+def test_release_retries_then_gives_up(queue):
+    cycle, _ = queue.open_cycle(shards(1))
+
+    queue.release(queue.claim('a'), 'a', 'timeout')
+    assert queue.progress(cycle) == {'pending': 1}
+
+    queue.release(queue.claim('b'), 'b', 'timeout again')
+    assert queue.progress(cycle) == {'failed': 1}
+    assert queue.unfinished(cycle) == [(0, 'failed', 'timeout again')]
+    assert queue.claim('c') is None
+
+def test_unclosed_cycle_is_resumed_and_closed_cycle_ignored(queue):
+    cycle, _ = queue.open_cycle(shards(1))
+    claim = queue.claim('a')
+
+    assert queue.open_cycle(shards(3)) == (cycle, True)
+
+    queue.close_cycle(cycle)
+    assert not queue.complete(claim, 'a', {'updates': []})
+    next_cycle, resumed = queue.open_cycle(shards(3))
+    assert next_cycle != cycle and not resumed
+    assert queue.progress(next_cycle) == {'pending': 3}
+
+def test_ring_is_stable_and_moves_few_sources():
+    urls = [f"https://example.com/feed/{n}" for n in range(1000)]
+    four, five = ShardRing(4), ShardRing(5)
+
+    assert [four.shard_for(url) for url in urls] == [ShardRing(4).shard_for(url) for url in urls]
+    assert four.shard_for('https://Example.com/feed/1/') == four.shard_for('https://example.com/feed/1')
+    moved = sum(four.shard_for(url) != five.shard_for(url) for url in urls)
+    assert moved < 350
+
+def test_split_sources_keeps_every_source():
+    sources = {
+        'rss_feeds': {'aws': [{'url': f"https://example.com/rss/{n}"} for n in range(20)]},
+        'announcement_pages': {'azure': [{'url': f"https://example.com/page/{n}"} for n in range(10)]},
+    }
+    split = split_sources(sources, 4)
+
+    assert sum(source_count(shard) for shard in split.values()) == 30
+    assert list(split) == sorted(split)
@@ -0,0 +1,72 @@
+from utils.near_duplicates import NearDuplicateIndex, jaccard, tokens
+from utils.update import Update
+from utils.update_filter import UpdateFilter
+
+ANNOUNCEMENT = (
+    "AWS Certification announces that the Solutions Architect Associate exam {code} "
+    "changes on March 30 2026 for every candidate, so plan your preparation and "
+    "book your exam slot early through the certification portal"
+)
+
+def update(code, source, url, codes=None):
+    return Update(
+        title=f"Solutions Architect Associate exam {code} update",
+        url=url,
+        summary=ANNOUNCEMENT.format(code=code),
+        relevance_score=90,
+        source=source,
+        cert_codes=(code,) if codes is None else codes,
+    )
+
+def test_index_finds_near_duplicates_only():
+    index = NearDuplicateIndex(0.7)
+    first = tokens(ANNOUNCEMENT.format(code='SAA-C03'))
+    reworded = tokens(ANNOUNCEMENT.format(code='SAA-C03') + " today")
+    unrelated = tokens("Kubernetes CKA curriculum adds Gateway API and removes PodSecurityPolicy topics")
+
+    assert index.find_or_add(first, 'first') is None
+    assert jaccard(first, reworded) >= 0.7
+    assert index.find_or_add(reworded, 'reworded') == 'first'
+    assert index.find_or_add(unrelated, 'unrelated') is None
+    assert index.find(unrelated) == 'unrelated'
+
+def test_near_duplicates_from_other_sources_are_merged():
+    update_filter = UpdateFilter(near_duplicate_similarity=0.7)
+
+    assert update_filter.add(update('SAA-C03', 'AWS blog', 'https://aws.example/a'))
+    assert not update_filter.add(update('SAA-C03', 'Training blog', 'https://training.example/b'))
+
+    [merged] = update_filter.results()
+    assert update_filter.merged == 1
+    assert [ref['source'] for ref in merged['sources']] == ['AWS blog', 'Training blog']
+
+def test_same_wording_about_different_exams_is_kept_apart():
+    update_filter = UpdateFilter(near_duplicate_similarity=0.7)
+    retiring = update('SAA-C03', 'AWS blog', 'https://aws.example/a')
+    launching = update('SAA-C04', 'AWS blog', 'https://aws.example/b')
+    assert jaccard(tokens(f"{retiring.title} {retiring.summary}"), tokens(f"{launching.title} {launching.summary}")) >= 0.7
+
+    assert update_filter.add(retiring)
+    assert update_filter.add(launching)
+    assert update_filter.merged == 0
+    assert len(update_filter.results()) == 2
+
+def test_update_without_exam_codes_can_still_merge():
+    update_filter = UpdateFilter(near_duplicate_similarity=0.7)
+
+    assert update_filter.add(update('SAA-C03', 'AWS blog', 'https://aws.example/a'))
+    assert not update_filter.add(update('SAA-C03', 'Newsletter', 'https://news.example/c', codes=()))
+    assert update_filter.merged == 1
+
+def test_cert_index_follows_accepted_updates():
+    update_filter = UpdateFilter(max_updates=1, near_duplicate_similarity=0)
+    low = update('SAA-C03', 'AWS blog', 'https://aws.example/a')
+    high = update('SAA-C04', 'AWS blog', 'https://aws.example/b')
+    high.relevance_score = 95
+
+    update_filter.add(low)
+    update_filter.add(high)
+
+    assert update_filter.evicted == [low]
+    assert update_filter.cert_index.codes() == [('SAA-C04', 1)]
+    assert update_filter.cert_index.updates_for('saa-c04') == [high]
@@ -0,0 +1,232 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from utils.cert_codes import extract_certs
+from utils.seen_store import normalize_url
+from utils.update import Update, as_update
+
+logger = logging.getLogger(__name__)
+
+# Extra update fields worth keeping (page diffs are capped by diff_snapshots)
+ARCHIVED_EXTRAS = ('sources', 'change', 'diff')
+
+def fts_query(text):
+    """FTS5 query matching every word of ``text`` (codes like SAA-C04 as phrases)"""
+    phrases = []
+    for word in text.split():
+        parts = re.findall(r'\w+', word)
+        if parts:
+            phrases.append('"' + ' '.join(parts) + '"')
+    return ' '.join(phrases)
+
+class UpdateArchive:
+    """SQLite archive of every update scans accepted, searchable afterwards.
+
+    Updates are staged as a scan accepts them and written on ``commit``,
+    keyed by canonical URL plus title so a re-reported update is refreshed
+    rather than duplicated. Each row is indexed by provider, source, date
+    and the exam codes it mentions; titles and summaries go into an FTS5
+    index when SQLite has it (plain LIKE matching otherwise).
+
+    Digests are built incrementally: ``digest_updates`` returns what was
+    archived since a named digest was last marked sent, so a weekly digest
+    never needs to fetch a source.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._staged = []
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS updates (
+                id INTEGER PRIMARY KEY,
+                key TEXT NOT NULL UNIQUE,
+                provider TEXT,
+                source TEXT,
+                type TEXT,
+                title TEXT NOT NULL,
+                url TEXT,
+                summary TEXT,
+                published REAL NOT NULL,
+                relevance_score INTEGER,
+                keywords TEXT,
+                extra TEXT,
+                first_archived REAL NOT NULL,
+                last_archived REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_updates_published ON updates (published);
+            CREATE INDEX IF NOT EXISTS idx_updates_provider ON updates (provider, published);
+            CREATE INDEX IF NOT EXISTS idx_updates_source ON updates (source, published);
+            CREATE INDEX IF NOT EXISTS idx_updates_first_archived ON updates (first_archived);
+            CREATE TABLE IF NOT EXISTS update_certs (
+                code TEXT NOT NULL,
+                update_id INTEGER NOT NULL,
+                PRIMARY KEY (code, update_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS digests (
+                name TEXT PRIMARY KEY,
+                archived_until REAL NOT NULL
+            );
+        """)
+        try:
+            self._conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS updates_fts USING fts5(title, summary)")
+            self.full_text = True
+        except sqlite3.OperationalError:
+            logger.debug("SQLite has no FTS5; archive text search falls back to LIKE")
+            self.full_text = False
+        self._conn.commit()
+
+    def stage(self, update):
+        """Queue an update to be archived on the next commit()"""
+        with self._lock:
+            self._staged.append(as_update(update))
+
+    def commit(self):
+        """Write every staged update; call once a scan has been fully handled"""
+        now = time.time()
+        with self._lock:
+            staged, self._staged = self._staged, []
+            for update in staged:
+                self._write(update, now)
+            self._conn.commit()
+        return len(staged)
+
+    def _write(self, update, now):
+        title = update.title or ''
+        summary = update.summary or ''
+        key = f"{normalize_url(update.url)}:{' '.join(title.lower().split())}"
+        extra = {name: update[name] for name in ARCHIVED_EXTRAS if name in update}
+        row = self._conn.execute("""
+            INSERT INTO updates (
+                key, provider, source, type, title, url, summary, published,
+                relevance_score, keywords, extra, first_archived, last_archived
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                summary = excluded.summary,
+                relevance_score = excluded.relevance_score,
+                keywords = excluded.keywords,
+                extra = excluded.extra,
+                last_archived = excluded.last_archived
+            RETURNING id
+        """, (
+            key, update.provider, update.source, update.type,
+            title, update.url, summary, update.published, update.relevance_score,
+            json.dumps(list(update.keywords_matched)),
+            json.dumps(extra) if extra else None,
+            now, now,
+        )).fetchone()
+        update_id = row[0]
+
+        self._conn.execute("DELETE FROM update_certs WHERE update_id = ?", (update_id,))
+        self._conn.executemany(
+            "INSERT INTO update_certs (code, update_id) VALUES (?, ?)",
+            [(code, update_id) for code in update.cert_codes or extract_certs(f"{title} {summary}").codes]
+        )
+        if self.full_text:
+            self._conn.execute("DELETE FROM updates_fts WHERE rowid = ?", (update_id,))
+            self._conn.execute(
+                "INSERT INTO updates_fts (rowid, title, summary) VALUES (?, ?, ?)",
+                (update_id, title, summary)
+            )
+
+    def search(self, text=None, provider=None, cert=None, source=None,
+               since=None, until=None, min_relevance=None, limit=100):
+        """Archived updates matching every given filter, newest first.
+
+        ``since``/``until`` are timestamps bounding the publication date;
+        ``cert`` is an exam code such as "SAA-C04".
+        """
+        clauses, params = [], []
+        if text and text.strip():
+            if self.full_text:
+                clauses.append("u.id IN (SELECT rowid FROM updates_fts WHERE updates_fts MATCH ?)")
+                params.append(fts_query(text))
+            else:
+                for word in text.split():
+                    clauses.append("(u.title || ' ' || u.summary) LIKE ?")
+                    params.append(f"%{word}%")
+        if cert:
+            clauses.append("u.id IN (SELECT update_id FROM update_certs WHERE code = ?)")
+            params.append(cert.upper())
+        for column, value in (('provider', provider), ('source', source)):
+            if value:
+                clauses.append(f"u.{column} = ? COLLATE NOCASE")
+                params.append(value)
+        if since is not None:
+            clauses.append("u.published >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("u.published < ?")
+            params.append(until)
+        if min_relevance is not None:
+            clauses.append("u.relevance_score >= ?")
+            params.append(min_relevance)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        return self._select(f"{where} ORDER BY u.published DESC LIMIT ?", params + [limit])
+
+    def digest_updates(self, name, default_days=7):
+        """Updates archived since digest ``name`` was last marked sent.
+
+        Returns ``(updates, archived_until)``; pass ``archived_until`` to
+        ``mark_digest`` once the digest has gone out. A digest that was
+        never sent starts ``default_days`` back.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT archived_until FROM digests WHERE name = ?", (name,)
+            ).fetchone()
+            until = self._conn.execute("SELECT MAX(first_archived) FROM updates").fetchone()[0]
+        since = row[0] if row else time.time() - default_days * 86400
+        if until is None or until <= since:
+            return [], since
+        updates = self._select(
+            "WHERE u.first_archived > ? AND u.first_archived <= ? "
+            "ORDER BY u.relevance_score DESC, u.published DESC",
+            [since, until]
+        )
+        return updates, until
+
+    def mark_digest(self, name, archived_until):
+        """Record that digest ``name`` covered everything archived up to a time"""
+        with self._lock:
+            self._conn.execute("""
+                INSERT INTO digests (name, archived_until) VALUES (?, ?)
+                ON CONFLICT(name) DO UPDATE SET archived_until = excluded.archived_until
+            """, (name, archived_until))
+            self._conn.commit()
+
+    def _select(self, tail, params):
+        with self._lock:
+            rows = self._conn.execute(f"""
+                SELECT u.provider, u.source, u.type, u.title, u.url, u.summary,
+                       u.published, u.relevance_score, u.keywords, u.extra
+                FROM updates u {tail}
+            """, params).fetchall()
+        updates = []
+        for provider, source, kind, title, url, summary, published, score, keywords, extra in rows:
+            certs = extract_certs(f"{title} {summary}")
+            updates.append(Update(
+                provider=provider, source=source, type=kind, title=title, url=url,
+                summary=summary, published=published, relevance_score=score,
+                keywords_matched=json.loads(keywords or '[]'),
+                cert_codes=certs.codes, transitions=certs.transitions,
+                **(json.loads(extra) if extra else {})
+            ))
+        return updates
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,129 @@
+import re
+from collections import namedtuple
+
+# Exam code prefixes of the vendors this monitor follows. Only these count:
+# a generic "two to four capitals, dash, digits" shape also matches
+# AES-256, SHA-256, UTF-16 or NIST-800, which are not exams.
+# AWS codes carry a version letter (SAA-C03), Microsoft's are plain
+# numbers (AZ-104), and the Kubernetes exams go by bare acronyms.
+AWS_PREFIXES = ('AIF', 'ANS', 'CLF', 'DAS', 'DBS', 'DEA', 'DOP', 'DVA', 'MLA', 'MLS', 'PAS', 'SAA', 'SAP', 'SCS', 'SOA')
+MICROSOFT_PREFIXES = ('AI', 'AZ', 'DP', 'MB', 'MD', 'MS', 'PL', 'SC')
+BARE_CODES = ('CKAD', 'CKA', 'CKS', 'KCNA', 'KCSA')
+
+CODE_PATTERN = (
+    rf"(?:{'|'.join(AWS_PREFIXES)})-[A-Z]\d{{2}}"
+    rf"|(?:{'|'.join(MICROSOFT_PREFIXES)})-\d{{3}}"
+    rf"|{'|'.join(BARE_CODES)}"
+)
+# A code, or a bare version ("C03") continuing the code before it, as in
+# "CLF-C02 -> C03"; both are case-sensitive, as vendors write them
+TOKEN_RE = re.compile(rf'\b(?P<code>{CODE_PATTERN})\b|(?<![\w-])(?P<version>[A-Z]\d{{2}})\b')
+
+# Words between two codes that make the second replace the first. A bare
+# "to" is not enough: "prepare for AZ-900 to AZ-104" is a learning path.
+FORWARD_RE = re.compile(
+    r'→|->|=>|\b(?:replaced|succeeded|superseded) by\b|\bbecomes?\b|\bnew version\b'
+    r'|\b(?:updated?|updating|upgraded?|upgrading|moves?|moving|switch(?:es|ed|ing)?'
+    r'|transition(?:s|ed|ing)?|chang(?:es|ed|ing)) to\b',
+    re.IGNORECASE
+)
+# ...or the first replace the second ("SAA-C04, replacing SAA-C03")
+BACKWARD_RE = re.compile(r'\breplac(?:es|ing)\b|\bsuccessor (?:to|of)\b|\binstead of\b', re.IGNORECASE)
+# Codes further apart than this are not read as a transition
+MAX_GAP = 40
+# AWS-style versioned codes: same exam, successive versions (SAA-C03, SAA-C04)
+VERSIONED_RE = re.compile(r'^(?P<family>[A-Z]{2,4})-(?P<version>[A-Z]\d{2})$')
+
+CertMentions = namedtuple('CertMentions', ['codes', 'transitions'])
+
+def extract_certs(text):
+    """Exam codes and version transitions mentioned in ``text``, in one pass.
+
+    ``codes`` lists each distinct code in order of appearance;
+    ``transitions`` lists (old, new) pairs, read from wording such as
+    "SAA-C03 will be replaced by SAA-C04" or "CLF-C02 -> C03", and from
+    two versions of the same AWS-style exam appearing together.
+    """
+    codes = []
+    transitions = []
+    previous, previous_end = None, 0
+
+    def add_transition(old, new):
+        if old != new and (old, new) not in transitions:
+            transitions.append((old, new))
+
+    for match in TOKEN_RE.finditer(text or ''):
+        code = match.group('code')
+        gap = text[previous_end:match.start()] if previous else ''
+        if code is None:
+            # A bare version continues the code just before it, if any
+            if not previous or not VERSIONED_RE.match(previous) or len(gap) > MAX_GAP or not FORWARD_RE.search(gap):
+                continue
+            code = f"{previous.rsplit('-', 1)[0]}-{match.group('version')}"
+            add_transition(previous, code)
+        elif previous and len(gap) <= MAX_GAP:
+            if BACKWARD_RE.search(gap):
+                add_transition(code, previous)
+            elif FORWARD_RE.search(gap):
+                add_transition(previous, code)
+
+        if code not in codes:
+            codes.append(code)
+        previous, previous_end = code, match.end()
+
+    # Several versions of one exam in an entry are a transition even
+    # without wording between them: oldest to newest
+    families = {}
+    for code in codes:
+        versioned = VERSIONED_RE.match(code)
+        if versioned:
+            families.setdefault(versioned.group('family'), []).append(code)
+    for versions in families.values():
+        versions.sort(key=lambda code: code.rsplit('-', 1)[1])
+        for old, new in zip(versions, versions[1:]):
+            if (new, old) not in transitions:
+                add_transition(old, new)
+
+    return CertMentions(tuple(codes), tuple(transitions))
+
+def primary_code(update):
+    """The exam an update is mainly about: where it transitions to, else the first code"""
+    transitions = update.get('transitions') or ()
+    if transitions:
+        return transitions[-1][1]
+    codes = update.get('cert_codes') or ()
+    return codes[0] if codes else None
+
+class CertIndex:
+    """Inverted index from exam code to the updates mentioning it"""
+
+    def __init__(self, updates=()):
+        self._by_code = {}
+        for update in updates:
+            self.add(update)
+
+    def add(self, update, codes=None):
+        """Index an update under ``codes`` (default: every code it mentions)"""
+        for code in update.get('cert_codes') or () if codes is None else codes:
+            self._by_code.setdefault(code, []).append(update)
+
+    def discard(self, update):
+        """Drop an update from the index again"""
+        for code in update.get('cert_codes') or ():
+            updates = self._by_code.get(code)
+            if updates is None:
+                continue
+            updates[:] = [other for other in updates if other is not update]
+            if not updates:
+                del self._by_code[code]
+
+    def updates_for(self, code):
+        return list(self._by_code.get(code.upper(), ()))
+
+    def codes(self):
+        """Codes with the number of updates mentioning each, most mentioned first"""
+        counts = [(code, len(updates)) for code, updates in self._by_code.items()]
+        return sorted(counts, key=lambda item: (-item[1], item[0]))
+
+    def __len__(self):
+        return len(self._by_code)
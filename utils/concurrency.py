@@ -0,0 +1,84 @@
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+def url_host(url):
+    """Host part of a URL, used as the key for per-host limits"""
+    return urlparse(url).netloc.lower()
+
+class HostLimiter:
+    """Per-host concurrency limit for thread-based fetching.
+
+    Jobs over their host's limit wait in a queue for that host, not in a
+    worker thread, so a host with many URLs never ties up the pool while
+    other hosts have work (like ``AsyncHostLimiter`` taking the host slot
+    before the global one).
+    """
+
+    def __init__(self, per_host_limit):
+        self.per_host_limit = max(1, per_host_limit)
+
+    def map(self, executor, fn, jobs, url):
+        """Run ``fn(job)`` on ``executor`` for each job; returns an iterator of results in job order"""
+        futures = [Future() for _ in jobs]
+        hosts = [url_host(url(job)) for job in jobs]
+        waiting = {host: deque() for host in hosts}
+        running = dict.fromkeys(hosts, 0)
+        lock = threading.Lock()
+
+        def start(index):
+            try:
+                inner = executor.submit(fn, jobs[index])
+            except RuntimeError as e:
+                # The executor was shut down: nobody is reading results any more
+                futures[index].set_exception(e)
+                return
+            inner.add_done_callback(lambda done: finish(index, done))
+
+        def finish(index, done):
+            with lock:
+                queue = waiting[hosts[index]]
+                following = queue.popleft() if queue else None
+                if following is None:
+                    running[hosts[index]] -= 1
+            if following is not None:
+                start(following)
+            if done.cancelled():
+                futures[index].cancel()
+            elif done.exception() is not None:
+                futures[index].set_exception(done.exception())
+            else:
+                futures[index].set_result(done.result())
+
+        ready = []
+        with lock:
+            for index, host in enumerate(hosts):
+                if running[host] < self.per_host_limit:
+                    running[host] += 1
+                    ready.append(index)
+                else:
+                    waiting[host].append(index)
+        for index in ready:
+            start(index)
+        return (future.result() for future in futures)
+
+class AsyncHostLimiter:
+    """Global and per-host concurrency limits for fetches on an event loop"""
+
+    def __init__(self, max_concurrency, per_host_limit):
+        self.per_host_limit = max(1, per_host_limit)
+        self._global = asyncio.Semaphore(max(1, max_concurrency))
+        self._hosts = {}
+
+    @asynccontextmanager
+    async def slot(self, url):
+        """Hold a global slot and a slot for the URL's host"""
+        host = url_host(url)
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.per_host_limit)
+        # Wait on the host first so a busy host never ties up global slots
+        async with self._hosts[host], self._global:
+            yield
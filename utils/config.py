@@ -0,0 +1,238 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+
+from utils.entry_filter import EntryFilter
+from utils.keyword_matcher import KeywordMatcher
+from utils.lazy_import import lazy_import
+
+yaml = lazy_import('yaml')
+
+logger = logging.getLogger(__name__)
+
+SOURCES_PATH = 'config/sources.yaml'
+SETTINGS_PATH = 'config/settings.yaml'
+
+class ConfigError(Exception):
+    """sources.yaml or settings.yaml is malformed"""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        super().__init__("Invalid configuration:\n  - " + "\n  - ".join(self.errors))
+
+class CompiledConfig:
+    """Validated sources and settings, plus keyword matchers built on demand"""
+
+    def __init__(self, sources, settings, signature):
+        self.sources = sources
+        self.settings = settings
+        self.signature = signature
+        self._matchers = {}
+        self._entry_filter = None
+        self._lock = threading.Lock()
+
+    def matcher(self, keywords):
+        """Compiled matcher for a keyword list, built once per config version"""
+        key = tuple(keywords)
+        with self._lock:
+            matcher = self._matchers.get(key)
+            if matcher is None:
+                matcher = KeywordMatcher(keywords)
+                self._matchers[key] = matcher
+            return matcher
+
+    @property
+    def entry_filter(self):
+        """The compiled exclude_keywords/include_certs filter"""
+        with self._lock:
+            if self._entry_filter is None:
+                self._entry_filter = EntryFilter.from_settings(self.settings)
+            return self._entry_filter
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+def load_config(sources_path=SOURCES_PATH, settings_path=SETTINGS_PATH):
+    """Load and validate the config, reusing the cached copy if the files are unchanged.
+
+    Files are compared by mtime and size first and only re-hashed when
+    those move, so repeat calls (e.g. once per daemon cycle) are cheap.
+    Raises ConfigError listing every problem found.
+    """
+    key = (os.path.abspath(sources_path), os.path.abspath(settings_path))
+    stats = (_stat(sources_path), _stat(settings_path))
+
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached and cached[0] == stats:
+            return cached[1]
+
+    raw_sources = _read(sources_path)
+    raw_settings = _read(settings_path)
+    signature = hashlib.sha1(raw_sources + b'\0' + raw_settings).hexdigest()
+
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached and cached[1].signature == signature:
+            # Touched but not edited: keep the compiled config and its matchers
+            _cache[key] = (stats, cached[1])
+            return cached[1]
+
+    try:
+        sources = yaml.safe_load(raw_sources) or {}
+        settings = yaml.safe_load(raw_settings) or {}
+    except yaml.YAMLError as e:
+        raise ConfigError([f"YAML parse error: {e}"])
+
+    errors = validate_sources(sources) + validate_settings(settings)
+    if errors:
+        raise ConfigError(errors)
+
+    config = CompiledConfig(sources, settings, signature)
+    with _cache_lock:
+        _cache[key] = (stats, config)
+    return config
+
+def validate_sources(sources):
+    """Return a list of problems with sources.yaml (empty if valid)"""
+    errors = []
+    if not isinstance(sources, dict):
+        return ["sources.yaml must be a mapping"]
+
+    for section, list_key in (('rss_feeds', 'keywords'), ('announcement_pages', 'check_for')):
+        providers = sources.get(section) or {}
+        if not isinstance(providers, dict):
+            errors.append(f"{section} must map provider names to lists of sources")
+            continue
+
+        for provider, entries in providers.items():
+            if not isinstance(entries, list):
+                errors.append(f"{section}.{provider} must be a list")
+                continue
+
+            for i, entry in enumerate(entries):
+                where = f"{section}.{provider}[{i}]"
+                if not isinstance(entry, dict):
+                    errors.append(f"{where} must be a mapping")
+                    continue
+                where = f"{where} ({entry.get('name', 'unnamed')})"
+
+                for field in ('url', 'name'):
+                    if not isinstance(entry.get(field), str) or not entry.get(field).strip():
+                        errors.append(f"{where}: missing '{field}'")
+                if isinstance(entry.get('url'), str) and not re.match(r'https?://', entry['url']):
+                    errors.append(f"{where}: url must start with http:// or https://")
+
+                terms = entry.get(list_key)
+                if not isinstance(terms, list) or not terms:
+                    errors.append(f"{where}: missing or empty '{list_key}' list")
+                elif not all(isinstance(term, str) and term for term in terms):
+                    errors.append(f"{where}: every '{list_key}' entry must be a non-empty string")
+                elif list_key == 'check_for':
+                    for term in terms:
+                        try:
+                            re.compile(term)
+                        except re.error as e:
+                            errors.append(f"{where}: check_for term {term!r} is not a valid pattern ({e})")
+
+                interval = entry.get('interval_minutes')
+                if interval is not None and (not isinstance(interval, (int, float)) or interval <= 0):
+                    errors.append(f"{where}: interval_minutes must be a positive number")
+                if not isinstance(entry.get('newest_first', True), bool):
+                    errors.append(f"{where}: newest_first must be true or false")
+
+    return errors
+
+def validate_settings(settings):
+    """Return a list of problems with settings.yaml (empty if valid)"""
+    errors = []
+    if not isinstance(settings, dict):
+        return ["settings.yaml must be a mapping"]
+
+    notification = settings.get('notification')
+    if not isinstance(notification, dict):
+        errors.append("settings: missing 'notification' section")
+    else:
+        if notification.get('group_by', 'provider') not in ('provider', 'exam'):
+            errors.append("notification.group_by must be 'provider' or 'exam'")
+        email = notification.get('email') or {}
+        if email.get('enabled'):
+            for field in ('smtp_server', 'smtp_port', 'from_email'):
+                if not email.get(field):
+                    errors.append(f"notification.email: missing '{field}'")
+            if not email.get('to_emails') and not email.get('recipients'):
+                errors.append("notification.email: needs 'to_emails' or 'recipients'")
+            for i, recipient in enumerate(email.get('recipients') or []):
+                if not isinstance(recipient, dict) or not recipient.get('email'):
+                    errors.append(f"notification.email.recipients[{i}]: missing 'email'")
+
+    lookback = settings.get('lookback_days', 7)
+    if not isinstance(lookback, (int, float)) or lookback <= 0:
+        errors.append("lookback_days must be a positive number")
+
+    filters = settings.get('filters') or {}
+    min_relevance = filters.get('min_relevance', 0)
+    if not isinstance(min_relevance, (int, float)) or not 0 <= min_relevance <= 100:
+        errors.append("filters.min_relevance must be between 0 and 100")
+    for key in ('exclude_keywords', 'include_certs'):
+        values = filters.get(key)
+        if values is not None and (not isinstance(values, list) or not all(isinstance(v, str) for v in values)):
+            errors.append(f"filters.{key} must be a list of strings")
+    similarity = filters.get('near_duplicate_similarity')
+    if similarity is not None and (
+        isinstance(similarity, bool) or not isinstance(similarity, (int, float)) or not 0 <= similarity <= 1
+    ):
+        errors.append("filters.near_duplicate_similarity must be a number from 0 to 1")
+    max_updates = filters.get('max_updates')
+    if max_updates is not None and (not isinstance(max_updates, int) or max_updates < 1):
+        errors.append("filters.max_updates must be a positive integer")
+
+    parse_processes = (settings.get('fetch') or {}).get('parse_processes')
+    if parse_processes is not None and not isinstance(parse_processes, int):
+        errors.append("fetch.parse_processes must be an integer")
+
+    for key in ('max_workers', 'per_host_limit', 'parse_workers', 'process_min_sources'):
+        value = (settings.get('fetch') or {}).get(key)
+        if value is not None and (not isinstance(value, int) or value < 1):
+            errors.append(f"fetch.{key} must be a positive integer")
+    for key in ('connect_timeout_seconds', 'read_timeout_seconds', 'host_burst'):
+        value = (settings.get('fetch') or {}).get(key)
+        if value is not None and (not isinstance(value, (int, float)) or value <= 0):
+            errors.append(f"fetch.{key} must be a positive number")
+    for key in ('total_timeout_seconds', 'retries', 'retry_backoff_seconds', 'host_rate_per_second',
+                'circuit_failures', 'circuit_reset_seconds', 'scan_budget_seconds'):
+        value = (settings.get('fetch') or {}).get(key)
+        if value is not None and (not isinstance(value, (int, float)) or value < 0):
+            errors.append(f"fetch.{key} must be zero or a positive number")
+
+    keep_reports = (settings.get('reporting') or {}).get('keep_reports')
+    if keep_reports is not None and (not isinstance(keep_reports, int) or keep_reports < 1):
+        errors.append("reporting.keep_reports must be a positive integer")
+
+    sharding = settings.get('sharding') or {}
+    for key in ('shards', 'max_attempts'):
+        value = sharding.get(key)
+        if value is not None and (not isinstance(value, int) or value < 1):
+            errors.append(f"sharding.{key} must be a positive integer")
+    for key in ('lease_seconds', 'cycle_timeout_minutes', 'poll_seconds'):
+        value = sharding.get(key)
+        if value is not None and (not isinstance(value, (int, float)) or value <= 0):
+            errors.append(f"sharding.{key} must be a positive number")
+
+    return errors
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except OSError as e:
+        raise ConfigError([f"Cannot read {path}: {e}"])
+    return (st.st_mtime_ns, st.st_size)
+
+def _read(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError as e:
+        raise ConfigError([f"Cannot read {path}: {e}"])
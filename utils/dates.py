@@ -0,0 +1,69 @@
+import calendar
+import functools
+import logging
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from utils.lazy_import import lazy_import
+
+# Only imported for dates none of the known formats match
+date_parser = lazy_import('dateutil.parser')
+
+logger = logging.getLogger(__name__)
+
+# strptime formats seen in feeds that neither ISO 8601 nor RFC 822 parsing accepts
+KNOWN_FORMATS = (
+    '%Y-%m-%d %H:%M:%S %z',
+    '%Y-%m-%d %H:%M:%S',
+    '%d %b %Y %H:%M:%S %z',
+    '%B %d, %Y',
+    '%b %d, %Y',
+)
+
+def to_utc(value):
+    """Aware UTC datetime; naive datetimes are taken to already be UTC"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def from_struct(struct):
+    """UTC datetime from one of feedparser's ``*_parsed`` struct_times (always UTC)"""
+    return datetime.fromtimestamp(calendar.timegm(struct), timezone.utc)
+
+def _parse_known(text):
+    try:
+        # ISO 8601 / Atom: 2024-05-01T10:00:00Z, 2024-05-01
+        return datetime.fromisoformat(text)
+    except ValueError:
+        pass
+    try:
+        # RFC 822 / RSS: Wed, 01 May 2024 10:00:00 +0000
+        return parsedate_to_datetime(text)
+    except (TypeError, ValueError, IndexError):
+        pass
+    for fmt in KNOWN_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+@functools.lru_cache(maxsize=4096)
+def parse_date_text(text):
+    """Parse a feed date string to an aware UTC datetime, or None.
+
+    The formats feeds actually use are tried first; only strings none of
+    them match go to dateutil's much slower free-form parser. Results are
+    cached by the raw string, since the same dates come back every scan.
+    """
+    text = text.strip()
+    if not text:
+        return None
+    parsed = _parse_known(text)
+    if parsed is None:
+        try:
+            parsed = date_parser.parse(text)
+        except (ValueError, OverflowError) as e:
+            logger.debug(f"Could not parse date {text!r}: {e}")
+            return None
+    return to_utc(parsed)
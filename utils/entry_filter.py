@@ -0,0 +1,51 @@
+import re
+
+from utils.keyword_matcher import build_trie_pattern
+
+class EntryFilter:
+    """``filters.exclude_keywords`` and ``filters.include_certs`` as one matcher.
+
+    Both lists are compiled into a single whole-word, case-insensitive
+    pattern, so an entry is checked with one regex pass before it is
+    scored or cleaned. An entry is rejected if it mentions any excluded
+    phrase, or if ``include_certs`` is non-empty and it mentions none of
+    them.
+    """
+
+    def __init__(self, exclude_keywords=(), include_certs=()):
+        self.exclude_keywords = tuple(k.lower() for k in exclude_keywords or () if k)
+        self.include_certs = tuple(c.lower() for c in include_certs or () if c)
+        self._exclude = frozenset(self.exclude_keywords)
+        self._include = frozenset(self.include_certs)
+
+        phrases = self._exclude | self._include
+        self._regex = re.compile(build_trie_pattern(phrases, word_boundaries=True)) if phrases else None
+
+    @classmethod
+    def from_settings(cls, settings):
+        filters = settings.get('filters') or {}
+        return cls(filters.get('exclude_keywords'), filters.get('include_certs'))
+
+    @property
+    def active(self):
+        return self._regex is not None
+
+    def check(self, text):
+        """Why lowercased ``text`` should be dropped, or None if it passes.
+
+        Returns ``"exclude:<phrase>"`` for the first excluded phrase found
+        or ``"include_certs"`` when no required cert is mentioned.
+        """
+        if self._regex is None:
+            return None
+
+        included = False
+        for match in self._regex.finditer(text):
+            phrase = match.group()
+            if phrase in self._exclude:
+                return f"exclude:{phrase}"
+            included = True
+
+        if self._include and not included:
+            return 'include_certs'
+        return None
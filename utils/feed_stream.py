@@ -0,0 +1,105 @@
+from collections import namedtuple
+from xml.parsers import expat
+
+from utils.seen_store import item_key
+
+# Read this much of a feed at a time while looking for where to stop
+CHUNK_SIZE = 16 * 1024
+
+# Entry children the reader needs to decide whether to stop, by local name
+ID_TAGS = ('guid', 'id')
+PUBLISHED_TAGS = ('pubDate', 'published', 'issued')
+UPDATED_TAGS = ('updated', 'modified', 'date')
+
+EntryInfo = namedtuple('EntryInfo', ['key', 'published', 'updated'])
+FeedHead = namedtuple('FeedHead', ['content', 'entries', 'unread_bytes'])
+
+class UnreadableFeed(Exception):
+    """The feed can't be read incrementally; parse the whole document instead"""
+
+class _Stop(Exception):
+    pass
+
+def local_name(qname):
+    return qname.rsplit(':', 1)[-1]
+
+def read_feed_head(content, stop):
+    """The part of a feed before the first entry ``stop`` rejects.
+
+    Entries are read one at a time with expat, which only looks at as
+    much of the document as it must. ``stop`` is called with each
+    entry's ``EntryInfo`` (its seen-store key and raw date strings); when
+    it returns True, reading ends and the document up to that entry,
+    with its open elements closed again, is returned as ``FeedHead`` so
+    feedparser only parses the entries before it. Returns None when
+    ``stop`` never fires, since the whole feed is needed then.
+
+    Raises ``UnreadableFeed`` for anything expat can't read (undeclared
+    HTML entities, unsupported encodings, non-XML feeds); feedparser's
+    lenient full parse handles those.
+    """
+    if content.startswith((b'\xff\xfe', b'\xfe\xff')):
+        # UTF-16: the closing tags added below would be in the wrong encoding
+        raise UnreadableFeed("UTF-16 feeds are parsed whole")
+    parser = expat.ParserCreate()
+    # Element qnames from the root down to the element being read
+    stack = []
+    state = {'entry_depth': None, 'field': None, 'text': [], 'values': {}, 'entries': 0}
+
+    def start(name, attrs):
+        tag = local_name(name)
+        if state['entry_depth'] is None:
+            if tag in ('item', 'entry') and stack:
+                state['entry_depth'] = len(stack)
+                state['values'] = {'start': parser.CurrentByteIndex, 'parents': list(stack)}
+        elif len(stack) == state['entry_depth'] + 1:
+            if tag == 'link' and 'href' in attrs:
+                # Atom: the alternate link is the entry's URL
+                if attrs.get('rel', 'alternate') == 'alternate':
+                    state['values'].setdefault('link', attrs['href'])
+            elif tag in ID_TAGS + PUBLISHED_TAGS + UPDATED_TAGS or tag == 'link':
+                state['field'] = tag
+                state['text'] = []
+        stack.append(name)
+
+    def end(name):
+        stack.pop()
+        depth = state['entry_depth']
+        if depth is None:
+            return
+        if len(stack) == depth:
+            values = state['values']
+            state['entry_depth'] = None
+            state['entries'] += 1
+            if stop(_entry_info(values)):
+                state['stop'] = (values['start'], values['parents'])
+                raise _Stop()
+        elif state['field'] and len(stack) == depth + 1:
+            state['values'].setdefault(state['field'], ''.join(state['text']).strip())
+            state['field'] = None
+
+    def characters(data):
+        if state['field']:
+            state['text'].append(data)
+
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.CharacterDataHandler = characters
+
+    try:
+        for offset in range(0, len(content), CHUNK_SIZE):
+            parser.Parse(content[offset:offset + CHUNK_SIZE], False)
+        parser.Parse(b'', True)
+    except _Stop:
+        start_index, parents = state['stop']
+        closing = ''.join(f"</{name}>" for name in reversed(parents)).encode()
+        return FeedHead(content[:start_index] + closing, state['entries'] - 1, len(content) - start_index)
+    except expat.ExpatError as e:
+        raise UnreadableFeed(str(e)) from e
+    return None
+
+def _entry_info(values):
+    guid = values.get('guid') or values.get('id')
+    published = next((values[tag] for tag in PUBLISHED_TAGS if values.get(tag)), None)
+    updated = next((values[tag] for tag in UPDATED_TAGS if values.get(tag)), None)
+    return EntryInfo(item_key(values.get('link', ''), guid), published, updated)
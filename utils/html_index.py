@@ -0,0 +1,165 @@
+import importlib.util
+import re
+from functools import lru_cache
+
+from utils.lazy_import import lazy_import
+
+# bs4 is only imported once a page is actually parsed
+bs4 = lazy_import('bs4')
+
+# Check for lxml without paying for its import up front
+HTML_PARSER = 'lxml' if importlib.util.find_spec('lxml') else 'html.parser'
+
+BLOCK_TAGS = ('h2', 'h3', 'h4', 'p', 'div')
+CONTAINER_TAGS = ('div', 'section', 'article')
+HEADING_TAGS = ('h1', 'h2', 'h3', 'h4')
+SKIP_TAGS = frozenset(('script', 'style', 'noscript', 'template', 'head', 'title'))
+INLINE_TAGS = frozenset((
+    'a', 'abbr', 'b', 'code', 'em', 'i', 'small', 'span', 'strong', 'sub', 'sup', 'time', 'u'
+))
+
+@lru_cache(maxsize=None)
+def non_text_types():
+    """bs4 string types that are not visible page text"""
+    return (bs4.CData, bs4.Comment, bs4.Declaration, bs4.Doctype, bs4.ProcessingInstruction)
+
+@lru_cache(maxsize=1024)
+def term_pattern(term):
+    """Case-insensitive pattern for a check_for term, compiled once per process"""
+    return re.compile(term, re.IGNORECASE)
+
+class TextBlock:
+    """A heading/paragraph/div whose whole content is a single string"""
+
+    __slots__ = ('tag', 'name', 'text', 'lowered')
+
+    def __init__(self, tag, text):
+        self.tag = tag
+        self.name = tag.name
+        self.text = text
+        self.lowered = text.lower()
+
+    def container(self):
+        """Nearest enclosing div/section/article, looked up only when needed"""
+        return self.tag.find_parent(list(CONTAINER_TAGS))
+
+class PageSection:
+    """Normalized text of a page between one heading and the next.
+
+    ``context`` is the heading of a higher-level heading that has no text
+    of its own, like "Retiring" above one card per exam.
+    """
+
+    __slots__ = ('heading', 'level', 'context', 'lines')
+
+    def __init__(self, heading, level=0):
+        self.heading = heading
+        self.level = level
+        self.context = ''
+        self.lines = []
+
+    @property
+    def text(self):
+        return '\n'.join(self.lines)
+
+class TextBlockIndex:
+    """Text blocks of a page, extracted in one walk of the parse tree.
+
+    Blocks are the elements ``find_all(BLOCK_TAGS, string=...)`` would
+    consider: tags whose ``.string`` is set. Term lookups scan this flat
+    list instead of re-walking the tree once per term.
+    """
+
+    def __init__(self, soup):
+        self.soup = soup
+        self.blocks = []
+        for tag in soup.find_all(list(BLOCK_TAGS)):
+            text = tag.string
+            if text is not None:
+                self.blocks.append(TextBlock(tag, str(text)))
+        self._page_text_lower = None
+        self._sections = None
+
+    @classmethod
+    def from_html(cls, html):
+        return cls(bs4.BeautifulSoup(html, HTML_PARSER))
+
+    @property
+    def page_text_lower(self):
+        """Lowercased text of the whole page, computed at most once"""
+        if self._page_text_lower is None:
+            self._page_text_lower = self.soup.get_text().lower()
+        return self._page_text_lower
+
+    def mentions(self, term):
+        """True if the term appears anywhere in the page text"""
+        return term.lower() in self.page_text_lower
+
+    def find(self, term, tags=BLOCK_TAGS, limit=None):
+        """Blocks (in document order) of the given tags whose text matches term"""
+        pattern = term_pattern(term)
+        found = []
+        for block in self.blocks:
+            if block.name in tags and pattern.search(block.text):
+                found.append(block)
+                if limit is not None and len(found) >= limit:
+                    break
+        return found
+
+    def sections(self):
+        """Split the page's visible text into sections at h1-h4 headings.
+
+        Whitespace is collapsed so formatting-only changes to the markup
+        do not register as content changes. A heading directly followed by
+        deeper sub-headings is not a section itself; it becomes their
+        ``context``.
+        """
+        if self._sections is not None:
+            return self._sections
+
+        current = PageSection('')
+        sections = [current]
+        heading_tag = None
+        line_block = None
+        non_text = non_text_types()
+        for string in self.soup.find_all(string=True):
+            if isinstance(string, non_text) or string.parent.name in SKIP_TAGS:
+                continue
+            text = ' '.join(string.split())
+            if not text:
+                continue
+
+            heading = string.find_parent(list(HEADING_TAGS))
+            if heading is not None:
+                if heading is not heading_tag:
+                    heading_tag = heading
+                    line_block = None
+                    current = PageSection(text, int(heading.name[1]))
+                    sections.append(current)
+                else:
+                    current.heading = f"{current.heading} {text}"
+                continue
+
+            heading_tag = None
+            # Text split only by inline markup stays on one line
+            block = string.parent
+            while block.name in INLINE_TAGS and block.parent is not None:
+                block = block.parent
+            if block is line_block and current.lines:
+                current.lines[-1] = f"{current.lines[-1]} {text}"
+            else:
+                current.lines.append(text)
+            line_block = block
+
+        self._sections = []
+        # (level, heading) of the enclosing headings that have no text
+        parents = []
+        for section in sections:
+            while parents and parents[-1][0] >= section.level:
+                parents.pop()
+            if section.lines:
+                section.context = parents[-1][1] if parents else ''
+                self._sections.append(section)
+            elif section.heading:
+                parents.append((section.level, section.heading))
+        return self._sections
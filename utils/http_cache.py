@@ -0,0 +1,117 @@
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+class ValidatorCache:
+    """Persistent ETag / Last-Modified store for conditional HTTP requests"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._validators = {}
+        self._stats = {}
+        self._dirty = False
+        # Validators changed since take_changes() was last called
+        self._changes = {}
+        self.load()
+
+    def load(self):
+        """Load cached validators from disk"""
+        if not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, 'r') as f:
+                self._validators = json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not read HTTP cache {self.path}: {e}")
+            self._validators = {}
+
+    def save(self):
+        """Write validators back to disk if anything changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = dict(self._validators)
+            self._dirty = False
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def request_headers(self, url):
+        """Build If-None-Match / If-Modified-Since headers for a URL"""
+        with self._lock:
+            entry = self._validators.get(url, {})
+
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def update(self, url, response):
+        """Remember the validators returned with a successful response"""
+        entry = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+        }
+        with self._lock:
+            if not entry['etag'] and not entry['last_modified']:
+                if self._validators.pop(url, None) is not None:
+                    self._dirty = True
+                    self._changes[url] = None
+                return
+            if self._validators.get(url) != entry:
+                self._validators[url] = entry
+                self._dirty = True
+                self._changes[url] = entry
+
+    def forget(self, url):
+        """Drop a URL's validators so the next fetch downloads it in full"""
+        with self._lock:
+            if self._validators.pop(url, None) is not None:
+                self._dirty = True
+            self._changes[url] = None
+
+    def take_changes(self):
+        """Validators changed since the last call (None for removed ones)"""
+        with self._lock:
+            changes, self._changes = self._changes, {}
+        return changes
+
+    def apply_changes(self, changes):
+        """Merge validators another process collected with take_changes()"""
+        with self._lock:
+            for url, entry in changes.items():
+                if entry is None:
+                    self._validators.pop(url, None)
+                else:
+                    self._validators[url] = entry
+            if changes:
+                self._dirty = True
+
+    def record(self, source, hit):
+        """Count a cache hit (304) or miss for a source"""
+        with self._lock:
+            counts = self._stats.setdefault(source, {'hits': 0, 'misses': 0})
+            counts['hits' if hit else 'misses'] += 1
+
+    def reset_stats(self):
+        """Clear hit/miss counts before a new scan"""
+        with self._lock:
+            self._stats = {}
+
+    def stats(self):
+        """Hit/miss counts per source for the current run"""
+        with self._lock:
+            return {source: dict(counts) for source, counts in self._stats.items()}
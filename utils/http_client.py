@@ -0,0 +1,273 @@
+import logging
+import random
+import threading
+import time
+
+from utils.concurrency import url_host
+from utils.lazy_import import lazy_import
+from utils.metrics import ScanMetrics
+
+requests = lazy_import('requests')
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+# Responses worth retrying; anything else is returned to the caller as-is
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_RETRY_DELAY = 30
+CHUNK_SIZE = 64 * 1024
+
+class HostUnavailable(Exception):
+    """A host's circuit breaker is open, so the fetch was not attempted"""
+
+class BudgetExhausted(Exception):
+    """The scan's time budget ran out before the fetch could finish"""
+
+def create_session(settings):
+    """Create the pooled, keep-alive HTTP session shared by all monitors"""
+    fetch_config = settings.get('fetch', {})
+    pool_size = max(1, fetch_config.get('max_workers', 1))
+    per_host = max(1, fetch_config.get('per_host_limit', pool_size))
+
+    session = requests.Session()
+    session.headers.update({'User-Agent': USER_AGENT})
+
+    # A pool per host (kept for many hosts), each big enough for every
+    # fetch the per-host limit lets run at once
+    adapter = requests.adapters.HTTPAdapter(pool_connections=max(pool_size, 32), pool_maxsize=per_host)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+class TokenBucket:
+    """Refills ``rate`` tokens a second up to ``burst``; each request takes one"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token, returning how long to wait before using it.
+
+        Tokens may go negative, so callers queue up in arrival order
+        rather than all waking at once when one frees up.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+class CircuitBreaker:
+    """Skips hosts that keep failing, trying one request again after a pause"""
+
+    def __init__(self, failure_threshold, reset_seconds):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = {}
+        self._opened_at = {}
+        self._lock = threading.Lock()
+
+    def allow(self, host):
+        """Whether a request to ``host`` may go ahead"""
+        if not self.failure_threshold:
+            return True
+        with self._lock:
+            if self._failures.get(host, 0) < self.failure_threshold:
+                return True
+            now = time.monotonic()
+            # A reload can lower the threshold below a host's failure count
+            if now - self._opened_at.setdefault(host, now) < self.reset_seconds:
+                return False
+            # Half-open: let this request probe the host, hold the rest back
+            self._opened_at[host] = now
+            return True
+
+    def record(self, host, ok):
+        with self._lock:
+            if ok:
+                if self._failures.pop(host, 0) >= self.failure_threshold > 0:
+                    logger.info(f"🔌 {host} is answering again")
+                self._opened_at.pop(host, None)
+                return
+            failures = self._failures.get(host, 0) + 1
+            self._failures[host] = failures
+            if self.failure_threshold and failures >= self.failure_threshold:
+                if failures == self.failure_threshold:
+                    logger.warning(
+                        f"🔌 {host} failed {failures} times in a row; "
+                        f"skipping it for {self.reset_seconds}s"
+                    )
+                self._opened_at[host] = time.monotonic()
+
+    def open_hosts(self):
+        with self._lock:
+            return sorted(
+                host for host, failures in self._failures.items()
+                if self.failure_threshold and failures >= self.failure_threshold
+            )
+
+class Fetcher:
+    """The HTTP layer every source fetch goes through.
+
+    On top of the pooled session it adds, per host, a token-bucket rate
+    limit and a circuit breaker that skips the host after
+    ``circuit_failures`` failed fetches in a row; per request, separate
+    connect/read timeouts plus a cap on the total download time, and
+    jittered retries of connection errors, timeouts, 429s and 5xx; and,
+    per scan, a time budget (``start_scan``) after which fetches fail
+    fast with ``BudgetExhausted`` so a scan never runs past it by more
+    than one in-flight read.
+    """
+
+    def __init__(self, settings, session=None):
+        self.session = session or create_session(settings)
+        self.metrics = ScanMetrics()
+        self.deadline = None
+        self.configure(settings)
+
+    def configure(self, settings):
+        """Apply the ``fetch`` settings (breaker state survives a reload)"""
+        fetch_config = settings.get('fetch', {})
+        self.timeout = (
+            fetch_config.get('connect_timeout_seconds', 10),
+            fetch_config.get('read_timeout_seconds', 30),
+        )
+        self.total_timeout = fetch_config.get('total_timeout_seconds', 60)
+        self.retries = fetch_config.get('retries', 2)
+        self.retry_backoff = fetch_config.get('retry_backoff_seconds', 1)
+        self.host_rate = fetch_config.get('host_rate_per_second', 0)
+        self.host_burst = fetch_config.get('host_burst', 1)
+        self.budget_seconds = fetch_config.get('scan_budget_seconds', 0)
+        self._buckets = {}
+        self._buckets_lock = threading.Lock()
+
+        failures = fetch_config.get('circuit_failures', 5)
+        reset_seconds = fetch_config.get('circuit_reset_seconds', 300)
+        breaker = getattr(self, 'breaker', None)
+        if breaker is None:
+            self.breaker = CircuitBreaker(failures, reset_seconds)
+        else:
+            breaker.failure_threshold = failures
+            breaker.reset_seconds = reset_seconds
+
+    def start_scan(self):
+        """Start the scan's time budget (if one is configured)"""
+        self.deadline = time.monotonic() + self.budget_seconds if self.budget_seconds else None
+
+    def end_scan(self):
+        self.deadline = None
+
+    def remaining(self):
+        """Seconds left in the scan budget, or None without a budget"""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def get(self, url, headers=None):
+        """GET ``url`` with retries; the body is fully read before returning.
+
+        Retryable statuses that persist are returned (``raise_for_status``
+        reports them); connection errors and timeouts are raised.
+        """
+        host = url_host(url)
+        if not self.breaker.allow(host):
+            self.metrics.increment('fetch_circuit_open')
+            raise HostUnavailable(f"{host} is failing; skipped until its circuit breaker resets")
+
+        attempt = 0
+        while True:
+            self._check_budget()
+            self._wait_for_token(host)
+            error = response = None
+            try:
+                response = self._get_once(url, headers)
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                error = e
+
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                self.breaker.record(host, ok=True)
+                return response
+
+            delay = self._retry_delay(attempt, response)
+            remaining = self.remaining()
+            if remaining is not None and remaining <= 0:
+                # Cut off by the budget; not the host's fault
+                self._exhausted()
+            if attempt >= self.retries or (remaining is not None and delay >= remaining):
+                self.breaker.record(host, ok=False)
+                if error is not None:
+                    raise error
+                return response
+
+            attempt += 1
+            self.metrics.increment('fetch_retries')
+            logger.debug(f"Retrying {url} in {delay:.1f}s ({error or response.status_code})")
+            time.sleep(delay)
+
+    def _get_once(self, url, headers):
+        connect, read = self.timeout
+        limit = time.monotonic() + self.total_timeout if self.total_timeout else None
+        remaining = self.remaining()
+        if remaining is not None:
+            # Never wait on the network past the end of the budget
+            remaining = max(remaining, 0.001)
+            connect, read = min(connect, remaining), min(read, remaining)
+            limit = self.deadline if limit is None else min(limit, self.deadline)
+
+        response = self.session.get(url, headers=headers, timeout=(connect, read), stream=True)
+        # The read timeout is per socket read; a host dripping bytes could
+        # stretch a download forever, so the whole body is timed as well
+        chunks = []
+        try:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                chunks.append(chunk)
+                if limit is not None and time.monotonic() > limit:
+                    raise requests.Timeout(f"{url} took longer than {self.total_timeout}s to download")
+        except BaseException:
+            response.close()
+            raise
+        # What Response.content would have read; fully read, the connection
+        # is already back in the pool
+        response._content = b''.join(chunks)
+        return response
+
+    def _wait_for_token(self, host):
+        if not self.host_rate:
+            return
+        with self._buckets_lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.host_rate, self.host_burst)
+        wait = bucket.reserve()
+        if wait:
+            remaining = self.remaining()
+            if remaining is not None and wait >= remaining:
+                self._exhausted()
+            time.sleep(wait)
+
+    def _retry_delay(self, attempt, response):
+        """Exponential backoff with jitter, or the server's Retry-After"""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(int(retry_after), MAX_RETRY_DELAY)
+        delay = min(MAX_RETRY_DELAY, self.retry_backoff * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _check_budget(self):
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            self._exhausted()
+
+    def _exhausted(self):
+        self.metrics.increment('fetch_budget_exhausted')
+        raise BudgetExhausted(f"scan budget of {self.budget_seconds}s used up")
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,140 @@
+import re
+
+IMPORTANT_TERMS = ('retiring', 'new version', 'updated', 'launching', 'changes', 'announcement')
+
+def build_trie_pattern(phrases, word_boundaries=False):
+    """Build a regex alternation from phrases, factored into a trie.
+
+    At any position the pattern matches the longest phrase that starts
+    there, and each branch is decided by a single character so the regex
+    engine never retries phrases that share a prefix. With
+    ``word_boundaries`` a phrase only matches as whole words: it may not
+    start or end in the middle of a word (edges that are punctuation,
+    like the "-" in "AZ-", are left unconstrained).
+    """
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def is_word(char):
+        return char.isalnum() or char == '_'
+
+    def render(node, last=''):
+        terminal = '' in node
+        branches = []
+        for char, child in sorted(node.items()):
+            if char == '':
+                continue
+            start = r'(?<!\w)' if word_boundaries and not last and is_word(char) else ''
+            branches.append(start + re.escape(char) + render(child, char))
+
+        if word_boundaries and terminal and is_word(last):
+            # A phrase ending in a word character must not run into the next word
+            end = r'(?!\w)'
+            return '(?:' + '|'.join(branches + [end]) + ')' if branches else end
+        if not branches:
+            return ''
+        if len(branches) == 1:
+            body = branches[0]
+            if terminal:
+                return f"(?:{body})?" if len(body) > 1 else f"{body}?"
+            return body
+        body = '(?:' + '|'.join(branches) + ')'
+        return body + '?' if terminal else body
+
+    return render(trie)
+
+class KeywordMatcher:
+    """Relevance scorer compiled once for a feed's keyword list.
+
+    Every phrase the scorer cares about (whole keywords, their individual
+    words and the important boost terms) is found in a single regex pass
+    over the entry text. Scores match the original per-keyword rules:
+    30 for a full keyword, 10 if only one of its words appears, plus 20
+    for each important term, capped at 100.
+
+    Exam codes found by ``extract_certs`` score like keywords even when
+    the feed's list doesn't name them, so new exam versions count without
+    config edits, and each version transition counts as an important term.
+    """
+
+    def __init__(self, keywords, important_terms=IMPORTANT_TERMS):
+        self.keywords = list(keywords)
+        self._lowered = [keyword.lower() for keyword in self.keywords]
+        self._keyword_set = frozenset(self._lowered)
+        self._words = [tuple(lowered.split()) for lowered in self._lowered]
+        self.important_terms = tuple(term.lower() for term in important_terms)
+
+        phrases = set(self._lowered) | set(self.important_terms)
+        for words in self._words:
+            phrases.update(words)
+        phrases.discard('')
+
+        # A matched phrase implies every phrase contained in it. The only
+        # phrases a non-overlapping scan can miss are ones that start inside
+        # a match and run past its end, which needs a suffix of the match to
+        # be a prefix of the missed phrase; those few get a direct check.
+        self._contained = {
+            phrase: frozenset(other for other in phrases if other in phrase)
+            for phrase in phrases
+        }
+        self._straddling = {
+            phrase: frozenset(
+                other for other in phrases
+                if any(
+                    other.startswith(phrase[i:]) and len(other) > len(phrase) - i
+                    for i in range(1, len(phrase))
+                )
+            )
+            for phrase in phrases
+        }
+        pattern = build_trie_pattern(phrases) if phrases else r'(?!)'
+        self._regex = re.compile(pattern)
+
+    def find(self, text):
+        """Set of all known phrases occurring in already-lowercased text"""
+        found = set()
+        candidates = set()
+        for phrase in set(self._regex.findall(text)):
+            found |= self._contained[phrase]
+            candidates |= self._straddling[phrase]
+
+        for phrase in candidates - found:
+            if phrase in text:
+                found.add(phrase)
+
+        return found
+
+    def match(self, text, max_keywords=5, certs=None):
+        """Score lowercased text and collect its matched keywords in one pass.
+
+        ``certs`` is the entry's ``CertMentions``, if they were extracted.
+        """
+        found = self.find(text)
+
+        score = 0
+        matched = []
+        for keyword, lowered, words in zip(self.keywords, self._lowered, self._words):
+            if lowered in found:
+                score += 30
+                if len(matched) < max_keywords:
+                    matched.append(keyword)
+            elif any(word in found for word in words):
+                score += 10
+
+        for term in self.important_terms:
+            if term in found:
+                score += 20
+
+        if certs is not None:
+            for code in certs.codes:
+                if code.lower() not in self._keyword_set:
+                    score += 30
+                    if len(matched) < max_keywords:
+                        matched.append(code)
+            score += 20 * len(certs.transitions)
+
+        return min(score, 100), matched
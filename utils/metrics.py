@@ -0,0 +1,216 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+def prune_reports(directory, keep):
+    """Delete all but the newest ``keep`` scan reports in a directory"""
+    # The UTC timestamps in the names sort oldest first
+    reports = sorted(
+        name for name in os.listdir(directory)
+        if name.startswith('scan-') and name.endswith('.json')
+    )
+    for name in reports[:-keep]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError as e:
+            logger.warning(f"Could not delete old scan report {name}: {e}")
+
+class SourceMetrics:
+    """Timings and counters for one source during one scan"""
+
+    def __init__(self, name, provider, kind, url):
+        self.name = name
+        self.provider = provider
+        self.kind = kind
+        self.url = url
+        self.phases = {}
+        self.bytes = 0
+        self.entries = 0
+        self.updates = 0
+        self.cache_status = None
+        self.error = None
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block of work and add it to the named phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @property
+    def total_seconds(self):
+        return sum(self.phases.values())
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'provider': self.provider,
+            'kind': self.kind,
+            'url': self.url,
+            'phases': {name: round(seconds, 6) for name, seconds in self.phases.items()},
+            'total_seconds': round(self.total_seconds, 6),
+            'bytes': self.bytes,
+            'entries': self.entries,
+            'updates': self.updates,
+            'cache_status': self.cache_status,
+            'error': self.error,
+        }
+
+class ScanMetrics:
+    """Per-source instrumentation collected over one scan"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.finished_at = None
+        self.counters = {}
+        self._sources = {}
+        self._lock = threading.Lock()
+
+    def source(self, name, provider, kind, url):
+        """Get (creating if needed) the metrics record for a source"""
+        key = (kind, name, url)
+        with self._lock:
+            record = self._sources.get(key)
+            if record is None:
+                record = SourceMetrics(name, provider, kind, url)
+                self._sources[key] = record
+            return record
+
+    def sources(self):
+        with self._lock:
+            return list(self._sources.values())
+
+    def increment(self, name, amount=1):
+        """Bump a scan-wide counter"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def merge(self, data):
+        """Add in another scan's metrics, as produced by ``to_dict``"""
+        for name, amount in data.get('counters', {}).items():
+            self.increment(name, amount)
+        for entry in data.get('sources', []):
+            record = self.source(entry['name'], entry['provider'], entry['kind'], entry['url'])
+            for name, seconds in entry['phases'].items():
+                record.add_time(name, seconds)
+            record.bytes += entry['bytes']
+            record.entries += entry['entries']
+            record.updates += entry['updates']
+            record.cache_status = entry['cache_status'] or record.cache_status
+            record.error = entry['error'] or record.error
+
+    def finish(self):
+        self.finished_at = time.time()
+
+    @property
+    def duration(self):
+        end = self.finished_at or time.time()
+        return end - self.started_at
+
+    def to_dict(self):
+        sources = self.sources()
+        return {
+            'started_at': datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(),
+            'duration_seconds': round(self.duration, 6),
+            'sources_checked': len(sources),
+            'bytes_downloaded': sum(s.bytes for s in sources),
+            'updates_found': sum(s.updates for s in sources),
+            'counters': dict(self.counters),
+            'sources': [s.to_dict() for s in sources],
+        }
+
+    def write_json(self, directory, keep=None):
+        """Write this scan's report as scan-<timestamp>.json, returning its path.
+
+        With ``keep``, only that many of the newest reports are kept.
+        """
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.fromtimestamp(self.started_at, timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        path = os.path.join(directory, f"scan-{stamp}.json")
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        if keep:
+            prune_reports(directory, keep)
+        return path
+
+    def to_prometheus(self):
+        """Render the scan in the Prometheus text exposition format"""
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        sources = self.sources()
+
+        def labels(s, **extra):
+            return dict(source=s.name, provider=s.provider, kind=s.kind, **extra)
+
+        metric('cert_monitor_scan_duration_seconds', 'gauge',
+               'Wall time of the last scan.', [({}, round(self.duration, 6))])
+        metric('cert_monitor_scan_timestamp_seconds', 'gauge',
+               'Start time of the last scan as a Unix timestamp.', [({}, int(self.started_at))])
+        metric('cert_monitor_source_phase_seconds', 'gauge',
+               'Time spent per source in each scan phase.',
+               [(labels(s, phase=phase), round(seconds, 6))
+                for s in sources for phase, seconds in sorted(s.phases.items())])
+        metric('cert_monitor_source_bytes', 'gauge',
+               'Bytes downloaded per source.', [(labels(s), s.bytes) for s in sources])
+        metric('cert_monitor_source_entries', 'gauge',
+               'Entries or page sections examined per source.', [(labels(s), s.entries) for s in sources])
+        metric('cert_monitor_source_updates', 'gauge',
+               'Updates produced per source.', [(labels(s), s.updates) for s in sources])
+        metric('cert_monitor_source_cache_hit', 'gauge',
+               '1 if the source was unchanged (HTTP 304), else 0.',
+               [(labels(s), int(s.cache_status == 'hit')) for s in sources])
+        metric('cert_monitor_source_error', 'gauge',
+               '1 if checking the source failed, else 0.',
+               [(labels(s), int(s.error is not None)) for s in sources])
+        if self.counters:
+            metric('cert_monitor_scan_events', 'gauge',
+                   'Scan-wide event counters.',
+                   [({'event': name}, value) for name, value in sorted(self.counters.items())])
+
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        """Write Prometheus metrics atomically so scrapers never see half a file"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    def log_slowest(self, limit=5):
+        """Log the sources that took longest in this scan"""
+        slowest = sorted(self.sources(), key=lambda s: s.total_seconds, reverse=True)[:limit]
+        if not slowest:
+            return
+        logger.info("\n⏱️  Slowest sources:")
+        for s in slowest:
+            phases = ', '.join(f"{name} {seconds:.2f}s" for name, seconds in s.phases.items())
+            logger.info(f"   {s.name}: {s.total_seconds:.2f}s ({phases})")
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    parts = []
+    for key, value in labels.items():
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{key}="{escaped}"')
+    return '{' + ','.join(parts) + '}'
@@ -0,0 +1,94 @@
+import hashlib
+import random
+import re
+
+TOKEN_RE = re.compile(r'[a-z0-9]+(?:-[a-z0-9]+)*')
+
+# Mersenne prime modulus for the MinHash permutations
+_PRIME = (1 << 61) - 1
+
+def tokens(text):
+    """Set of lowercased words (cert codes like "saa-c03" stay whole)"""
+    return frozenset(TOKEN_RE.findall(text.lower()))
+
+def jaccard(a, b):
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+def _token_hash(token):
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'big')
+
+class NearDuplicateIndex:
+    """MinHash + LSH index for finding texts with a similar set of words.
+
+    Each word set gets ``bands * rows`` MinHash values; sets sharing all
+    the values of any one band become candidates, so lookups only compare
+    against a handful of likely matches instead of every indexed item.
+    Candidates are then confirmed with the exact Jaccard similarity. The
+    default 16 bands of 4 rows catch pairs above ~0.7 similarity almost
+    always while rarely proposing pairs below ~0.3.
+    """
+
+    def __init__(self, threshold=0.7, bands=16, rows=4, seed=1):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        rng = random.Random(seed)
+        self._permutations = [
+            (rng.randrange(1, _PRIME), rng.randrange(0, _PRIME))
+            for _ in range(bands * rows)
+        ]
+        self._buckets = {}
+
+    def signature(self, token_set):
+        hashes = [_token_hash(token) for token in token_set]
+        return [
+            min((a * h + b) % _PRIME for h in hashes)
+            for a, b in self._permutations
+        ]
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [
+            (band, tuple(signature[band * rows:(band + 1) * rows]))
+            for band in range(self.bands)
+        ]
+
+    def _best_match(self, token_set, keys, accept=None):
+        best, best_similarity = None, self.threshold
+        checked = set()
+        for key in keys:
+            for other_set, value in self._buckets.get(key, ()):
+                if id(value) in checked:
+                    continue
+                checked.add(id(value))
+                if accept is not None and not accept(value):
+                    continue
+                similarity = jaccard(token_set, other_set)
+                if similarity >= best_similarity:
+                    best, best_similarity = value, similarity
+        return best
+
+    def find(self, token_set):
+        """Most similar indexed value at or above the threshold, or None"""
+        return self._best_match(token_set, self._band_keys(self.signature(token_set)))
+
+    def add(self, token_set, value):
+        entry = (token_set, value)
+        for key in self._band_keys(self.signature(token_set)):
+            self._buckets.setdefault(key, []).append(entry)
+
+    def find_or_add(self, token_set, value, accept=None):
+        """Return a near duplicate of ``token_set``, or index it under ``value``.
+
+        ``accept``, if given, is called with each candidate's value and can
+        rule it out whatever its similarity.
+        """
+        keys = self._band_keys(self.signature(token_set))
+        best = self._best_match(token_set, keys, accept)
+        if best is None:
+            entry = (token_set, value)
+            for key in keys:
+                self._buckets.setdefault(key, []).append(entry)
+        return best
@@ -1,16 +1,35 @@
-import smtplib
 import logging
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import requests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import os
-from datetime import datetime
+from utils.lazy_import import lazy_import
+from utils.outbox import Outbox, OutboxDispatcher, DeliveryError, PermanentDeliveryError
+from utils.rendering import Digest, render_html, render_text, render_slack_blocks
+
+# Each channel's client library is imported the first time it sends
+smtplib = lazy_import('smtplib')
+requests = lazy_import('requests')
 
 logger = logging.getLogger(__name__)
 
 class Notifier:
     def __init__(self, config):
         self.config = config
+        self.delivery_config = config.get('delivery', {})
+        self.channels = {}
+        if config.get('email', {}).get('enabled'):
+            self.channels['email'] = EmailChannel(self)
+        if config.get('slack', {}).get('enabled'):
+            self.channels['slack'] = SlackChannel(self)
+        
+        # Notifications go through a durable outbox unless it is switched off
+        self.outbox = None
+        self.dispatcher = None
+        outbox_path = self.delivery_config.get('outbox')
+        if outbox_path and self.channels:
+            self.outbox = Outbox(outbox_path)
+            self.dispatcher = OutboxDispatcher(self.outbox, self.channels, self.delivery_config)
     
     def send_notification(self, updates):
         """Send notifications through all enabled channels"""
@@ -18,262 +37,209 @@ class Notifier:
             logger.info("No updates to notify")
             return
         
-        if self.config.get('email', {}).get('enabled'):
-            self.send_email(updates)
+        if self.dispatcher:
+            # Queue for background delivery; the scan doesn't wait on SMTP/Slack
+            payload = [dict(update) for update in updates]
+            for name in self.channels:
+                self.outbox.enqueue(name, payload)
+            self.dispatcher.wake()
+            logger.info(f"📬 Queued notification for {', '.join(self.channels)}")
+            return
         
-        if self.config.get('slack', {}).get('enabled'):
-            self.send_slack(updates)
+        with ThreadPoolExecutor(max_workers=max(1, len(self.channels))) as executor:
+            for name in self.channels:
+                executor.submit(getattr(self, f"send_{name}"), updates)
+    
+    def flush(self, timeout=None):
+        """Wait for queued notifications, including retries due within ``timeout``"""
+        if not self.dispatcher:
+            return True
+        delivered = self.dispatcher.flush(timeout)
+        if not delivered:
+            logger.warning("⏳ Some notifications are still pending; they will be retried on the next run")
+        return delivered
+    
+    def close(self):
+        if self.dispatcher:
+            self.dispatcher.stop()
+        else:
+            for channel in self.channels.values():
+                channel.close()
     
     def send_email(self, updates):
         """Send email notification"""
+        channel = self.channels.get('email') or EmailChannel(self)
         try:
-            email_config = self.config['email']
-            
-            msg = MIMEMultipart()
-            msg['From'] = email_config['from_email']
-            msg['To'] = ', '.join(email_config['to_emails'])
-            msg['Subject'] = f"🔔 Certification Updates - {datetime.now().strftime('%B %d, %Y')}"
-            
-            body = self._create_email_body(updates)
-            msg.attach(MIMEText(body, 'html'))
-            
-            with smtplib.SMTP(email_config['smtp_server'], email_config['smtp_port']) as server:
-                server.starttls()
-                password = os.getenv('EMAIL_PASSWORD')
-                if not password:
-                    logger.error("EMAIL_PASSWORD environment variable not set")
-                    return
-                
-                server.login(email_config['from_email'], password)
-                server.send_message(msg)
-            
-            logger.info("✓ Email notification sent successfully")
-        
+            channel.send(updates)
         except Exception as e:
             logger.error(f"✗ Error sending email: {str(e)}")
     
-    def _create_email_body(self, updates):
-        """Create HTML email body"""
-        # Group by provider
-        by_provider = {}
-        for update in updates:
-            provider = update.get('provider', 'Other').upper()
-            if provider not in by_provider:
-                by_provider[provider] = []
-            by_provider[provider].append(update)
+    def build_digest(self, updates):
+        """Group updates by provider or, with ``group_by: exam``, by exam code"""
+        return Digest.from_updates(updates, group_by=self.config.get('group_by', 'provider'))
+    
+    def build_email_messages(self, updates):
+        """Build one MIME message per distinct recipient digest.
         
-        html = """
-        <html>
-        <head>
-            <style>
-                body { 
-                    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Arial, sans-serif;
-                    line-height: 1.6;
-                    color: #333;
-                    max-width: 800px;
-                    margin: 0 auto;
-                    padding: 20px;
-                    background-color: #f5f5f5;
-                }
-                .header {
-                    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                    color: white;
-                    padding: 30px;
-                    border-radius: 10px;
-                    margin-bottom: 30px;
-                    text-align: center;
-                }
-                .header h1 {
-                    margin: 0;
-                    font-size: 28px;
-                }
-                .provider-section {
-                    margin-bottom: 30px;
-                }
-                .provider-header {
-                    background-color: #667eea;
-                    color: white;
-                    padding: 15px;
-                    border-radius: 8px;
-                    font-size: 20px;
-                    font-weight: bold;
-                    margin-bottom: 15px;
-                }
-                .update-card {
-                    background-color: white;
-                    border-left: 4px solid #667eea;
-                    border-radius: 8px;
-                    padding: 20px;
-                    margin-bottom: 15px;
-                    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-                }
-                .update-title {
-                    font-size: 18px;
-                    font-weight: bold;
-                    color: #2c3e50;
-                    margin-bottom: 10px;
-                }
-                .update-meta {
-                    font-size: 13px;
-                    color: #7f8c8d;
-                    margin-bottom: 15px;
-                }
-                .update-summary {
-                    color: #555;
-                    margin-bottom: 15px;
-                    line-height: 1.6;
-                }
-                .keywords {
-                    margin-bottom: 15px;
-                }
-                .keyword-tag {
-                    display: inline-block;
-                    background-color: #e8f5e9;
-                    color: #2e7d32;
-                    padding: 4px 12px;
-                    border-radius: 12px;
-                    font-size: 12px;
-                    margin-right: 8px;
-                    margin-bottom: 8px;
-                }
-                .btn {
-                    display: inline-block;
-                    padding: 10px 20px;
-                    background-color: #667eea;
-                    color: white !important;
-                    text-decoration: none;
-                    border-radius: 5px;
-                    font-weight: 500;
-                }
-                .summary-box {
-                    background-color: #fff3cd;
-                    border-left: 4px solid #ffc107;
-                    padding: 15px;
-                    margin-bottom: 30px;
-                    border-radius: 4px;
-                }
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>🔔 Certification Updates</h1>
-                <p style="margin: 10px 0 0 0; opacity: 0.9;">
-                    """ + datetime.now().strftime('%B %d, %Y') + """
-                </p>
-            </div>
-            
-            <div class="summary-box">
-                <strong>📊 Summary:</strong> Found """ + str(len(updates)) + """ updates across """ + str(len(by_provider)) + """ providers
-            </div>
+        Everyone in ``to_emails`` gets the full digest; entries in
+        ``recipients`` get only the providers they list. All variants are
+        rendered from the same grouped digest.
         """
+        email_config = self.config['email']
+        digest = self.build_digest(updates)
         
-        for provider, provider_updates in by_provider.items():
-            html += f'<div class="provider-section">'
-            html += f'<div class="provider-header">📚 {provider}</div>'
-            
-            for update in provider_updates:
-                html += '<div class="update-card">'
-                html += f'<div class="update-title">{update.get("title", "No title")}</div>'
-                
-                html += '<div class="update-meta">'
-                html += f'📍 {update.get("source", "Unknown")} | '
-                html += f'📅 {update.get("published_date", "Recent")[:10]} | '
-                html += f'⭐ {update.get("relevance_score", 0)}/100'
-                html += '</div>'
-                
-                if update.get('keywords_matched'):
-                    html += '<div class="keywords">'
-                    for keyword in update['keywords_matched'][:5]:
-                        html += f'<span class="keyword-tag">🏷️ {keyword}</span>'
-                    html += '</div>'
-                
-                summary = update.get('summary', '')
-                if summary:
-                    # Clean and truncate summary
-                    summary = summary.replace('\n', ' ').strip()
-                    if len(summary) > 400:
-                        summary = summary[:400] + '...'
-                    html += f'<div class="update-summary">{summary}</div>'
-                
-                if update.get('url'):
-                    html += f'<a href="{update["url"]}" class="btn">Read Full Article →</a>'
-                
-                html += '</div>'
-            
-            html += '</div>'
+        audiences = {}
+        if email_config.get('to_emails'):
+            audiences[()] = list(email_config['to_emails'])
+        for recipient in email_config.get('recipients') or []:
+            providers = tuple(sorted(p.upper() for p in recipient.get('providers') or []))
+            audiences.setdefault(providers, []).append(recipient['email'])
         
-        html += """
-            <div style="margin-top: 40px; padding-top: 20px; border-top: 1px solid #ddd; text-align: center; color: #7f8c8d; font-size: 12px;">
-                <p>Automated Certification Monitor</p>
-                <p>AWS | Azure | Kubernetes | Google Cloud | DevOps</p>
-            </div>
-        </body>
-        </html>
-        """
+        messages = []
+        for providers, to_emails in audiences.items():
+            variant = digest.for_providers(providers)
+            if variant.total == 0:
+                continue
+            messages.append((to_emails, self._build_message(variant, to_emails)))
+        return messages
+    
+    def _build_message(self, digest, to_emails):
+        from email.mime.multipart import MIMEMultipart
+        from email.mime.text import MIMEText
+        email_config = self.config['email']
         
-        return html
+        msg = MIMEMultipart('alternative')
+        msg['From'] = email_config['from_email']
+        msg['To'] = ', '.join(to_emails)
+        msg['Subject'] = f"🔔 Certification Updates - {digest.date.strftime('%B %d, %Y')}"
+        
+        # Plain text first: clients show the last part they can render
+        msg.attach(MIMEText(render_text(digest), 'plain'))
+        msg.attach(MIMEText(render_html(digest), 'html'))
+        return msg
+    
+    def _create_email_body(self, updates):
+        """Create HTML email body"""
+        return render_html(self.build_digest(updates))
     
     def send_slack(self, updates):
         """Send Slack notification"""
+        channel = self.channels.get('slack') or SlackChannel(self)
         try:
-            webhook_url = os.getenv('SLACK_WEBHOOK_URL') or self.config['slack'].get('webhook_url')
-            if not webhook_url:
-                logger.warning("Slack webhook URL not configured")
-                return
-            
-            # Group by provider
-            by_provider = {}
-            for update in updates:
-                provider = update.get('provider', 'Other').upper()
-                if provider not in by_provider:
-                    by_provider[provider] = []
-                by_provider[provider].append(update)
-            
-            blocks = [
-                {
-                    "type": "header",
-                    "text": {
-                        "type": "plain_text",
-                        "text": f"🔔 {len(updates)} Certification Updates",
-                        "emoji": True
-                    }
-                },
-                {"type": "divider"}
-            ]
-            
-            for provider, provider_updates in list(by_provider.items())[:5]:  # Limit providers
-                blocks.append({
-                    "type": "section",
-                    "text": {
-                        "type": "mrkdwn",
-                        "text": f"*📚 {provider}* - {len(provider_updates)} update(s)"
-                    }
-                })
-                
-                for update in provider_updates[:3]:  # Limit updates per provider
-                    text = f"*{update.get('title', 'No title')[:100]}*\n"
-                    text += f"_{update.get('source', 'Unknown')}_ • Score: {update.get('relevance_score', 0)}/100"
-                    
-                    block = {
-                        "type": "section",
-                        "text": {"type": "mrkdwn", "text": text}
-                    }
-                    
-                    if update.get('url'):
-                        block["accessory"] = {
-                            "type": "button",
-                            "text": {"type": "plain_text", "text": "Read"},
-                            "url": update['url']
-                        }
-                    
-                    blocks.append(block)
-                
-                blocks.append({"type": "divider"})
-            
-            response = requests.post(webhook_url, json={"blocks": blocks})
-            response.raise_for_status()
-            
-            logger.info("✓ Slack notification sent successfully")
-        
+            channel.send(updates)
         except Exception as e:
             logger.error(f"✗ Error sending Slack notification: {str(e)}")
+    
+    def _create_slack_blocks(self, updates):
+        """Create Slack Block Kit blocks"""
+        return render_slack_blocks(self.build_digest(updates))
+
+class EmailChannel:
+    """SMTP delivery that keeps one authenticated connection open between sends"""
+    
+    def __init__(self, notifier):
+        self.notifier = notifier
+        self._server = None
+        self._lock = threading.Lock()
+    
+    def send(self, updates):
+        email_config = self.notifier.config['email']
+        password = os.getenv('EMAIL_PASSWORD')
+        if not password:
+            raise PermanentDeliveryError("EMAIL_PASSWORD environment variable not set")
+        
+        messages = self.notifier.build_email_messages(updates)
+        with self._lock:
+            try:
+                server = self._connection(email_config, password)
+                for to_emails, msg in messages:
+                    server.send_message(msg, to_addrs=to_emails)
+            except (smtplib.SMTPException, OSError) as e:
+                self._drop()
+                raise DeliveryError(f"SMTP delivery failed: {e}")
+        
+        logger.info("✓ Email notification sent successfully")
+    
+    def _connection(self, email_config, password):
+        """Reuse the open SMTP session if it still answers, else log in again"""
+        if self._server is not None:
+            try:
+                if self._server.noop()[0] == 250:
+                    return self._server
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._drop()
+        
+        server = smtplib.SMTP(email_config['smtp_server'], email_config['smtp_port'], timeout=30)
+        try:
+            server.starttls()
+            server.login(email_config['from_email'], password)
+        except smtplib.SMTPAuthenticationError as e:
+            server.close()
+            raise PermanentDeliveryError(f"SMTP login rejected: {e}")
+        except Exception:
+            server.close()
+            raise
+        self._server = server
+        return server
+    
+    def _drop(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                self._server.close()
+            self._server = None
+    
+    def close(self):
+        with self._lock:
+            self._drop()
+
+class SlackChannel:
+    """Slack webhook delivery over a pooled session, respecting rate limits"""
+    
+    def __init__(self, notifier):
+        self.notifier = notifier
+        config = notifier.config.get('delivery', {})
+        self.timeout = config.get('http_timeout_seconds', 15)
+        self.min_interval = config.get('slack_min_interval_seconds', 1.0)
+        self._session = None
+        self._last_post = 0.0
+        self._lock = threading.Lock()
+    
+    def send(self, updates):
+        webhook_url = os.getenv('SLACK_WEBHOOK_URL') or self.notifier.config['slack'].get('webhook_url')
+        if not webhook_url:
+            raise PermanentDeliveryError("Slack webhook URL not configured")
+        
+        blocks = self.notifier._create_slack_blocks(updates)
+        with self._lock:
+            # Slack allows roughly one webhook message per second
+            wait = self._last_post + self.min_interval - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            
+            if self._session is None:
+                self._session = requests.Session()
+            try:
+                response = self._session.post(webhook_url, json={"blocks": blocks}, timeout=self.timeout)
+            except requests.RequestException as e:
+                raise DeliveryError(f"Slack request failed: {e}")
+            finally:
+                self._last_post = time.time()
+        
+        if response.status_code == 429:
+            retry_after = float(response.headers.get('Retry-After', 30))
+            raise DeliveryError("Slack rate limit hit", retry_after=retry_after)
+        if response.status_code >= 500:
+            raise DeliveryError(f"Slack returned HTTP {response.status_code}")
+        if response.status_code >= 400:
+            raise PermanentDeliveryError(f"Slack rejected the message: HTTP {response.status_code} {response.text[:200]}")
+        
+        logger.info("✓ Slack notification sent successfully")
+    
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
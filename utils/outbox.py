@@ -0,0 +1,289 @@
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+class DeliveryError(Exception):
+    """A delivery attempt failed; retry later"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class PermanentDeliveryError(Exception):
+    """A delivery can never succeed as configured; do not retry"""
+
+class Outbox:
+    """Durable SQLite queue of notifications waiting to be delivered"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt REAL NOT NULL,
+                created REAL NOT NULL,
+                last_error TEXT
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, channel, next_attempt)"
+        )
+        self._conn.commit()
+
+    def enqueue(self, channel, payload):
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO outbox (channel, payload, next_attempt, created) VALUES (?, ?, ?, ?)",
+                (channel, json.dumps(payload), now, now)
+            )
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def due(self, channel, now=None):
+        """Pending messages for a channel whose next attempt time has come"""
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, payload, attempts FROM outbox "
+                "WHERE status = 'pending' AND channel = ? AND next_attempt <= ? ORDER BY id",
+                (channel, now)
+            ).fetchall()
+        return [
+            {'id': row[0], 'payload': json.loads(row[1]), 'attempts': row[2]}
+            for row in rows
+        ]
+
+    def channels_due(self, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT channel FROM outbox WHERE status = 'pending' AND next_attempt <= ?",
+                (now,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def next_attempt_at(self, channels=None):
+        """Earliest scheduled attempt among pending messages (of ``channels``), or None"""
+        sql = "SELECT MIN(next_attempt) FROM outbox WHERE status = 'pending'"
+        params = ()
+        if channels is not None:
+            sql += f" AND channel IN ({','.join('?' for _ in channels)})"
+            params = tuple(channels)
+        with self._lock:
+            row = self._conn.execute(sql, params).fetchone()
+        return row[0]
+
+    def mark_sent(self, ids):
+        self._update(ids, "status = 'sent', last_error = NULL")
+
+    def mark_failed(self, ids, error):
+        self._update(ids, "status = 'failed', attempts = attempts + 1, last_error = ?", (str(error),))
+
+    def mark_retry(self, ids, error, delay):
+        self._update(
+            ids, "attempts = attempts + 1, next_attempt = ?, last_error = ?",
+            (time.time() + delay, str(error))
+        )
+
+    def purge_sent(self, older_than_days=7):
+        """Delete delivered messages older than a number of days"""
+        cutoff = time.time() - older_than_days * 86400
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM outbox WHERE status = 'sent' AND created < ?", (cutoff,)
+            ).rowcount
+            self._conn.commit()
+        return removed
+
+    def _update(self, ids, assignments, params=()):
+        if not ids:
+            return
+        placeholders = ','.join('?' for _ in ids)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE outbox SET {assignments} WHERE id IN ({placeholders})",
+                (*params, *ids)
+            )
+            self._conn.commit()
+
+class OutboxDispatcher:
+    """Background delivery of outbox messages, one worker per channel.
+
+    Channels are objects with ``send(updates)`` and ``close()``. All due
+    messages for a channel are merged into one batch and sent together.
+    Failed batches are retried with jittered exponential backoff (or the
+    channel's requested ``retry_after``) until ``max_attempts`` is reached.
+    Sent messages are purged after ``sent_retention_days``.
+    """
+
+    def __init__(self, outbox, channels, config=None):
+        config = config or {}
+        self.outbox = outbox
+        self.channels = channels
+        self.max_attempts = config.get('max_attempts', 8)
+        self.retry_base = config.get('retry_base_seconds', 30)
+        self.retry_max = config.get('retry_max_seconds', 3600)
+        self.idle_close_seconds = config.get('idle_close_seconds', 60)
+        self.sent_retention_days = config.get('sent_retention_days', 7)
+        self._last_purge = 0.0
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._idle = threading.Condition()
+        self._busy = False
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, len(channels)), thread_name_prefix='notify'
+        )
+        self._thread = threading.Thread(target=self._run, name='outbox', daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        """Deliver anything due now without waiting for the next poll"""
+        self._wake.set()
+
+    def flush(self, timeout=None):
+        """Wait until every pending message is delivered or given up on.
+
+        Retries scheduled within ``timeout`` are waited for too. Returns
+        False if anything is still pending: the timeout ran out, or a
+        retry is due after it.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        self.wake()
+        with self._idle:
+            while True:
+                if not self._busy:
+                    next_attempt = self.outbox.next_attempt_at(self.channels)
+                    if next_attempt is None:
+                        return True
+                    if deadline is not None and next_attempt > deadline:
+                        return False
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(timeout=1.0 if remaining is None else min(remaining, 1.0))
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self._executor.shutdown(wait=True)
+        for channel in self.channels.values():
+            channel.close()
+
+    def _run(self):
+        last_activity = time.time()
+        while not self._stop.is_set():
+            due = [name for name in self.outbox.channels_due() if name in self.channels]
+            if due:
+                with self._idle:
+                    self._busy = True
+                try:
+                    # Channels deliver in parallel; each drains its own queue
+                    futures = [self._executor.submit(self._drain, name) for name in due]
+                    for future in futures:
+                        try:
+                            future.result()
+                        except Exception as e:
+                            logger.error(f"✗ Outbox delivery error: {e}")
+                finally:
+                    with self._idle:
+                        self._busy = False
+                        self._idle.notify_all()
+                last_activity = time.time()
+                continue
+
+            with self._idle:
+                self._idle.notify_all()
+
+            if time.time() - self._last_purge > 3600:
+                self._purge_sent()
+
+            if time.time() - last_activity > self.idle_close_seconds:
+                # Don't hold SMTP/HTTP connections open while nothing is queued
+                for channel in self.channels.values():
+                    channel.close()
+
+            next_attempt = self.outbox.next_attempt_at(self.channels)
+            wait = 30.0 if next_attempt is None else max(0.0, min(30.0, next_attempt - time.time()))
+            self._wake.wait(timeout=wait)
+            self._wake.clear()
+
+    def _purge_sent(self):
+        self._last_purge = time.time()
+        try:
+            removed = self.outbox.purge_sent(self.sent_retention_days)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not purge sent notifications: {e}")
+            return
+        if removed:
+            logger.debug(f"Purged {removed} sent notification(s) from the outbox")
+
+    def _drain(self, name):
+        channel = self.channels[name]
+        messages = self.outbox.due(name)
+        if not messages:
+            return
+
+        ids = [message['id'] for message in messages]
+        updates = merge_payloads(message['payload'] for message in messages)
+        attempts = max(message['attempts'] for message in messages) + 1
+
+        try:
+            channel.send(updates)
+        except PermanentDeliveryError as e:
+            logger.error(f"✗ {name} notification dropped: {e}")
+            self.outbox.mark_failed(ids, e)
+        except Exception as e:
+            if attempts >= self.max_attempts:
+                logger.error(f"✗ {name} notification failed after {attempts} attempts: {e}")
+                self.outbox.mark_failed(ids, e)
+                return
+            delay = getattr(e, 'retry_after', None) or self._backoff(attempts)
+            logger.warning(f"✗ {name} notification failed (attempt {attempts}), retrying in {delay:.0f}s: {e}")
+            self.outbox.mark_retry(ids, e, delay)
+        else:
+            self.outbox.mark_sent(ids)
+
+    def _backoff(self, attempts):
+        delay = min(self.retry_max, self.retry_base * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+def merge_payloads(payloads):
+    """Combine queued update lists into one batch, dropping repeats"""
+    merged = []
+    seen = set()
+    batches = 0
+    for payload in payloads:
+        batches += 1
+        for update in payload:
+            key = (update.get('url', ''), update.get('title', ''))
+            if key not in seen:
+                seen.add(key)
+                merged.append(update)
+
+    if batches > 1:
+        merged.sort(
+            key=lambda u: (u.get('relevance_score', 0), u.get('published_date', '')),
+            reverse=True
+        )
+    return merged
@@ -0,0 +1,119 @@
+import difflib
+import hashlib
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+def section_hash(section):
+    return hashlib.sha1(f"{section.heading}\n{section.text}".encode('utf-8', 'replace')).hexdigest()
+
+def build_snapshot(sections, max_text=4000):
+    """Compact snapshot of a page: a hash per section plus trimmed text for diffs"""
+    snapshot_sections = {}
+    counts = {}
+    for section in sections:
+        # Repeated headings get a numeric suffix so each keeps its own entry
+        counts[section.heading] = counts.get(section.heading, 0) + 1
+        key = section.heading if counts[section.heading] == 1 else f"{section.heading} #{counts[section.heading]}"
+        snapshot_sections[key] = {
+            'heading': section.heading,
+            'context': section.context,
+            'hash': section_hash(section),
+            'text': section.text[:max_text],
+        }
+
+    page_digest = hashlib.sha1()
+    for key, entry in snapshot_sections.items():
+        page_digest.update(f"{key}\0{entry['hash']}\0".encode('utf-8', 'replace'))
+
+    return {'page_hash': page_digest.hexdigest(), 'sections': snapshot_sections}
+
+def diff_snapshots(previous, current, max_diff=1000):
+    """Sections added or changed between two snapshots, with a unified diff each"""
+    changes = []
+    old_sections = previous.get('sections', {}) if previous else {}
+    for key, entry in current['sections'].items():
+        old = old_sections.get(key)
+        if old is not None and old['hash'] == entry['hash']:
+            continue
+
+        old_lines = old['text'].splitlines() if old else []
+        new_lines = entry['text'].splitlines()
+        diff = '\n'.join(difflib.unified_diff(
+            old_lines, new_lines, fromfile='previous', tofile='current', lineterm='', n=1
+        ))
+        old_set = set(old_lines)
+        added = [line for line in new_lines if line not in old_set]
+
+        changes.append({
+            'key': key,
+            'heading': entry['heading'],
+            'context': entry.get('context', ''),
+            'change': 'changed' if old else 'added',
+            'added_text': '\n'.join(added),
+            'text': entry['text'],
+            'diff': diff[:max_diff],
+        })
+    return changes
+
+class PageSnapshotStore:
+    """Per-page section snapshots kept between scans (JSON on disk)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._snapshots = {}
+        self._staged = {}
+        self.load()
+
+    def load(self):
+        """(Re)read the snapshots saved on disk"""
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    snapshots = json.load(f)
+            except Exception as e:
+                logger.warning(f"Could not read page snapshots {self.path}: {e}")
+                return
+            with self._lock:
+                self._snapshots = snapshots
+
+    def get(self, url):
+        with self._lock:
+            return self._snapshots.get(url)
+
+    def stage(self, url, snapshot):
+        """Queue a new snapshot to be saved on the next commit()"""
+        with self._lock:
+            self._staged[url] = snapshot
+
+    def unstage(self, url):
+        """Keep the saved snapshot of a page, so its changes are diffed again"""
+        with self._lock:
+            self._staged.pop(url, None)
+
+    def take_staged(self):
+        """Return and clear the staged snapshots, for another process to commit"""
+        with self._lock:
+            staged, self._staged = self._staged, {}
+        return staged
+
+    def commit(self):
+        """Persist staged snapshots once the scan's updates have been handled"""
+        with self._lock:
+            if not self._staged:
+                return
+            self._snapshots.update(self._staged)
+            self._staged = {}
+            data = dict(self._snapshots)
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
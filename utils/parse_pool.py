@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.metrics import ScanMetrics
+from utils.seen_store import ReadOnlySeenStore
+from utils.update import Update
+
+logger = logging.getLogger(__name__)
+
+# Fields every update gets from its source; filled back in by the scan process
+SOURCE_FIELDS = ('provider', 'source', 'type')
+
+class RawResponse:
+    """The parts of a fetched response a parser needs, cheap to send to a worker"""
+
+    __slots__ = ('content', 'encoding')
+
+    def __init__(self, content, encoding=None):
+        self.content = content
+        self.encoding = encoding
+
+    @property
+    def text(self):
+        return str(self.content, self.encoding or 'utf-8', errors='replace')
+
+class _PageSnapshots:
+    """Snapshot store stand-in for the one page a worker is parsing"""
+
+    def __init__(self, previous):
+        self.previous = previous
+        self.staged = None
+
+    def get(self, url):
+        return self.previous
+
+    def stage(self, url, snapshot):
+        self.staged = snapshot
+
+class ParsePool:
+    """Parses fetched feeds and pages in worker processes.
+
+    Raw bytes go to the workers, which run the monitors' own parsing code
+    against a read-only view of the seen store and return compact records:
+    updates without their per-source fields, the items to mark as seen
+    and feed watermarks to move, the page snapshot to stage and the
+    metrics for the source. Everything
+    that writes state (seen store, snapshots, validator cache, metrics)
+    is applied here in the scan process.
+    """
+
+    def __init__(self, settings, workers, seen_items_path=None):
+        self.workers = workers
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            # spawn: the scan process has live threads and SQLite handles
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(settings, seen_items_path, logging.getLogger().getEffectiveLevel()),
+        )
+
+    @classmethod
+    def for_scan(cls, settings, source_count):
+        """A pool if settings enable one and the scan is big enough, else None.
+
+        Starting worker processes costs more than it saves on small scans,
+        so those keep parsing in-process.
+        """
+        fetch_config = settings.get('fetch', {})
+        workers = fetch_config.get('parse_processes', 0) or 0
+        cores = os.cpu_count() or 1
+        # More processes than cores only adds overhead
+        workers = cores if workers < 0 else min(workers, cores)
+        if workers < 2:
+            return None
+
+        min_sources = fetch_config.get('process_min_sources', 100)
+        if source_count < min_sources:
+            logger.debug(f"Parsing {source_count} sources in-process (process pool needs {min_sources})")
+            return None
+
+        logger.info(f"🧮 Parsing in {workers} worker processes")
+        seen_items_path = settings.get('cache', {}).get('seen_items', '.cache/seen_items.sqlite3')
+        return cls(settings, workers, seen_items_path)
+
+    async def process_feed(self, monitor, feed_info, provider, response):
+        """Parse a fetched feed in a worker; same result as monitor.process_feed"""
+        loop = asyncio.get_running_loop()
+        record = await loop.run_in_executor(
+            self._executor, _parse_feed, feed_info, provider, RawResponse(response.content)
+        )
+        updates = self._apply(monitor, feed_info, provider, record)
+        if monitor.cache:
+            monitor.cache.update(feed_info['url'], response)
+        return updates
+
+    async def process_page(self, monitor, page_info, provider, response):
+        """Parse a fetched page in a worker; same result as monitor.process_page"""
+        url = page_info['url']
+        raw = RawResponse(response.content, response.encoding or response.apparent_encoding)
+        use_snapshots = monitor.snapshots is not None
+        previous = monitor.snapshots.get(url) if use_snapshots else None
+
+        loop = asyncio.get_running_loop()
+        record = await loop.run_in_executor(
+            self._executor, _parse_page, page_info, provider, raw, use_snapshots, previous
+        )
+        if record['snapshot'] is not None:
+            monitor.snapshots.stage(url, record['snapshot'])
+        updates = self._apply(monitor, page_info, provider, record)
+        if monitor.cache:
+            monitor.cache.update(url, response)
+        return updates
+
+    def _apply(self, monitor, info, provider, record):
+        metrics = monitor.source_metrics(info, provider)
+        for name, seconds in record['phases'].items():
+            metrics.add_time(name, seconds)
+        metrics.entries += record['entries']
+        metrics.updates += len(record['updates'])
+        for name, amount in record['counters'].items():
+            monitor.metrics.increment(name, amount)
+
+        if monitor.seen_store:
+            seen, watermarks = record['seen']
+            for key, digest in seen.items():
+                monitor.seen_store.stage(key, digest)
+            for feed_url, watermark in watermarks.items():
+                monitor.seen_store.stage_watermark(feed_url, watermark)
+
+        fields = dict(zip(SOURCE_FIELDS, record['source_fields']))
+        return [Update.from_dict(dict(update, **fields)) for update in record['updates']]
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+# Worker process state, set up once per process by _init_worker
+_rss_monitor = None
+_webpage_monitor = None
+_seen_store = None
+
+def _init_worker(settings, seen_items_path, log_level):
+    global _rss_monitor, _webpage_monitor, _seen_store
+    # Imported here: the monitors themselves import from utils
+    from monitors.rss_monitor import RSSMonitor
+    from monitors.webpage_monitor import WebPageMonitor
+
+    logging.basicConfig(level=log_level, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    _seen_store = ReadOnlySeenStore(seen_items_path) if seen_items_path else None
+    _rss_monitor = RSSMonitor(settings, seen_store=_seen_store)
+    _webpage_monitor = WebPageMonitor(settings, seen_store=_seen_store)
+
+def _start_task(monitor):
+    monitor.metrics = ScanMetrics()
+    if _seen_store:
+        # Drop anything left staged by a task that raised
+        _seen_store.take_staged()
+
+def _parse_feed(feed_info, provider, raw):
+    _start_task(_rss_monitor)
+    updates = _rss_monitor.process_feed(feed_info, provider, raw)
+    return _record(_rss_monitor, feed_info, provider, updates)
+
+def _parse_page(page_info, provider, raw, use_snapshots, previous):
+    snapshots = _PageSnapshots(previous) if use_snapshots else None
+    _webpage_monitor.snapshots = snapshots
+    _start_task(_webpage_monitor)
+    updates = _webpage_monitor.process_page(page_info, provider, raw)
+    record = _record(_webpage_monitor, page_info, provider, updates)
+    record['snapshot'] = snapshots.staged if snapshots else None
+    return record
+
+def _record(monitor, info, provider, updates):
+    """Compact result of parsing one source in a worker"""
+    metrics = monitor.source_metrics(info, provider)
+    return {
+        # Plain dicts: summaries are cleaned here, in the worker
+        'updates': [
+            {key: value for key, value in update.to_dict().items() if key not in SOURCE_FIELDS}
+            for update in updates
+        ],
+        'source_fields': [updates[0].get(field) for field in SOURCE_FIELDS] if updates else [],
+        'seen': _seen_store.take_staged() if _seen_store else ({}, {}),
+        'phases': dict(metrics.phases),
+        'entries': metrics.entries,
+        'counters': dict(monitor.metrics.counters),
+    }
@@ -0,0 +1,337 @@
+from datetime import datetime
+from html import escape
+from string import Template
+
+from utils.cert_codes import CertIndex, primary_code
+
+EMAIL_CSS = """
+        body { 
+            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Arial, sans-serif;
+            line-height: 1.6;
+            color: #333;
+            max-width: 800px;
+            margin: 0 auto;
+            padding: 20px;
+            background-color: #f5f5f5;
+        }
+        .header {
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            color: white;
+            padding: 30px;
+            border-radius: 10px;
+            margin-bottom: 30px;
+            text-align: center;
+        }
+        .header h1 {
+            margin: 0;
+            font-size: 28px;
+        }
+        .provider-section {
+            margin-bottom: 30px;
+        }
+        .provider-header {
+            background-color: #667eea;
+            color: white;
+            padding: 15px;
+            border-radius: 8px;
+            font-size: 20px;
+            font-weight: bold;
+            margin-bottom: 15px;
+        }
+        .update-card {
+            background-color: white;
+            border-left: 4px solid #667eea;
+            border-radius: 8px;
+            padding: 20px;
+            margin-bottom: 15px;
+            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+        }
+        .update-title {
+            font-size: 18px;
+            font-weight: bold;
+            color: #2c3e50;
+            margin-bottom: 10px;
+        }
+        .update-meta {
+            font-size: 13px;
+            color: #7f8c8d;
+            margin-bottom: 15px;
+        }
+        .update-summary {
+            color: #555;
+            margin-bottom: 15px;
+            line-height: 1.6;
+        }
+        .update-diff {
+            background-color: #f8f9fa;
+            border-radius: 4px;
+            padding: 10px;
+            font-size: 12px;
+            white-space: pre-wrap;
+            margin-bottom: 15px;
+        }
+        .keywords {
+            margin-bottom: 15px;
+        }
+        .keyword-tag {
+            display: inline-block;
+            background-color: #e8f5e9;
+            color: #2e7d32;
+            padding: 4px 12px;
+            border-radius: 12px;
+            font-size: 12px;
+            margin-right: 8px;
+            margin-bottom: 8px;
+        }
+        .btn {
+            display: inline-block;
+            padding: 10px 20px;
+            background-color: #667eea;
+            color: white !important;
+            text-decoration: none;
+            border-radius: 5px;
+            font-weight: 500;
+        }
+        .summary-box {
+            background-color: #fff3cd;
+            border-left: 4px solid #ffc107;
+            padding: 15px;
+            margin-bottom: 30px;
+            border-radius: 4px;
+        }
+"""
+
+# The stylesheet is baked into the page template once, at import
+EMAIL_TEMPLATE = Template(Template("""<html>
+<head>
+    <style>$css</style>
+</head>
+<body>
+    <div class="header">
+        <h1>🔔 Certification Updates</h1>
+        <p style="margin: 10px 0 0 0; opacity: 0.9;">
+            $date
+        </p>
+    </div>
+
+    <div class="summary-box">
+        <strong>📊 Summary:</strong> Found $total updates across $provider_count providers
+    </div>
+$sections
+    <div style="margin-top: 40px; padding-top: 20px; border-top: 1px solid #ddd; text-align: center; color: #7f8c8d; font-size: 12px;">
+        <p>Automated Certification Monitor</p>
+        <p>AWS | Azure | Kubernetes | Google Cloud | DevOps</p>
+    </div>
+</body>
+</html>
+""").safe_substitute(css=EMAIL_CSS))
+
+SECTION_TEMPLATE = Template(
+    '<div class="provider-section">'
+    '<div class="provider-header">📚 $name</div>'
+    '$cards'
+    '</div>'
+)
+
+CARD_TEMPLATE = Template(
+    '<div class="update-card">'
+    '<div class="update-title">$title</div>'
+    '<div class="update-meta">📍 $source | 📅 $date | ⭐ $score/100</div>'
+    '$keywords$summary$diff$link'
+    '</div>'
+)
+
+def source_label(update, limit=3):
+    """Source name, or every source that reported a merged update"""
+    names = []
+    for ref in update.get('sources') or [update]:
+        name = ref.get('source') or 'Unknown'
+        if name not in names:
+            names.append(name)
+    if len(names) > limit:
+        return f"{', '.join(names[:limit])} +{len(names) - limit} more"
+    return ', '.join(names)
+
+class DigestItem:
+    """Display-ready fields of one update, computed once for every channel"""
+
+    __slots__ = ('provider', 'title', 'source', 'date', 'score', 'keywords', 'summary', 'diff', 'url')
+
+    def __init__(self, update):
+        self.provider = (update.get('provider') or 'Other').upper()
+        self.title = update.get('title', 'No title')
+        self.source = source_label(update)
+        self.date = (update.get('published_date') or 'Recent')[:10]
+        self.score = update.get('relevance_score', 0)
+        self.keywords = list(update.get('keywords_matched') or [])[:5]
+        self.url = update.get('url', '')
+
+        # Clean and truncate summary
+        summary = (update.get('summary') or '').replace('\n', ' ').strip()
+        if len(summary) > 400:
+            summary = summary[:400] + '...'
+        self.summary = summary
+
+        # What changed on an announcement page since the last snapshot
+        self.diff = update.get('diff') or ''
+
+class Digest:
+    """Updates grouped by provider, shared by the email and Slack renderers"""
+
+    def __init__(self, groups, date=None):
+        self.groups = groups
+        self.date = date or datetime.now()
+
+    @classmethod
+    def from_updates(cls, updates, date=None, group_by='provider'):
+        """Group updates, keeping the order they arrive in.
+
+        ``group_by='exam'`` groups by the exam each update is mainly about,
+        most reported exams first; updates naming no exam stay grouped by
+        provider after them.
+        """
+        if group_by == 'exam':
+            return cls.by_exam(updates, date)
+        groups = {}
+        for update in updates:
+            item = DigestItem(update)
+            groups.setdefault(item.provider, []).append(item)
+        return cls(list(groups.items()), date)
+
+    @classmethod
+    def by_exam(cls, updates, date=None):
+        index = CertIndex()
+        unassigned = {}
+        for update in updates:
+            code = primary_code(update)
+            if code:
+                index.add(update, codes=(code,))
+            else:
+                item = DigestItem(update)
+                unassigned.setdefault(item.provider, []).append(item)
+
+        groups = [
+            (code, [DigestItem(update) for update in index.updates_for(code)])
+            for code, _ in index.codes()
+        ]
+        return cls(groups + list(unassigned.items()), date)
+
+    @property
+    def total(self):
+        return sum(len(items) for _, items in self.groups)
+
+    @property
+    def provider_count(self):
+        return len({item.provider for _, items in self.groups for item in items})
+
+    def for_providers(self, providers):
+        """Sub-digest restricted to some providers (None keeps everything)"""
+        if not providers:
+            return self
+        wanted = {provider.upper() for provider in providers}
+        groups = []
+        for name, items in self.groups:
+            items = [item for item in items if item.provider in wanted]
+            if items:
+                groups.append((name, items))
+        return Digest(groups, self.date)
+
+def render_html(digest):
+    """Render a digest as the HTML email body"""
+    sections = []
+    for name, items in digest.groups:
+        cards = []
+        for item in items:
+            keywords = ''
+            if item.keywords:
+                keywords = '<div class="keywords">' + ''.join(
+                    f'<span class="keyword-tag">🏷️ {escape(keyword)}</span>' for keyword in item.keywords
+                ) + '</div>'
+            summary = f'<div class="update-summary">{escape(item.summary)}</div>' if item.summary else ''
+            diff = f'<pre class="update-diff">{escape(item.diff)}</pre>' if item.diff else ''
+            link = f'<a href="{escape(item.url)}" class="btn">Read Full Article →</a>' if item.url else ''
+            cards.append(CARD_TEMPLATE.substitute(
+                title=escape(item.title),
+                source=escape(item.source),
+                date=escape(item.date),
+                score=item.score,
+                keywords=keywords,
+                summary=summary,
+                diff=diff,
+                link=link,
+            ))
+        sections.append(SECTION_TEMPLATE.substitute(name=escape(name), cards=''.join(cards)))
+
+    return EMAIL_TEMPLATE.substitute(
+        date=digest.date.strftime('%B %d, %Y'),
+        total=digest.total,
+        provider_count=digest.provider_count,
+        sections='\n'.join(sections),
+    )
+
+def render_text(digest):
+    """Render a digest as the plain-text alternative of the email"""
+    lines = [
+        f"Certification Updates - {digest.date.strftime('%B %d, %Y')}",
+        f"Found {digest.total} updates across {digest.provider_count} providers",
+        '',
+    ]
+    for name, items in digest.groups:
+        lines.append(f"== {name} ==")
+        for item in items:
+            lines.append(f"* {item.title}")
+            lines.append(f"  {item.source} | {item.date} | {item.score}/100")
+            if item.keywords:
+                lines.append(f"  Keywords: {', '.join(item.keywords)}")
+            if item.summary:
+                lines.append(f"  {item.summary}")
+            if item.diff:
+                lines.extend(f"    {line}" for line in item.diff.splitlines())
+            if item.url:
+                lines.append(f"  {item.url}")
+            lines.append('')
+    return '\n'.join(lines)
+
+def render_slack_blocks(digest, max_providers=5, max_items=3, max_diff=500):
+    """Render a digest as Slack Block Kit blocks"""
+    blocks = [
+        {
+            "type": "header",
+            "text": {
+                "type": "plain_text",
+                "text": f"🔔 {digest.total} Certification Updates",
+                "emoji": True
+            }
+        },
+        {"type": "divider"}
+    ]
+
+    for name, items in digest.groups[:max_providers]:
+        blocks.append({
+            "type": "section",
+            "text": {"type": "mrkdwn", "text": f"*📚 {name}* - {len(items)} update(s)"}
+        })
+
+        for item in items[:max_items]:
+            block = {
+                "type": "section",
+                "text": {
+                    "type": "mrkdwn",
+                    "text": f"*{item.title[:100]}*\n_{item.source}_ • Score: {item.score}/100"
+                }
+            }
+            if item.diff:
+                # Slack mrkdwn only needs &, < and > escaped
+                diff = item.diff[:max_diff].replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+                block["text"]["text"] += f"\n```{diff}```"
+            if item.url:
+                block["accessory"] = {
+                    "type": "button",
+                    "text": {"type": "plain_text", "text": "Read"},
+                    "url": item.url
+                }
+            blocks.append(block)
+
+        blocks.append({"type": "divider"})
+
+    return blocks
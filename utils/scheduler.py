@@ -0,0 +1,134 @@
+import heapq
+import itertools
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# sources.yaml section for each kind of source
+SECTIONS = {'rss': 'rss_feeds', 'webpage': 'announcement_pages'}
+
+class ScheduledSource:
+    """A source with its own adaptive polling interval"""
+
+    def __init__(self, kind, provider, info, base_interval):
+        self.kind = kind
+        self.provider = provider
+        self.info = info
+        self.base_interval = base_interval
+        self.interval = base_interval
+        self.next_due = 0.0
+
+    @property
+    def key(self):
+        return f"{self.kind}:{self.info['url']}"
+
+class SourceScheduler:
+    """Priority queue of sources ordered by when they are next due.
+
+    Each source starts at its own ``interval_minutes`` (or the default from
+    settings). A poll that finds nothing new stretches the interval by
+    ``backoff_factor`` up to ``max_interval_minutes``; a poll that finds
+    updates shrinks it by ``speedup_factor`` down to ``min_interval_minutes``.
+    """
+
+    def __init__(self, settings, state_path=None):
+        config = settings.get('scheduler', {})
+        self.default_interval = config.get('default_interval_minutes', 60) * 60
+        self.min_interval = config.get('min_interval_minutes', 15) * 60
+        self.max_interval = config.get('max_interval_minutes', 1440) * 60
+        self.backoff_factor = config.get('backoff_factor', 2.0)
+        self.speedup_factor = config.get('speedup_factor', 0.5)
+        self.state_path = state_path
+        self._heap = []
+        self._counter = itertools.count()
+        self._state = self._load_state()
+
+    @classmethod
+    def from_sources(cls, sources, settings, state_path=None):
+        """Build a scheduler covering every feed and page in sources.yaml"""
+        scheduler = cls(settings, state_path)
+        for kind, section in SECTIONS.items():
+            for provider, entries in (sources.get(section) or {}).items():
+                for info in entries:
+                    scheduler.add(kind, provider, info)
+        return scheduler
+
+    def add(self, kind, provider, info):
+        base = info.get('interval_minutes')
+        base = base * 60 if base else self.default_interval
+        source = ScheduledSource(kind, provider, info, self._clamp(base))
+
+        # Resume where a previous run left off, if we have state for it
+        saved = self._state.get(source.key)
+        if saved:
+            source.interval = self._clamp(saved.get('interval', source.interval))
+            source.next_due = saved.get('next_due', 0.0)
+
+        self._push(source)
+        return source
+
+    def pop_due(self, now=None):
+        """Remove and return every source whose next poll time has passed"""
+        now = time.time() if now is None else now
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap)[2])
+        return due
+
+    def seconds_until_next(self, now=None):
+        now = time.time() if now is None else now
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - now)
+
+    def reschedule(self, source, changed, now=None):
+        """Adapt a polled source's interval and queue its next poll"""
+        now = time.time() if now is None else now
+        if changed:
+            source.interval = self._clamp(min(source.interval, source.base_interval) * self.speedup_factor)
+        else:
+            source.interval = self._clamp(source.interval * self.backoff_factor)
+        source.next_due = now + source.interval
+        self._push(source)
+
+    def sources_config(self, due):
+        """Group due sources back into the sources.yaml layout for a scan"""
+        config = {section: {} for section in SECTIONS.values()}
+        for source in due:
+            config[SECTIONS[source.kind]].setdefault(source.provider, []).append(source.info)
+        return config
+
+    def save_state(self):
+        """Persist intervals and due times so a restart keeps its backoff"""
+        if not self.state_path:
+            return
+        state = {
+            source.key: {'interval': source.interval, 'next_due': source.next_due}
+            for _, _, source in self._heap
+        }
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.state_path)
+
+    def _push(self, source):
+        heapq.heappush(self._heap, (source.next_due, next(self._counter), source))
+
+    def _clamp(self, interval):
+        return max(self.min_interval, min(self.max_interval, interval))
+
+    def _load_state(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not read scheduler state {self.state_path}: {e}")
+            return {}
@@ -0,0 +1,241 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from urllib.request import pathname2url
+
+logger = logging.getLogger(__name__)
+
+TRACKING_PARAMS = ('utm_', 'fbclid', 'gclid', 'mc_cid', 'mc_eid')
+
+def normalize_url(url):
+    """Normalize a URL so trivial variations map to the same key"""
+    if not url:
+        return ''
+
+    parts = urlsplit(url.strip())
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(TRACKING_PARAMS)
+    ]
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((
+        parts.scheme.lower(),
+        parts.netloc.lower(),
+        path,
+        urlencode(sorted(query)),
+        ''
+    ))
+
+def item_key(url, guid=None):
+    """Stable identity for an item: its GUID if present, else its normalized URL"""
+    if guid:
+        return f"guid:{guid.strip()}"
+    return f"url:{normalize_url(url)}"
+
+# Where a feed's entries stood when it was last parsed: the key and date
+# (a timestamp) of its newest entry, and whether it listed newest first
+Watermark = namedtuple('Watermark', ['key', 'published', 'newest_first'])
+
+def content_hash(*parts):
+    """Hash of an item's content, used to notice edited posts"""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update((part or '').encode('utf-8', 'replace'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+class SeenStore:
+    """SQLite-backed record of items already processed by earlier scans,
+    plus each feed's watermark (see ``Watermark``)"""
+
+    def __init__(self, path, retention_days=30):
+        self.path = path
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._staged = {}
+        self._staged_watermarks = {}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS seen_items (
+                key TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_seen_items_last_seen ON seen_items (last_seen)"
+        )
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS feed_watermarks (
+                feed_url TEXT PRIMARY KEY,
+                key TEXT NOT NULL,
+                published REAL,
+                newest_first INTEGER NOT NULL,
+                last_seen REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+        self.expire()
+
+    def is_seen(self, key, digest):
+        """True if this exact item (same key and content) was already processed"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash FROM seen_items WHERE key = ?", (key,)
+            ).fetchone()
+        return row is not None and row[0] == digest
+
+    def stage(self, key, digest):
+        """Queue an item to be marked as seen on the next commit()"""
+        with self._lock:
+            self._staged[key] = digest
+
+    def unstage(self, key):
+        """Drop a staged item so the next scan treats it as new again"""
+        with self._lock:
+            self._staged.pop(key, None)
+
+    def watermark(self, feed_url):
+        """The feed's committed ``Watermark``, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT key, published, newest_first FROM feed_watermarks WHERE feed_url = ?",
+                (feed_url,)
+            ).fetchone()
+        return Watermark(row[0], row[1], bool(row[2])) if row else None
+
+    def stage_watermark(self, feed_url, watermark):
+        """Queue a feed's new watermark to be saved on the next commit()"""
+        with self._lock:
+            self._staged_watermarks[feed_url] = watermark
+
+    def unstage_watermark(self, feed_url):
+        """Keep a feed's saved watermark, so the next scan reads back to it"""
+        with self._lock:
+            self._staged_watermarks.pop(feed_url, None)
+
+    def commit(self):
+        """Persist every staged item; call once a scan has been fully handled"""
+        now = time.time()
+        with self._lock:
+            if self._staged_watermarks:
+                self._conn.executemany("""
+                    INSERT OR REPLACE INTO feed_watermarks (feed_url, key, published, newest_first, last_seen)
+                    VALUES (?, ?, ?, ?, ?)
+                """, [
+                    (url, mark.key, mark.published, int(mark.newest_first), now)
+                    for url, mark in self._staged_watermarks.items()
+                ])
+                self._conn.commit()
+                self._staged_watermarks = {}
+            if not self._staged:
+                return 0
+            rows = [(key, digest, now, now) for key, digest in self._staged.items()]
+            self._conn.executemany("""
+                INSERT INTO seen_items (key, content_hash, first_seen, last_seen)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    content_hash = excluded.content_hash,
+                    last_seen = excluded.last_seen
+            """, rows)
+            self._conn.commit()
+            self._staged = {}
+        return len(rows)
+
+    def expire(self):
+        """Drop records older than the retention window"""
+        cutoff = time.time() - self.retention_days * 86400
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM seen_items WHERE last_seen < ?", (cutoff,)
+            ).rowcount
+            self._conn.execute("DELETE FROM feed_watermarks WHERE last_seen < ?", (cutoff,))
+            self._conn.commit()
+        if removed:
+            logger.info(f"Expired {removed} seen item(s) older than {self.retention_days} days")
+        return removed
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class ReadOnlySeenStore:
+    """Read-only view of a SeenStore database for parser processes and
+    shard workers.
+
+    Lookups see what earlier scans committed, exactly like SeenStore.
+    Staged items and watermarks are collected locally and handed back with
+    take_staged() so the owning process can stage them in the real store.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._staged = {}
+        self._staged_watermarks = {}
+        self._conn = None
+
+    def _query(self, sql, params):
+        """First row of a query, or None if the database or table isn't there yet"""
+        with self._lock:
+            if self._conn is None:
+                # Opened once the owning process has created the database
+                if not os.path.exists(self.path):
+                    return None
+                uri = 'file:' + pathname2url(os.path.abspath(self.path)) + '?mode=ro'
+                self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            try:
+                return self._conn.execute(sql, params).fetchone()
+            except sqlite3.OperationalError:
+                # Table not created yet: nothing has been seen
+                return None
+
+    def is_seen(self, key, digest):
+        row = self._query("SELECT content_hash FROM seen_items WHERE key = ?", (key,))
+        return row is not None and row[0] == digest
+
+    def stage(self, key, digest):
+        with self._lock:
+            self._staged[key] = digest
+
+    def unstage(self, key):
+        with self._lock:
+            self._staged.pop(key, None)
+
+    def watermark(self, feed_url):
+        row = self._query(
+            "SELECT key, published, newest_first FROM feed_watermarks WHERE feed_url = ?",
+            (feed_url,)
+        )
+        return Watermark(row[0], row[1], bool(row[2])) if row else None
+
+    def stage_watermark(self, feed_url, watermark):
+        with self._lock:
+            self._staged_watermarks[feed_url] = watermark
+
+    def unstage_watermark(self, feed_url):
+        with self._lock:
+            self._staged_watermarks.pop(feed_url, None)
+
+    def take_staged(self):
+        """Return and clear the items and watermarks staged since the last call"""
+        with self._lock:
+            staged, self._staged = self._staged, {}
+            watermarks, self._staged_watermarks = self._staged_watermarks, {}
+        return staged, watermarks
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
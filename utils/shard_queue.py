@@ -0,0 +1,226 @@
+import bisect
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from utils.scheduler import SECTIONS
+from utils.seen_store import normalize_url
+
+logger = logging.getLogger(__name__)
+
+# Points each shard gets on the hash ring; more points spread sources more evenly
+RING_REPLICAS = 64
+
+Claim = namedtuple('Claim', ['cycle', 'shard', 'sources', 'attempt'])
+
+def _ring_hash(text):
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'big')
+
+class ShardRing:
+    """Consistent-hash ring assigning source URLs to ``shard_count`` shards.
+
+    A source always lands in the same shard, and changing the number of
+    shards only moves about 1/N of the sources, so each shard's HTTP
+    validators and watermarks stay useful across cycles.
+    """
+
+    def __init__(self, shard_count, replicas=RING_REPLICAS):
+        points = sorted(
+            (_ring_hash(f"shard-{shard}#{replica}"), shard)
+            for shard in range(max(1, shard_count))
+            for replica in range(replicas)
+        )
+        self._hashes = [point for point, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    def shard_for(self, url):
+        index = bisect.bisect(self._hashes, _ring_hash(normalize_url(url)))
+        return self._shards[index % len(self._shards)]
+
+def split_sources(sources, shard_count):
+    """Split a sources.yaml-style config into per-shard configs (empty shards left out)"""
+    ring = ShardRing(shard_count)
+    shards = {}
+    for section in SECTIONS.values():
+        for provider, entries in (sources.get(section) or {}).items():
+            for entry in entries:
+                shard = shards.setdefault(
+                    ring.shard_for(entry['url']), {name: {} for name in SECTIONS.values()}
+                )
+                shard[section].setdefault(provider, []).append(entry)
+    return dict(sorted(shards.items()))
+
+def source_count(sources):
+    return sum(
+        len(entries)
+        for section in SECTIONS.values()
+        for entries in (sources.get(section) or {}).values()
+    )
+
+class ShardQueue:
+    """SQLite work queue that a coordinator and its workers share.
+
+    The coordinator opens a cycle with one row per shard. Workers claim a
+    shard under a lease they renew while scanning and hand back its result.
+    A worker that dies stops renewing, so once its lease runs out the shard
+    goes to the next worker that asks. A shard that keeps losing its worker
+    is given up after ``max_attempts`` claims. Only that shard is delayed,
+    never the rest of the cycle.
+
+    The database only needs a filesystem every process can reach; no other
+    service is involved.
+    """
+
+    def __init__(self, path, lease_seconds=300, max_attempts=3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Autocommit, with explicit BEGIN IMMEDIATE where claims must be atomic
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS cycles (
+                id INTEGER PRIMARY KEY,
+                created REAL NOT NULL,
+                closed REAL
+            );
+            CREATE TABLE IF NOT EXISTS shards (
+                cycle INTEGER NOT NULL,
+                shard INTEGER NOT NULL,
+                sources TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_until REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                result TEXT,
+                PRIMARY KEY (cycle, shard)
+            );
+            CREATE INDEX IF NOT EXISTS idx_shards_status ON shards (status, cycle);
+        """)
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def open_cycle(self, shard_sources):
+        """Queue a cycle of shards; returns ``(cycle, resumed)``.
+
+        If an earlier coordinator stopped before closing its cycle, that
+        cycle is resumed instead, so results workers already handed in are
+        not lost.
+        """
+        with self._transaction() as conn:
+            row = conn.execute("SELECT id FROM cycles WHERE closed IS NULL ORDER BY id LIMIT 1").fetchone()
+            if row:
+                return row[0], True
+            cycle = conn.execute("INSERT INTO cycles (created) VALUES (?)", (time.time(),)).lastrowid
+            conn.executemany(
+                "INSERT INTO shards (cycle, shard, sources) VALUES (?, ?, ?)",
+                [(cycle, shard, json.dumps(sources)) for shard, sources in shard_sources.items()]
+            )
+        return cycle, False
+
+    def claim(self, worker):
+        """Lease the next shard that needs scanning, or return None if there is none"""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("""
+                UPDATE shards SET status = 'failed', error = 'lease expired ' || attempts || ' times'
+                WHERE status = 'leased' AND lease_until < ? AND attempts >= ?
+            """, (now, self.max_attempts))
+            row = conn.execute("""
+                SELECT s.cycle, s.shard, s.sources, s.attempts FROM shards s
+                JOIN cycles c ON c.id = s.cycle
+                WHERE c.closed IS NULL
+                  AND (s.status = 'pending' OR (s.status = 'leased' AND s.lease_until < ?))
+                ORDER BY s.cycle, s.attempts, s.shard
+                LIMIT 1
+            """, (now,)).fetchone()
+            if row is None:
+                return None
+            cycle, shard, sources, attempts = row
+            conn.execute("""
+                UPDATE shards SET status = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1
+                WHERE cycle = ? AND shard = ?
+            """, (worker, now + self.lease_seconds, cycle, shard))
+        return Claim(cycle, shard, json.loads(sources), attempts + 1)
+
+    def renew(self, claim, worker):
+        """Extend a lease; False if the worker no longer holds it"""
+        with self._lock:
+            return self._conn.execute("""
+                UPDATE shards SET lease_until = ?
+                WHERE cycle = ? AND shard = ? AND worker = ? AND status = 'leased'
+            """, (time.time() + self.lease_seconds, claim.cycle, claim.shard, worker)).rowcount == 1
+
+    def complete(self, claim, worker, result):
+        """Hand in a shard's result; False if the lease was lost meanwhile"""
+        payload = json.dumps(result)
+        with self._lock:
+            return self._conn.execute("""
+                UPDATE shards SET status = 'done', result = ?, lease_until = NULL, error = NULL
+                WHERE cycle = ? AND shard = ? AND worker = ? AND status = 'leased'
+            """, (payload, claim.cycle, claim.shard, worker)).rowcount == 1
+
+    def release(self, claim, worker, error):
+        """Give a shard back after a failed scan, to be retried (or given up on)"""
+        status = 'failed' if claim.attempt >= self.max_attempts else 'pending'
+        with self._lock:
+            self._conn.execute("""
+                UPDATE shards SET status = ?, error = ?, lease_until = NULL
+                WHERE cycle = ? AND shard = ? AND worker = ? AND status = 'leased'
+            """, (status, error, claim.cycle, claim.shard, worker))
+
+    def progress(self, cycle):
+        """Number of the cycle's shards in each status"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM shards WHERE cycle = ? GROUP BY status", (cycle,)
+            ).fetchall()
+        return dict(rows)
+
+    def results(self, cycle):
+        """``(shard, result)`` for every shard of the cycle that was handed in"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT shard, result FROM shards WHERE cycle = ? AND status = 'done' ORDER BY shard",
+                (cycle,)
+            ).fetchall()
+        return [(shard, json.loads(result)) for shard, result in rows]
+
+    def unfinished(self, cycle):
+        """``(shard, status, error)`` for the cycle's shards without a result"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT shard, status, error FROM shards WHERE cycle = ? AND status != 'done' ORDER BY shard",
+                (cycle,)
+            ).fetchall()
+
+    def close_cycle(self, cycle):
+        """Mark a cycle merged; its shards are dropped and late results ignored"""
+        with self._transaction() as conn:
+            conn.execute("UPDATE cycles SET closed = ? WHERE id = ?", (time.time(), cycle))
+            conn.execute("DELETE FROM shards WHERE cycle = ?", (cycle,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
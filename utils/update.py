@@ -0,0 +1,152 @@
+import sys
+import time
+from collections.abc import Mapping
+from datetime import datetime, timezone
+
+# Dict keys every update has, in the order monitors used to build them
+FIELDS = (
+    'provider', 'source', 'title', 'url', 'summary',
+    'published_date', 'relevance_score', 'type', 'keywords_matched',
+    'cert_codes', 'transitions',
+)
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+def to_timestamp(value):
+    """Seconds since the epoch for a datetime or ISO string (naive means UTC)"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+class LazySummary:
+    """Summary cleaned on first read; ``raw`` is the text it is cleaned from"""
+
+    __slots__ = ('raw', '_clean')
+
+    def __init__(self, raw, clean):
+        self.raw = raw
+        self._clean = clean
+
+    def __call__(self):
+        return self._clean(self.raw)
+
+class Update(Mapping):
+    """One certification update, stored compactly.
+
+    Provider, source and type names repeat across thousands of updates, so
+    they are interned; the publication date is kept as a UTC timestamp so
+    updates sort numerically; and the summary may be given as a callable
+    that is only run the first time the summary is read, so updates that
+    get filtered out never pay for HTML cleaning.
+
+    It reads like the dict updates used to be (``update['title']``,
+    ``update.get('summary')``, ``dict(update)``), and fields beyond the
+    standard ones (page ``change``/``diff``, merged ``sources``) are kept
+    in a small side dict. ``to_dict`` gives a plain, JSON-ready copy.
+    """
+
+    __slots__ = (
+        'provider', 'source', 'title', 'url', '_summary', 'published',
+        'relevance_score', 'type', 'keywords_matched', 'cert_codes', 'transitions', '_extra',
+    )
+
+    def __init__(self, title, url='', summary='', published=None, relevance_score=0,
+                 keywords_matched=(), provider=None, source=None, type=None,
+                 cert_codes=(), transitions=(), **extra):
+        self.provider = _intern(provider)
+        self.source = _intern(source)
+        self.title = title
+        self.url = url
+        self._summary = summary
+        self.published = time.time() if published is None else to_timestamp(published)
+        self.relevance_score = relevance_score
+        self.type = _intern(type)
+        self.keywords_matched = tuple(_intern(k) for k in keywords_matched or ())
+        self.cert_codes = tuple(_intern(c) for c in cert_codes or ())
+        self.transitions = tuple((_intern(old), _intern(new)) for old, new in transitions or ())
+        self._extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data):
+        data = dict(data)
+        return cls(published=data.pop('published_date', None), **data)
+
+    @property
+    def summary(self):
+        summary = self._summary
+        if callable(summary):
+            summary = self._summary = summary()
+        return summary
+
+    @summary.setter
+    def summary(self, value):
+        self._summary = value
+
+    @property
+    def raw_summary(self):
+        """The summary as given, without cleaning it if that hasn't happened yet"""
+        summary = self._summary
+        if isinstance(summary, LazySummary):
+            return summary.raw
+        return self.summary
+
+    @property
+    def published_date(self):
+        """Publication time as an ISO 8601 string in UTC"""
+        return datetime.fromtimestamp(self.published, timezone.utc).isoformat()
+
+    def to_dict(self):
+        data = {key: self[key] for key in FIELDS}
+        data['keywords_matched'] = list(self.keywords_matched)
+        data['cert_codes'] = list(self.cert_codes)
+        data['transitions'] = [list(pair) for pair in self.transitions]
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+    def __getitem__(self, key):
+        if key in FIELDS:
+            return getattr(self, key)
+        if self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key == 'published_date':
+            self.published = to_timestamp(value)
+        elif key in ('provider', 'source', 'type'):
+            setattr(self, key, _intern(value))
+        elif key in FIELDS:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def __contains__(self, key):
+        return key in FIELDS or bool(self._extra and key in self._extra)
+
+    def __iter__(self):
+        yield from FIELDS
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return len(FIELDS) + len(self._extra or ())
+
+    def __repr__(self):
+        return f"Update({self.provider!r}, {self.source!r}, {self.title!r})"
+
+def as_update(update):
+    """``update`` itself if it is an Update, else an Update built from a dict"""
+    return update if isinstance(update, Update) else Update.from_dict(update)
@@ -0,0 +1,135 @@
+import heapq
+import html
+import itertools
+import re
+
+from utils.cert_codes import CertIndex
+from utils.near_duplicates import NearDuplicateIndex, tokens
+from utils.seen_store import normalize_url
+from utils.update import as_update
+
+# Updates with fewer words than this are only deduplicated exactly
+MIN_FUZZY_TOKENS = 8
+
+# Markup in raw HTML summaries, kept out of the words compared
+TAG_RE = re.compile(r'<[^>]*>')
+
+def same_exams(a, b):
+    """False when both updates name exams and the exams differ"""
+    return not (a.cert_codes and b.cert_codes) or set(a.cert_codes) == set(b.cert_codes)
+
+class UpdateFilter:
+    """Incremental dedup / relevance filter for a stream of updates.
+
+    Updates are fed in one at a time as monitors produce them. Accepted
+    updates are kept in a bounded min-heap when ``max_updates`` is set, so
+    memory stays flat however many sources are scanned; the lower-ranked
+    updates it pushes out are listed in ``evicted`` so the scan can leave
+    them unseen for the next one. Plain dict updates are converted to
+    ``Update`` records on the way in.
+
+    Duplicates are caught on the canonical URL plus title, and, when
+    ``near_duplicate_similarity`` is set, on the words of title and summary
+    (MinHash/LSH lookup, confirmed by Jaccard similarity). The words come
+    from the raw summary with its tags stripped, so updates dropped here
+    never have their summary cleaned. Updates naming different exam codes
+    are never merged, however alike their wording. A duplicate of
+    an accepted update is merged into it: the first update stays, and
+    every source that reported it is listed under ``sources``.
+
+    ``cert_index`` maps exam codes to the accepted updates mentioning them.
+    """
+
+    def __init__(self, min_relevance=0, max_updates=None, near_duplicate_similarity=0.7):
+        self.min_relevance = min_relevance
+        self.max_updates = max_updates
+        self.received = 0
+        self.accepted = 0
+        self.merged = 0
+        # Accepted updates that did not make the top max_updates
+        self.evicted = []
+        self.cert_index = CertIndex()
+        # Exact key -> accepted update (None if it was rejected)
+        self._by_key = {}
+        self._near = NearDuplicateIndex(near_duplicate_similarity) if near_duplicate_similarity else None
+        self._heap = []
+        self._counter = itertools.count()
+
+    def add(self, update):
+        """Offer one update; returns True if it passed the filters"""
+        self.received += 1
+        update = as_update(update)
+
+        key = self._key(update)
+        if key in self._by_key:
+            self._merge(self._by_key[key], update)
+            return False
+
+        if self.min_relevance > 0 and update.relevance_score < self.min_relevance:
+            self._by_key[key] = None
+            return False
+
+        if self._near is not None:
+            text = f"{update.title} {html.unescape(TAG_RE.sub(' ', update.raw_summary or ''))}"
+            words = tokens(text)
+            if len(words) >= MIN_FUZZY_TOKENS:
+                original = self._near.find_or_add(words, update, accept=lambda other: same_exams(other, update))
+                if original is not None:
+                    self._by_key[key] = original
+                    self._merge(original, update)
+                    return False
+
+        self._by_key[key] = update
+        self.accepted += 1
+
+        # Later arrivals lose ties, matching a stable sort of the full list
+        entry = (self._sort_key(update), -next(self._counter), update)
+        if self.max_updates is None:
+            self._heap.append(entry)
+        elif len(self._heap) < self.max_updates:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            evicted = heapq.heapreplace(self._heap, entry)[2]
+            self.cert_index.discard(evicted)
+            self.evicted.append(evicted)
+        else:
+            self.evicted.append(update)
+            return True
+        self.cert_index.add(update)
+        return True
+
+    def extend(self, updates):
+        for update in updates:
+            self.add(update)
+
+    def results(self):
+        """Accepted updates, best first (by relevance, then date)"""
+        ordered = sorted(self._heap, key=lambda entry: entry[:2], reverse=True)
+        return [update for _, _, update in ordered]
+
+    def _key(self, update):
+        """Exact identity: canonical URL (no tracking params) plus title"""
+        url = update.get('url', '')
+        title = ' '.join((update.get('title') or '').lower().split())
+        return f"{normalize_url(url) if url else ''}:{title}"
+
+    def _merge(self, original, duplicate):
+        """Record that ``duplicate`` reported the same thing as ``original``"""
+        if original is None:
+            return
+        self.merged += 1
+        sources = original.setdefault('sources', [source_ref(original)])
+        ref = source_ref(duplicate)
+        if ref not in sources:
+            sources.append(ref)
+
+    def _sort_key(self, update):
+        return (update.relevance_score, update.published)
+
+def source_ref(update):
+    """Where an update came from, as listed in a merged update's ``sources``"""
+    return {
+        'provider': update.get('provider'),
+        'source': update.get('source'),
+        'url': update.get('url', ''),
+    }